@@ -11,7 +11,7 @@ Requires:   aops-vulcanus >= v1.2.0
 Requires:   python3-requests python3-flask python3-flask-restful python3-marshmallow >= 3.13.0
 Requires:   python3-numpy python3-pandas python3-prometheus-api-client python3-uWSGI
 Requires:   python3-sqlalchemy python3-PyMySQL python3-Flask-APScheduler >= 1.11.0
-Requires:   python3-scipy python3-adtk
+Requires:   python3-scipy python3-adtk python3-ijson python3-redis
 Provides:   aops-diana
 Conflicts:  aops-check
 
@@ -15,7 +15,23 @@ Time:
 Author:
 Description: default config
 """
-diana = {"IP": "127.0.0.1", "PORT": 11112, "MODE": "configurable", "TIMING_CHECK": "on"}
+diana = {
+    "IP": "127.0.0.1",
+    "PORT": 11112,
+    "MODE": "configurable",
+    "TIMING_CHECK": "on",
+    "TIMING_WHEEL": "off",
+    "WHEEL_SIZE": 512,
+    "PHASE_SPREAD": "off",
+    "CATCH_UP": "off",
+    "MAX_CATCH_UP_RANGE": 3600,
+    "PERSIST_TIME_KEEPER": "off",
+    "TIME_KEEPER_FLUSH_INTERVAL": 5,
+    "WORKFLOW_CACHE": "off",
+    "WORKFLOW_CACHE_SIZE": 1000,
+    "WORKFLOW_CACHE_TTL": 600,
+    "STATS_INTERVAL": 60,
+}
 
 default_mode = {"PERIOD": 60, "STEP": 60}
 
@@ -32,7 +48,30 @@ redis = {"IP": "127.0.0.1", "PORT": 6379}
 
 elasticsearch = {"IP": "127.0.0.1", "PORT": 9200, "MAX_ES_QUERY_NUM": 10000000}
 
-prometheus = {"IP": "127.0.0.1", "PORT": 9090, "QUERY_RANGE_STEP": "15s"}
+prometheus = {
+    "IP": "127.0.0.1",
+    "PORT": 9090,
+    "QUERY_RANGE_STEP": "15s",
+    "BATCH_QUERY": "off",
+    "MULTI_HOST_QUERY": "off",
+    "MAX_INSTANCES_PER_QUERY": 50,
+    "QUERY_CONCURRENCY": 1,
+    "SERIES_CACHE_TTL": 0,
+    "SERIES_CACHE_SIZE": 10000,
+    "DISCOVERY_MODE": "query",
+    "SERIES_DISCOVERY_WINDOW": 300,
+    "INCREMENTAL_QUERY": "off",
+    "WINDOW_CACHE_SIZE": 20000,
+    "AGGREGATION_PUSHDOWN": "off",
+    "STREAM_DECODE": "off",
+    "POOL_CONNECTIONS": 10,
+    "POOL_MAXSIZE": 10,
+    "HTTP_COMPRESSION": "on",
+    "DEMAND_DRIVEN_FETCH": "off",
+    "FETCH_DEDUP": "off",
+    "FETCH_RESULT_TTL": 30,
+    "FETCH_RESULT_CACHE_SIZE": 1000,
+}
 
 agent = {"DEFAULT_INSTANCE_PORT": 8888}
 
@@ -42,11 +81,24 @@ consumer = {
     "KAFKA_SERVER_LIST": "127.0.0.1:9092",
     "ENABLE_AUTO_COMMIT": False,
     "AUTO_OFFSET_RESET": "earliest",
-    "TIMEOUT_MS": 5,
-    "MAX_RECORDS": 3,
+    "TIMEOUT_MS": 1000,
+    "MAX_RECORDS": 100,
     "TASK_NAME": "CHECK_TASK",
     "TASK_GROUP_ID": "CHECK_TASK_GROUP_ID",
     "RESULT_NAME": "CHECK_RESULT",
+    "CONTROL_NAME": "CHECK_CONTROL",
+    "DEAD_LETTER_NAME": "",
+    "COMMIT_INTERVAL": 0,
+    "WORKER_NUM": 1,
+    "WORKER_MODE": "thread",
+    "COMPUTE_POOL": "off",
+    "COMPUTE_WORKER_NUM": 0,
+    "PIPELINE": "off",
+    "PIPELINE_QUEUE_SIZE": 64,
+    "LOAD_CONCURRENCY": 4,
+    "FETCH_CONCURRENCY": 8,
+    "DETECT_CONCURRENCY": 1,
+    "STORE_CONCURRENCY": 4,
 }
 
 producer = {
@@ -57,4 +109,9 @@ producer = {
     "RETRY_BACKOFF_MS": 100,
     "TASK_NAME": "CHECK_TASK",
     "TASK_GROUP_ID": "CHECK_TASK_GROUP_ID",
+    "CONTROL_NAME": "CHECK_CONTROL",
+    "POOLED_PRODUCER": "off",
+    "LINGER_MS": 5,
+    "BATCH_SIZE": 16384,
+    "COMPRESSION_TYPE": "none",
 }
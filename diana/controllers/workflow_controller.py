@@ -26,6 +26,7 @@ from vulcanus.log.log import LOGGER
 
 from diana.database.dao.workflow_dao import WorkflowDao
 from diana.core.rule.workflow import Workflow
+from diana.core.rule.workflow_cache import DELETE, STOP, UPDATE, publish_workflow_change
 from diana.utils.schema.workflow import (
     CreateWorkflowSchema,
     QueryWorkflowSchema,
@@ -236,6 +237,7 @@ class StopWorkflow(BaseResponse):
 
                 workflow_proxy.update_workflow_status(workflow_id, "hold")
                 check_scheduler.stop_workflow(workflow_id)
+                publish_workflow_change(workflow_id, STOP)
 
         except sqlalchemy.exc.SQLAlchemyError:
             return DATABASE_CONNECT_ERROR
@@ -271,6 +273,8 @@ class DeleteWorkflow(BaseResponse):
         try:
             with WorkflowDao() as workflow_proxy:
                 status = workflow_proxy.delete_workflow(params)
+            if status == SUCCEED:
+                publish_workflow_change(params["workflow_id"], DELETE)
             return self.response(code=status)
 
         except sqlalchemy.exc.SQLAlchemyError:
@@ -306,6 +310,8 @@ class UpdateWorkflow(BaseResponse):
         try:
             with WorkflowDao() as workflow_proxy:
                 status = workflow_proxy.update_workflow(args)
+            if status == SUCCEED:
+                publish_workflow_change(args["workflow_id"], UPDATE)
             return status
 
         except sqlalchemy.exc.SQLAlchemyError:
@@ -25,8 +25,9 @@ from vulcanus.log.log import LOGGER
 from vulcanus.common import singleton
 from diana.conf import configuration
 from diana.database.dao.workflow_dao import WorkflowDao
+from diana.core.check.check_scheduler.dispatcher import check_dispatcher
 from diana.core.check.check_scheduler.task_keeper import CheckTaskKeeper
-from diana.core.check.check_scheduler.time_keeper import time_keeper_manager
+from diana.core.check.check_scheduler.time_keeper import time_keeper_manager, phase_offset
 
 
 @singleton
@@ -39,6 +40,10 @@ class CheckScheduler:
         self._workflow_task_manager = {}
         self._work_flow_list_lock = Lock()
         self.timing_check = True if configuration.diana.get("TIMING_CHECK") == "on" else False
+        # dispatch all workflows by one timing wheel instead of an apscheduler job per workflow
+        self.timing_wheel = configuration.diana.get("TIMING_WHEEL") == "on"
+        # spread ticks of workflows over their step by an offset hashed from workflow id
+        self.phase_spread = configuration.diana.get("PHASE_SPREAD") == "on"
 
     @staticmethod
     def _query_running_workflow() -> tuple:
@@ -81,15 +86,27 @@ class CheckScheduler:
         if status != SUCCEED:
             return status
 
+        workflows = []
         for workflow_id, workflow_info in result.items():
             step = workflow_info.get("step")
             if step <= 0:
                 LOGGER.error("Invalid scheduler timed task step %d", step)
                 status = PARAM_ERROR
                 continue
-            username = workflow_info.get("username")
-            self._add_workflow(workflow_id, username, step, app)
+            phase = phase_offset(workflow_id, step) if self.phase_spread else None
+            workflows.append((workflow_id, workflow_info.get("username"), step, phase))
+
+        # restore all time keepers at once, they resume from the positions stored before restart
+        resumed = time_keeper_manager.restore_time_keepers(
+            {workflow_id: (step, phase) for workflow_id, _, step, phase in workflows}
+        )
+        LOGGER.info("Restore %d workflows, %d of them resume from stored positions.", len(workflows), resumed)
+        if self.timing_wheel:
+            check_dispatcher.add_workflows(workflows)
+            return status
 
+        for workflow_id, username, step, phase in workflows:
+            self._add_timed_task(workflow_id, username, step, phase, app)
         return status
 
     def _add_workflow(self, workflow_id: str, username: str, step: int, app: Optional[Flask] = None) -> None:
@@ -105,15 +122,26 @@ class CheckScheduler:
             None
 
         """
+        phase = phase_offset(workflow_id, step) if self.phase_spread else None
         # add time keeper
-        time_keeper_manager.add_time_keeper(workflow_id, step)
+        time_keeper_manager.add_time_keeper(workflow_id, step, phase)
+
+        if self.timing_wheel:
+            check_dispatcher.add_workflow(workflow_id, username, step, phase)
+            return
+        self._add_timed_task(workflow_id, username, step, phase, app)
 
-        # add task keeper and add timed task
+    def _add_timed_task(
+        self, workflow_id: str, username: str, step: int, phase: Optional[int], app: Optional[Flask] = None
+    ) -> None:
+        """
+        Add task keeper and its apscheduler job, the time keeper should have been added
+        """
         with self._work_flow_list_lock:
             if workflow_id in self._workflow_task_manager:
                 check_task_keeper = self._workflow_task_manager[workflow_id]
                 check_task_keeper.delete_timed_task(app)
-            check_task_keeper = CheckTaskKeeper(workflow_id, username, step)
+            check_task_keeper = CheckTaskKeeper(workflow_id, username, step, phase)
             check_task_keeper.add_timed_task(app)
             self._workflow_task_manager[workflow_id] = check_task_keeper
 
@@ -154,13 +182,16 @@ class CheckScheduler:
             return SUCCEED
 
         # stop timed task and delete task keeper
-        with self._work_flow_list_lock:
-            if workflow_id not in self._workflow_task_manager:
-                LOGGER.warning("workflow_id %s not existed when stop.", workflow_id)
-            else:
-                check_task_keeper = self._workflow_task_manager[workflow_id]
-                check_task_keeper.delete_timed_task()
-                self._workflow_task_manager.pop(workflow_id)
+        if self.timing_wheel:
+            check_dispatcher.delete_workflow(workflow_id)
+        else:
+            with self._work_flow_list_lock:
+                if workflow_id not in self._workflow_task_manager:
+                    LOGGER.warning("workflow_id %s not existed when stop.", workflow_id)
+                else:
+                    check_task_keeper = self._workflow_task_manager[workflow_id]
+                    check_task_keeper.delete_timed_task()
+                    self._workflow_task_manager.pop(workflow_id)
 
         # delete keeper
         time_keeper_manager.delete_time_keeper(workflow_id)
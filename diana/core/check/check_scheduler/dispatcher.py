@@ -0,0 +1,232 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: Timing wheel dispatcher of check tasks
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional
+
+from vulcanus.common import singleton
+from vulcanus.log.log import LOGGER
+from diana.conf import configuration
+from diana.core.check.check_scheduler.task_keeper import CheckTaskKeeper
+from diana.core.check.check_scheduler.time_keeper import time_keeper_manager, last_phase_moment
+
+
+class _Timer:
+    """
+    Periodic timer in the wheel
+    """
+
+    __slots__ = ("key", "payload", "interval", "due")
+
+    def __init__(self, key: Hashable, payload: Any, interval: int, due: int):
+        self.key = key
+        self.payload = payload
+        self.interval = interval
+        self.due = due
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel of periodic timers. A timer due at tick t is kept in slot t % size, so
+    advancing one tick only visits the timers of one slot, whatever the number of timers is.
+    It is not thread safe.
+    """
+
+    def __init__(self, size: int):
+        """
+        Constructor
+        Args:
+            size: slot number
+        """
+        self._size = max(int(size), 1)
+        self._slots = [{} for _ in range(self._size)]
+        self._timers = {}
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def add(self, key: Hashable, payload: Any, interval: int, current_tick: int, delay: Optional[int] = None) -> None:
+        """
+        Add a timer which is due every interval ticks from now on, a timer of the same key is replaced
+        Args:
+            key: timer key
+            payload: returned when the timer is due
+            interval: ticks between two dues, at least 1
+            current_tick: the last advanced tick
+            delay: ticks before the first due, interval if it's not positive
+        """
+        self.remove(key)
+        interval = max(int(interval), 1)
+        timer = _Timer(key, payload, interval, current_tick + (delay if delay and delay > 0 else interval))
+        self._timers[key] = timer
+        self._slots[timer.due % self._size][key] = timer
+
+    def remove(self, key: Hashable) -> bool:
+        """
+        Remove a timer
+
+        Returns:
+            bool: whether the timer existed
+        """
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        self._slots[timer.due % self._size].pop(key, None)
+        return True
+
+    def advance(self, tick: int) -> List[Any]:
+        """
+        Advance to the tick, which must be the next one of the last advanced tick
+        Args:
+            tick: tick to advance to
+
+        Returns:
+            list: payloads of the timers due at the tick, they are rescheduled by their interval
+        """
+        slot = self._slots[tick % self._size]
+        due_timers = [timer for timer in slot.values() if timer.due <= tick]
+        for timer in due_timers:
+            slot.pop(timer.key)
+            timer.due = tick + timer.interval
+            self._slots[timer.due % self._size][timer.key] = timer
+        return [timer.payload for timer in due_timers]
+
+
+@singleton
+class CheckDispatcher:
+    """
+    Dispatch check tasks of all workflows from one thread. Workflow timers are kept in a timing
+    wheel which advances once a second, the time ranges of the workflows due at a tick are got
+    together and their tasks are published as one batch.
+
+    Ticks are measured from a monotonic origin, so a slow tick never delays the following ones,
+    the missed ticks are advanced at once.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._wheel = TimingWheel(configuration.diana.get("WHEEL_SIZE") or 512)
+        self._lock = threading.Lock()
+        self._origin = time.monotonic()
+        self._tick = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def add_workflow(self, workflow_id: str, username: str, step: int, phase: Optional[int] = None) -> None:
+        """
+        Dispatch check tasks of the workflow every step seconds
+        Args:
+            workflow_id (str): workflow id
+            username (str): user name of workflow
+            step (int): seconds between two tasks
+            phase (int): offset of the tasks within the step, the first task is at the next moment of
+                the phase. The first task is after a step if it's None.
+        """
+        step = step if step else 60
+        delay = None
+        if phase is not None:
+            now = int(time.time())
+            delay = last_phase_moment(now, step, phase) + step - now
+        with self._lock:
+            self._wheel.add(workflow_id, (workflow_id, username), step, self._tick, delay)
+        self.start()
+
+    def add_workflows(self, workflows: List[tuple]) -> None:
+        """
+        Add many workflows at once
+        Args:
+            workflows (list): (workflow_id, username, step, phase) of every workflow, see add_workflow
+        """
+        now = int(time.time())
+        with self._lock:
+            for workflow_id, username, step, phase in workflows:
+                step = step if step else 60
+                delay = None if phase is None else last_phase_moment(now, step, phase) + step - now
+                self._wheel.add(workflow_id, (workflow_id, username), step, self._tick, delay)
+        self.start()
+
+    def delete_workflow(self, workflow_id: str) -> None:
+        with self._lock:
+            if not self._wheel.remove(workflow_id):
+                LOGGER.warning("workflow_id %s not existed in dispatcher when stop.", workflow_id)
+
+    def start(self) -> None:
+        """
+        Start the dispatch thread if it's not running
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="check-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            current_tick = int(time.monotonic() - self._origin)
+            due = []
+            with self._lock:
+                while self._tick < current_tick:
+                    self._tick += 1
+                    due.extend(self._wheel.advance(self._tick))
+                next_moment = self._origin + self._tick + 1
+            if due:
+                try:
+                    self._dispatch(due)
+                except Exception as error:
+                    LOGGER.error("Dispatch check tasks failed. %s", error)
+            self._stop_event.wait(max(next_moment - time.monotonic(), 0))
+
+    @staticmethod
+    def _dispatch(workflows: List[tuple]) -> int:
+        """
+        Publish check tasks of the workflows
+        Args:
+            workflows (list): (workflow_id, username) due at this tick
+
+        Returns:
+            int: number of tasks published
+        """
+        time_ranges = time_keeper_manager.get_time_ranges([workflow_id for workflow_id, _ in workflows])
+        task_msgs = [
+            {"workflow_id": workflow_id, "username": username, "time_range": time_ranges[workflow_id]}
+            for workflow_id, username in workflows
+            if time_ranges.get(workflow_id)
+        ]
+        if len(task_msgs) != len(workflows):
+            LOGGER.error("Failed to get time range of %d workflows", len(workflows) - len(task_msgs))
+        return CheckTaskKeeper.publish_check_tasks(task_msgs)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: e.g. {"workflows": 1000, "tick": 3600}
+        """
+        with self._lock:
+            return {"workflows": len(self._wheel), "tick": self._tick}
+
+
+check_dispatcher = CheckDispatcher()
@@ -16,13 +16,14 @@ Date: 2022/8/26
 docs: task_keeper.py
 description: Check scheduler task manager
 """
-from typing import Optional
+import datetime
+import time
+from typing import List, Optional
 from flask import Flask, current_app
-from vulcanus.kafka.producer import BaseProducer
-from vulcanus.kafka.kafka_exception import ProducerInitError
 from vulcanus.log.log import LOGGER
 from diana.conf import configuration
-from diana.core.check.check_scheduler.time_keeper import time_keeper_manager
+from diana.core.check.check_scheduler.time_keeper import time_keeper_manager, last_phase_moment
+from diana.utils.kafka_producer import producer_manager
 
 
 class CheckTaskKeeper:
@@ -30,13 +31,19 @@ class CheckTaskKeeper:
     Check task keeper
     """
 
-    def __init__(self, workflow_id: str, username: str, step: int):
+    def __init__(self, workflow_id: str, username: str, step: int, phase: Optional[int] = None):
         """
         Constructor
+        Args:
+            workflow_id (str): workflow id
+            username (str): user name of workflow
+            step (int): seconds between two tasks
+            phase (int): offset of the tasks within the step, the first task is after a step if it's None
         """
         self._step = step if step else 60
         self._workflow_id = workflow_id
         self._username = username
+        self._phase = phase
 
     @staticmethod
     def create_task(workflow_id: str, username: str) -> bool:
@@ -69,14 +76,25 @@ class CheckTaskKeeper:
         Returns:
             result (bool): publish result
         """
-        try:
-            producer = BaseProducer(configuration)
+        LOGGER.debug("Send check task msg %s", task_msg)
+        return producer_manager.send(configuration.producer.get('TASK_NAME'), task_msg)
+
+    @staticmethod
+    def publish_check_tasks(task_msgs: List[dict]) -> int:
+        """
+        Publish several check tasks to kafka, they are batched by the pooled producer
+        Args:
+            task_msgs (list): task msgs
+
+        Returns:
+            int: number of tasks published
+        """
+        topic = configuration.producer.get('TASK_NAME')
+        published = 0
+        for task_msg in task_msgs:
             LOGGER.debug("Send check task msg %s", task_msg)
-            producer.send_msg(configuration.producer.get('TASK_NAME'), task_msg)
-            return True
-        except ProducerInitError as exp:
-            LOGGER.error("Produce task msg failed. ", exp)
-            return False
+            published += producer_manager.send(topic, task_msg)
+        return published
 
     def add_timed_task(self, app: Optional[Flask] = None) -> None:
         """
@@ -97,6 +115,10 @@ class CheckTaskKeeper:
             'args': [self._workflow_id, self._username],
             'max_instances': 10,
         }
+        if self._phase is not None:
+            # the interval trigger fires at start_date + n * step, the first time is the next moment of the phase
+            start_moment = last_phase_moment(int(time.time()), self._step, self._phase) + self._step
+            job_def['start_date'] = datetime.datetime.fromtimestamp(start_moment)
         # If an app is specified, use this app.
         # Otherwise, use current_app
         if app:
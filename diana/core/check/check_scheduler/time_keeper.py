@@ -16,11 +16,36 @@ Author: YangYunYi
 Description: Time keeper of check scheduler
 """
 
+import atexit
 import time
-from typing import List
-from threading import Lock
+import zlib
+from typing import Dict, List, Optional
+from threading import Event, Lock, Thread
 from vulcanus.common import singleton
 from vulcanus.log.log import LOGGER
+from diana.conf import configuration
+from diana.core.check.check_scheduler.time_keeper_store import TimeKeeperStore
+
+
+def phase_offset(workflow_id: str, step: int) -> int:
+    """
+    Deterministic offset of the ticks of a workflow within its step, so that workflows with the
+    same step don't tick at the same second
+    Args:
+        workflow_id (str): workflow id
+        step (int): step of timer
+
+    Returns:
+        int: offset in [0, step)
+    """
+    return zlib.crc32(workflow_id.encode("utf-8")) % (step if step else 60)
+
+
+def last_phase_moment(moment: int, step: int, phase: int) -> int:
+    """
+    Get the latest moment not after the given one whose offset within the step is phase
+    """
+    return moment - (moment - phase) % step
 
 
 class CheckTimeKeeper:
@@ -28,12 +53,32 @@ class CheckTimeKeeper:
     Check Time Keeper
     """
 
-    def __init__(self, step: int):
+    def __init__(
+        self, step: int, phase: Optional[int] = None, max_range: Optional[int] = None, last_moment: Optional[int] = None
+    ):
         """
         Constructor
+        Args:
+            step (int): step of timer
+            phase (int): offset of ticks within the step, the first time range starts at the latest
+                moment of the phase. The first time range starts now if it's None.
+            max_range (int): max length of a time range. When the keeper lags behind, the lagging
+                time is caught up by one range of at most max_range seconds instead of one step
+                per tick. It's step if it's None or smaller than step.
+            last_moment (int): end of the last time range, e.g. stored before the scheduler restarted.
+                The first time range starts from it instead of now if it's given.
         """
         self._step = step if step else 60
-        self._last_moment = int(time.time())
+        self._max_range = max(max_range or 0, self._step)
+        now = int(time.time())
+        if last_moment is not None:
+            self._last_moment = last_moment
+        else:
+            self._last_moment = now if phase is None else last_phase_moment(now, self._step, phase)
+
+    @property
+    def last_moment(self) -> int:
+        return self._last_moment
 
     def get_time_range(self) -> List[int]:
         """
@@ -43,8 +88,8 @@ class CheckTimeKeeper:
         """
         now = int(time.time())
         last = self._last_moment
-        if now - last > self._step:
-            now = last + self._step
+        if now - last > self._max_range:
+            now = last + self._max_range
         # update last time stamp
         self._last_moment = now
         return [last, now]
@@ -62,13 +107,27 @@ class TimeKeeperManager:
         """
         self._cache = {}
         self._time_keeper_lock = Lock()
+        self._max_range = None
+        if configuration.diana.get("CATCH_UP") == "on":
+            self._max_range = int(configuration.diana.get("MAX_CATCH_UP_RANGE") or 0)
+        self._store = None
+        # positions waiting to be saved, they are flushed every flush interval in a daemon thread
+        self._pending_moments = {}
+        self._flush_lock = Lock()
+        self._flush_interval = float(configuration.diana.get("TIME_KEEPER_FLUSH_INTERVAL") or 0)
+        self._flush_event = Event()
+        self._flush_thread = None
+        if configuration.diana.get("PERSIST_TIME_KEEPER") == "on":
+            self._store = TimeKeeperStore()
+            atexit.register(self.flush)
 
-    def add_time_keeper(self, workflow_id: str, step: int) -> None:
+    def add_time_keeper(self, workflow_id: str, step: int, phase: Optional[int] = None) -> None:
         """
         Add a new time keeper
         Args:
             workflow_id (str): workflow id of the time keeper
             step (int): step of timer
+            phase (int): offset of ticks within the step, see CheckTimeKeeper
 
         Returns:
             None
@@ -77,7 +136,42 @@ class TimeKeeperManager:
             if workflow_id in self._cache:
                 LOGGER.warning("The time keeper of workflow %s is " "existed. Update a new one.", workflow_id)
                 self._cache.pop(workflow_id)
-            self._cache[workflow_id] = CheckTimeKeeper(step)
+            self._cache[workflow_id] = CheckTimeKeeper(step, phase, self._max_range)
+        if self._store:
+            # a new time keeper starts from now, drop the position left by a former one
+            self._delete_moment(workflow_id)
+
+    def restore_time_keepers(self, workflows: Dict[str, tuple]) -> int:
+        """
+        Add time keepers of many workflows at once, they resume from the stored positions. When
+        catch_up is off, a time keeper whose stored position lags more than one step behind starts
+        from now instead, otherwise it would never catch up with one step per tick.
+        Args:
+            workflows (dict): workflow id and its (step, phase), phase can be None
+
+        Returns:
+            int: number of time keepers resumed from stored positions
+        """
+        moments = self._store.load() if self._store else {}
+        now = int(time.time())
+        resumed = 0
+        dropped = 0
+        with self._time_keeper_lock:
+            for workflow_id, (step, phase) in workflows.items():
+                moment = moments.get(workflow_id)
+                if moment is not None and self._max_range is None and now - moment > (step or 60):
+                    moment = None
+                    dropped += 1
+                elif moment is not None:
+                    resumed += 1
+                self._cache[workflow_id] = CheckTimeKeeper(step, phase, self._max_range, moment)
+        if dropped:
+            LOGGER.warning(
+                "Stored positions of %d time keepers lag more than one step and catch_up is off, "
+                "they start from now.",
+                dropped,
+            )
+        return resumed
 
     def delete_time_keeper(self, workflow_id) -> None:
         """
@@ -93,6 +187,8 @@ class TimeKeeperManager:
                 LOGGER.warning("The time keeper of workflow %s is " "not existed. Delete nothing.", workflow_id)
                 return
             self._cache.pop(workflow_id)
+        if self._store:
+            self._delete_moment(workflow_id)
 
     def get_time_range(self, workflow_id) -> List[int]:
         """
@@ -103,11 +199,64 @@ class TimeKeeperManager:
         Returns:
             time_range(list)
         """
+        return self.get_time_ranges([workflow_id]).get(workflow_id, [])
+
+    def get_time_ranges(self, workflow_ids: List[str]) -> Dict[str, List[int]]:
+        """
+        Get time ranges of several workflow timers at once
+        Args:
+            workflow_ids (list): workflow ids of the time keepers
+
+        Returns:
+            dict: workflow id and its time range, workflows without time keeper are not included
+        """
+        time_ranges = {}
         with self._time_keeper_lock:
-            if workflow_id in self._cache:
-                return self._cache[workflow_id].get_time_range()
-            LOGGER.warning("Cannot find the  time keeper of workflow %s " "when get time range.", workflow_id)
-            return []
+            for workflow_id in workflow_ids:
+                time_keeper = self._cache.get(workflow_id)
+                if time_keeper is None:
+                    LOGGER.warning("Cannot find the  time keeper of workflow %s " "when get time range.", workflow_id)
+                    continue
+                time_ranges[workflow_id] = time_keeper.get_time_range()
+        if self._store:
+            self._save_moments({workflow_id: time_range[1] for workflow_id, time_range in time_ranges.items()})
+        return time_ranges
+
+    def _save_moments(self, moments: Dict[str, int]) -> None:
+        """
+        Keep the positions to be saved by the flush thread, they are saved at once if the flush
+        interval is not positive
+        """
+        if self._flush_interval <= 0:
+            with self._flush_lock:
+                self._store.save(moments)
+            return
+        with self._time_keeper_lock:
+            self._pending_moments.update(moments)
+            if self._flush_thread is None:
+                self._flush_thread = Thread(target=self._run_flush, name="time-keeper-flush", daemon=True)
+                self._flush_thread.start()
+
+    def _delete_moment(self, workflow_id: str) -> None:
+        with self._flush_lock:
+            with self._time_keeper_lock:
+                self._pending_moments.pop(workflow_id, None)
+            self._store.delete([workflow_id])
+
+    def _run_flush(self):
+        while not self._flush_event.wait(self._flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Save the pending positions of time keepers by one request
+        """
+        if not self._store:
+            return
+        with self._flush_lock:
+            with self._time_keeper_lock:
+                moments, self._pending_moments = self._pending_moments, {}
+            self._store.save(moments)
 
 
 time_keeper_manager = TimeKeeperManager()
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: Durable positions of time keepers
+"""
+from typing import Dict, List
+
+from vulcanus.log.log import LOGGER
+from diana.conf import configuration
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+TIME_KEEPER_KEY = "diana:time_keeper"
+_REDIS_ERRORS = (redis.RedisError,) if redis is not None else ()
+
+
+class TimeKeeperStore:
+    """
+    Keep the last moment of every time keeper in one redis hash, so that a restarted scheduler
+    resumes from the stored moments instead of now. Redis errors are logged and never raised,
+    time keepers keep working in memory.
+    """
+
+    def __init__(self, client=None):
+        """
+        Constructor
+        Args:
+            client: redis client, it's created from the redis configuration if it's None
+        """
+        self._client = client
+        if self._client is None and redis is not None:
+            self._client = redis.Redis(
+                host=configuration.redis.get("IP"),
+                port=configuration.redis.get("PORT"),
+                socket_timeout=5,
+                decode_responses=True,
+            )
+        if self._client is None:
+            LOGGER.warning("redis is not installed, positions of time keepers will not be persisted.")
+
+    @property
+    def enabled(self) -> bool:
+        return self._client is not None
+
+    def load(self) -> Dict[str, int]:
+        """
+        Load the positions of all time keepers by one request
+
+        Returns:
+            dict: workflow id and its last moment, empty if it failed
+        """
+        if not self.enabled:
+            return {}
+        try:
+            return {workflow_id: int(moment) for workflow_id, moment in self._client.hgetall(TIME_KEEPER_KEY).items()}
+        except _REDIS_ERRORS + (ValueError,) as error:
+            LOGGER.error("Load positions of time keepers failed. %s", error)
+            return {}
+
+    def save(self, moments: Dict[str, int]) -> None:
+        """
+        Save the positions of time keepers by one request
+        Args:
+            moments (dict): workflow id and its last moment
+        """
+        if not self.enabled or not moments:
+            return
+        try:
+            self._client.hset(TIME_KEEPER_KEY, mapping=moments)
+        except _REDIS_ERRORS as error:
+            LOGGER.error("Save positions of time keepers failed. %s", error)
+
+    def delete(self, workflow_ids: List[str]) -> None:
+        if not self.enabled or not workflow_ids:
+            return
+        try:
+            self._client.hdel(TIME_KEEPER_KEY, *workflow_ids)
+        except _REDIS_ERRORS as error:
+            LOGGER.error("Delete positions of time keepers failed. %s", error)
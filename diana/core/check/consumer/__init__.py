@@ -15,35 +15,85 @@ Time:
 Author:
 Description:
 """
+import multiprocessing
 import threading
+import time
+from typing import Callable, Dict, List, Optional
+
 from kafka.errors import KafkaError
 
 from vulcanus.kafka.consumer import BaseConsumer
 from vulcanus.kafka.kafka_exception import ConsumerInitError
 from vulcanus.log.log import LOGGER
 
+from diana import conf
+from diana.utils.kafka_producer import producer_manager
 from diana.utils.register import Register
 
 
 class Consumer(threading.Thread):
     """
-    Consumer of kafka
+    Consumer of kafka. It polls batches of records, and the offsets are committed after a batch is
+    processed, once per batch or once per commit interval, so every record is delivered at least
+    once. A record which fails to be processed is sent to the dead letter topic if it's configured,
+    otherwise its partition is sought back to it, so that it's polled again instead of committed.
     """
 
-    __slots__ = ['__consumer', '__topic', '__group_id', '__running_flag']
+    __slots__ = [
+        '__consumer',
+        '__topic',
+        '__group_id',
+        '__running_flag',
+        '_commit_interval',
+        '_last_commit_time',
+        '_uncommitted',
+        '_partition_lag',
+        '_retry_offsets',
+        '_retry_backoff',
+        'last_poll_time',
+        'processed',
+        'failed',
+        'batches',
+        'records',
+        'last_batch_size',
+        'commits',
+    ]
 
     def __init__(self, topic: str, group_id: str, configuration):
         """
         Init consumer
         """
-        threading.Thread.__init__(self)
+        threading.Thread.__init__(self, daemon=True)
+        self.__consumer = None
         try:
-            self.__consumer = BaseConsumer(topic, group_id, configuration)
+            self.__consumer = self._create_consumer(topic, group_id, configuration)
         except ConsumerInitError as exp:
             LOGGER.error("Get consumer failed, %s", exp)
         self.__topic = topic
         self.__group_id = group_id
         self.__running_flag = True
+        self._commit_interval = float(conf.configuration.consumer.get('COMMIT_INTERVAL') or 0)
+        self._last_commit_time = time.monotonic()
+        self._uncommitted = False
+        self._partition_lag = {}
+        # partition and the offset of its first record which must be polled again
+        self._retry_offsets = {}
+        self._retry_backoff = float(conf.configuration.consumer.get('TIMEOUT_MS') or 0) / 1000
+        # health and metrics of the consumer
+        self.last_poll_time = None
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self.records = 0
+        self.last_batch_size = 0
+        self.commits = 0
+
+    @staticmethod
+    def _create_consumer(topic: str, group_id: str, configuration):
+        """
+        Create the kafka consumer which is polled, it's None if the consumer can't be created
+        """
+        return BaseConsumer(topic, group_id, configuration)
 
     @property
     def consumer(self):
@@ -77,47 +127,263 @@ class Consumer(threading.Thread):
         manually pull messages from broker, the number of messages is based on max_records.
         """
         LOGGER.info("start run topic: %s group: %s _consumer", self.topic, self.group_id)
+        if self.consumer is None:
+            return
         try:
             while self.running_flag:
+                # the poll waits timeout_ms when the broker has nothing
                 data = self.consumer.poll()
+                self.last_poll_time = time.time()
                 if not data:
+                    # commit what is processed while the consumer is idle
+                    self._commit(force=True)
                     continue
-                self._parse_data(data)
+                self._record_batch(data)
+                if not self._parse_data(data):
+                    # nothing of the batch is committed
+                    for partition, records in data.items():
+                        if records:
+                            self._retry(partition, records[0].offset)
+                if self._seek_back():
+                    # positions of the failed partitions are at the retried records now
+                    self._uncommitted = True
+                    self._commit(force=True)
+                    time.sleep(self._retry_backoff)
+                    continue
+                self._uncommitted = True
+                self._commit()
+            self._commit(force=True)
         except KafkaError as err:
             LOGGER.error(err)
 
-    def _parse_data(self, data):
+    def _commit(self, force: bool = False):
+        """
+        Commit offsets of the processed batches, at most once per commit interval unless it's forced
+        """
+        if not self._uncommitted:
+            return
+        if not force and time.monotonic() - self._last_commit_time < self._commit_interval:
+            return
+        self.consumer.commit()
+        self._uncommitted = False
+        self._last_commit_time = time.monotonic()
+        self.commits += 1
+
+    def _retry(self, partition, offset: int):
+        """
+        Poll the records of the partition from the offset again after the batch
+        """
+        if partition not in self._retry_offsets or offset < self._retry_offsets[partition]:
+            self._retry_offsets[partition] = offset
+
+    def _seek_back(self) -> bool:
+        """
+        Seek the partitions back to the records which must be polled again
+
+        Returns:
+            bool: whether any partition is sought back
+        """
+        if not self._retry_offsets:
+            return False
+        retry_offsets, self._retry_offsets = self._retry_offsets, {}
+        kafka_consumer = getattr(self.consumer, "_consumer", None)
+        if kafka_consumer is None:
+            # positions can't be changed, stop without committing so that the records are polled again
+            LOGGER.error("Consumer of topic %s can't seek back, stop it.", self.topic)
+            self._uncommitted = False
+            self.stop_consumer()
+            return False
+        for partition, offset in retry_offsets.items():
+            kafka_consumer.seek(partition, offset)
+        return True
+
+    def _record_batch(self, data: dict):
+        size = 0
+        kafka_consumer = getattr(self.consumer, "_consumer", None)
+        for partition, records in data.items():
+            size += len(records)
+            if kafka_consumer is None or not records:
+                continue
+            highwater = kafka_consumer.highwater(partition)
+            if highwater is not None:
+                self._partition_lag[partition] = max(highwater - records[-1].offset - 1, 0)
+        self.batches += 1
+        self.records += size
+        self.last_batch_size = size
+
+    def _parse_data(self, data) -> bool:
         """
         Parse data of consumer
         Args:
             data (dict):
+
+        Returns:
+            bool: whether the batch can be committed
         """
         for key, value in data.items():
             for consumer_record in value:
                 if not all([consumer_record, consumer_record.value]):
                     LOGGER.error("%s consumer_record is None.", key)
                     continue
-                # Message Processing
-                self._process_msgs(consumer_record.value)
-                self.consumer.commit()
+                # Message Processing, a failed message doesn't stop the consumer
+                try:
+                    self._process_msgs(consumer_record.value)
+                    self.processed += 1
+                except Exception as error:
+                    self._fail(key, consumer_record, error)
+        return True
 
     def _process_msgs(self, msg):
         """
         Process msg (Inherit the implementation)
         """
 
+    def _fail(self, partition, consumer_record, error: Exception):
+        """
+        Handle a record which fails to be processed. It can be committed once it's delivered to the
+        topic dead_letter_name of consumer, otherwise it's polled again after the batch.
+        """
+        self.failed += 1
+        msg = consumer_record.value
+        LOGGER.error("Process msg of topic %s failed: %s. %s", self.topic, msg, error)
+        dead_letter_topic = conf.configuration.consumer.get('DEAD_LETTER_NAME')
+        if dead_letter_topic and producer_manager.send(
+            dead_letter_topic, {"topic": self.topic, "msg": msg, "error": str(error)}, wait=True
+        ):
+            return
+        self._retry(partition, consumer_record.offset)
+
+    def health(self) -> Dict:
+        """
+        Returns:
+            dict: e.g. {"name": "Thread-1", "alive": True, "last_poll_time": 1660471200.1,
+                        "processed": 10, "failed": 0, "batches": 2, "last_batch_size": 3,
+                        "avg_batch_size": 5.0, "commits": 2, "lag": 0}
+            lag is the sum of the records left in the partitions of the last batches, it's None
+            before the highwater of any partition is known
+        """
+        return {
+            "name": self.name,
+            "alive": self.is_alive(),
+            "last_poll_time": self.last_poll_time,
+            "processed": self.processed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "avg_batch_size": self.records / self.batches if self.batches else 0,
+            "commits": self.commits,
+            "lag": sum(self._partition_lag.values()) if self._partition_lag else None,
+        }
+
 
 class ConsumerManager:
-    def __init__(self, consumer_list: list):
+    """
+    Run consumers as threads and replace the dead ones until it's stopped
+    """
+
+    def __init__(self, consumer_list: list, consumer_factory: Optional[Callable[[], Consumer]] = None,
+                 health_check_interval: int = 5):
+        """
+        Constructor
+        Args:
+            consumer_list: consumers to run
+            consumer_factory: create a consumer to replace a dead one, dead consumers are not replaced if it's None
+            health_check_interval: seconds between two health checks
+        """
         self.consumer_list = consumer_list
+        self.consumer_factory = consumer_factory
+        self.health_check_interval = health_check_interval
+        self._stop_event = threading.Event()
 
     def __del__(self):
         self.stop()
 
     def run(self):
+        """
+        Start all consumers and supervise them, it returns when the manager is stopped
+        """
         for consumer in self.consumer_list:
-            consumer.run()
+            consumer.start()
+        while not self._stop_event.wait(self.health_check_interval):
+            self.check_health()
+        for consumer in self.consumer_list:
+            consumer.join()
+
+    def check_health(self):
+        for index, consumer in enumerate(self.consumer_list):
+            if consumer.is_alive() or self._stop_event.is_set():
+                continue
+            LOGGER.error("Consumer %s of topic %s is dead.", consumer.name, consumer.topic)
+            if self.consumer_factory is not None:
+                self.consumer_list[index] = self.consumer_factory()
+                self.consumer_list[index].start()
+
+    def health(self) -> List[Dict]:
+        return [consumer.health() for consumer in self.consumer_list]
 
     def stop(self):
+        self._stop_event.set()
         for consumer in self.consumer_list:
             consumer.stop_consumer()
+
+
+class ProcessManager:
+    """
+    Run workers as processes and restart the dead ones until it's stopped
+    """
+
+    def __init__(self, target: Callable, worker_num: int, health_check_interval: int = 5):
+        """
+        Constructor
+        Args:
+            target: top level function run by every worker process, it should return when the process
+                gets SIGTERM
+            worker_num: number of worker processes
+            health_check_interval: seconds between two health checks
+        """
+        self.target = target
+        self.worker_num = worker_num
+        self.health_check_interval = health_check_interval
+        self.processes = []
+        self._stop_event = threading.Event()
+
+    def _start_process(self) -> multiprocessing.Process:
+        # daemonic processes can't have children, but a worker may start the compute pool
+        process = multiprocessing.Process(target=self.target, daemon=False)
+        process.start()
+        return process
+
+    def run(self):
+        """
+        Start all worker processes and supervise them, it returns when the manager is stopped
+        """
+        self.processes = [self._start_process() for _ in range(self.worker_num)]
+        while not self._stop_event.wait(self.health_check_interval):
+            self.check_health()
+        for process in self.processes:
+            process.join()
+
+    def check_health(self):
+        for index, process in enumerate(self.processes):
+            if process.is_alive() or self._stop_event.is_set():
+                continue
+            LOGGER.error("Worker process %s exited with %s, restart it.", process.pid, process.exitcode)
+            self.processes[index] = self._start_process()
+
+    def health(self) -> List[Dict]:
+        return [
+            {"name": process.name, "pid": process.pid, "alive": process.is_alive(), "exitcode": process.exitcode}
+            for process in self.processes
+        ]
+
+    def stop(self):
+        """
+        Stop the worker processes and wait for them, they are not daemonic so they are never left
+        behind the executor
+        """
+        self._stop_event.set()
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join()
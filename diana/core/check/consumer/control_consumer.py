@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: consumer of the control topic which invalidates cached workflows
+"""
+import json
+import time
+from typing import Optional
+
+from kafka import KafkaConsumer, TopicPartition
+from kafka.errors import KafkaError
+
+from vulcanus.log.log import LOGGER
+
+from diana.conf import configuration
+from diana.core.check.consumer import Consumer
+from diana.core.rule.workflow_cache import workflow_cache
+
+
+class LatestConsumer:
+    """
+    Kafka consumer without group, it's assigned all partitions of a topic and reads them from the
+    latest offsets. Nothing is committed since there is no group.
+    """
+
+    def __init__(self, topic: str, configuration):
+        self._topic = topic
+        self._timeout_ms = int(configuration.consumer.get('TIMEOUT_MS') or 1000)
+        self._max_records = int(configuration.consumer.get('MAX_RECORDS') or 100)
+        self._consumer = KafkaConsumer(
+            bootstrap_servers=configuration.consumer.get('KAFKA_SERVER_LIST'),
+            group_id=None,
+            enable_auto_commit=False,
+            auto_offset_reset="latest",
+            value_deserializer=lambda value: json.loads(value.decode("utf-8")),
+        )
+        self._assign()
+
+    def _assign(self) -> bool:
+        """
+        Assign all partitions of the topic, it fails when the topic doesn't exist yet
+        """
+        partitions = self._consumer.partitions_for_topic(self._topic)
+        if not partitions:
+            return False
+        topic_partitions = [TopicPartition(self._topic, partition) for partition in partitions]
+        self._consumer.assign(topic_partitions)
+        self._consumer.seek_to_end(*topic_partitions)
+        return True
+
+    def poll(self) -> dict:
+        if not self._consumer.assignment() and not self._assign():
+            # wait for the topic like an empty poll
+            time.sleep(self._timeout_ms / 1000)
+            return {}
+        return self._consumer.poll(timeout_ms=self._timeout_ms, max_records=self._max_records)
+
+    def commit(self):
+        """
+        Offsets are not committed, a restarted consumer starts from the latest offsets
+        """
+
+
+class ControlConsumer(Consumer):
+    """
+    Consumer of the control topic which invalidates the cached workflows, a message without
+    workflow_id drops all of them.
+
+    Every executor process must see all messages, so it doesn't join a consumer group but reads all
+    partitions itself. A group per process would be left on the broker after every restart, and
+    replay the topic from auto_offset_reset when it's created. Messages sent before the consumer
+    starts are not needed: the cache of a new process is empty.
+    """
+
+    @staticmethod
+    def _create_consumer(topic: str, group_id: str, configuration) -> Optional[LatestConsumer]:
+        try:
+            return LatestConsumer(topic, configuration)
+        except KafkaError as error:
+            LOGGER.error("Get control consumer failed, %s", error)
+            return None
+
+    def _process_msgs(self, msg):
+        LOGGER.debug("control msg: %s", msg)
+        workflow_cache.invalidate(msg.get('workflow_id'))
+
+
+def create_control_consumer() -> ControlConsumer:
+    return ControlConsumer(configuration.consumer.get('CONTROL_NAME'), None, configuration)
@@ -0,0 +1,231 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: asyncio pipeline which overlaps the stages of many workflow executions
+"""
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from vulcanus.log.log import LOGGER
+
+from diana.core.check.consumer import Consumer
+from diana.core.rule.workflow import Workflow
+
+LOAD = "load"
+FETCH = "fetch"
+DETECT = "detect"
+STORE = "store"
+STAGES = (LOAD, FETCH, DETECT, STORE)
+
+
+class _Job:
+    """
+    A workflow execution moving through the stages
+    """
+
+    __slots__ = ("workflow", "time_range", "kafka", "storage", "future", "detail", "fetched", "result")
+
+    def __init__(self, workflow: Workflow, time_range: list, kafka: bool, storage: bool):
+        self.workflow = workflow
+        self.time_range = time_range
+        self.kafka = kafka
+        self.storage = storage
+        self.future = Future()
+        self.detail = None
+        self.fetched = None
+        self.result = None
+
+
+class WorkflowPipeline:
+    """
+    Run Workflow.execute as four stages connected by bounded queues: load the workflow from the
+    database, fetch the monitor data, detect and store the result. Every stage has its own
+    workers, so the I/O of many workflows overlaps while a full queue holds back the stage before
+    it. Database and prometheus clients are blocking, so the stages call them in their own threads.
+    """
+
+    def __init__(self, concurrency: Dict[str, int], queue_size: int):
+        """
+        Constructor
+        Args:
+            concurrency: max running jobs of each stage, e.g. {"load": 4, "fetch": 8, "detect": 2, "store": 4}
+            queue_size: max waiting jobs before each stage
+        """
+        self._concurrency = {stage: max(int(concurrency.get(stage) or 1), 1) for stage in STAGES}
+        self._queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._jobs = set()
+        self._jobs_lock = threading.Lock()
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        """
+        Start the event loop of the pipeline in a thread
+        """
+        self._thread = threading.Thread(target=self._run_loop, name="workflow-pipeline", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queues = {stage: asyncio.Queue(maxsize=self._queue_size) for stage in STAGES}
+        workers = []
+        for stage, concurrency in self._concurrency.items():
+            self._executors[stage] = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pipeline-" + stage)
+            workers.extend(self._loop.create_task(self._stage_worker(stage)) for _ in range(concurrency))
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self._loop.run_until_complete(asyncio.gather(*workers, return_exceptions=True))
+            for executor in self._executors.values():
+                executor.shutdown(wait=True)
+            self._loop.close()
+
+    async def _stage_worker(self, stage: str):
+        queue = self._queues[stage]
+        handler = getattr(self, "_" + stage)
+        next_queue = self._queues[STAGES[STAGES.index(stage) + 1]] if stage != STORE else None
+        while True:
+            job = await queue.get()
+            try:
+                finished = await self._loop.run_in_executor(self._executors[stage], handler, job)
+            except Exception as error:
+                LOGGER.error("Workflow pipeline stage %s failed. %s", stage, error)
+                job.future.set_exception(error)
+                finished = True
+            finally:
+                queue.task_done()
+
+            if finished:
+                with self._jobs_lock:
+                    self._jobs.discard(job)
+            else:
+                await next_queue.put(job)
+
+    @staticmethod
+    def _finish(job: _Job, result) -> bool:
+        job.future.set_result(result)
+        return True
+
+    def _load(self, job: _Job) -> bool:
+        detail = job.workflow.load()
+        if isinstance(detail, str):
+            return self._finish(job, detail)
+        job.detail = detail
+        return False
+
+    def _fetch(self, job: _Job) -> bool:
+        fetched = job.workflow.fetch_data(
+            job.time_range, job.detail["hosts"], job.detail["workflow"], job.detail.get("model_paths")
+        )
+        if isinstance(fetched, str):
+            return self._finish(job, fetched)
+        job.fetched = fetched
+        return False
+
+    def _detect(self, job: _Job) -> bool:
+        app, data = job.fetched
+        # release the data as soon as it's checked
+        job.fetched = None
+        # models keep the state of a calculation, the instances loaded by the fetch thread may be
+        # used by other jobs at the same time, so the models of this thread are used
+        app.load_models_by_path(dict(app.model_paths))
+        result = job.workflow.detect(app, data, job.time_range, job.detail["workflow"])
+        if isinstance(result, str):
+            return self._finish(job, result)
+        job.result = result
+        return False
+
+    def _store(self, job: _Job) -> bool:
+        return self._finish(
+            job, job.workflow.save_result(job.result, job.detail, job.time_range, job.kafka, job.storage)
+        )
+
+    def submit(self, username: str, workflow_id: str, time_range: list, kafka=False, storage=True) -> Future:
+        """
+        Put a workflow execution into the pipeline, it blocks while the first stage is full
+        Args:
+            username: owner of the workflow
+            workflow_id: id of the workflow
+            time_range: ["1660471200"]
+            kafka: True
+            storage: True
+
+        Returns:
+            Future: its result is the same as Workflow.execute
+        """
+        job = _Job(Workflow(username, workflow_id), time_range, kafka, storage)
+        with self._jobs_lock:
+            self._jobs.add(job)
+        asyncio.run_coroutine_threadsafe(self._queues[LOAD].put(job), self._loop).result()
+        return job.future
+
+    def stop(self):
+        """
+        Stop the pipeline, the futures of unfinished jobs are cancelled
+        """
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        with self._jobs_lock:
+            jobs, self._jobs = self._jobs, set()
+        for job in jobs:
+            job.future.cancel()
+
+
+class PipelineWorkflowConsumer(Consumer):
+    """
+    Consumer which executes the workflows of a polled batch concurrently by the pipeline, the batch
+    can be committed after all of them are finished
+    """
+
+    def __init__(self, topic: str, group_id: str, configuration, pipeline: WorkflowPipeline):
+        super().__init__(topic, group_id, configuration)
+        self.pipeline = pipeline
+
+    def _parse_data(self, data) -> bool:
+        futures = []
+        for key, value in data.items():
+            for consumer_record in value:
+                if not all([consumer_record, consumer_record.value]):
+                    LOGGER.error("%s consumer_record is None.", key)
+                    continue
+                msg = consumer_record.value
+                LOGGER.debug("msg: %s", msg)
+                future = self.pipeline.submit(msg.get('username'), msg.get('workflow_id'), msg.get('time_range'))
+                futures.append((key, consumer_record, future))
+
+        for key, consumer_record, future in futures:
+            try:
+                future.result()
+                self.processed += 1
+            except CancelledError:
+                # the pipeline is stopped, the consumer stops as well and the batch is sought back,
+                # so that it's consumed again by the next consumer of the partitions
+                self.stop_consumer()
+                return False
+            except Exception as error:
+                self._fail(key, consumer_record, error)
+        return True
@@ -15,9 +15,19 @@ Time:
 Author:
 Description:
 """
+from typing import Dict, Optional
 
 
 class Algorithm:
+    @property
+    def required_data(self) -> Optional[Dict[str, int]]:
+        """
+        Series selectors the model reads and the seconds of history it needs before the checked
+        time range, e.g. {"metric1": 0, 'metric2{label1="value1"}': 3600}.
+        None means unknown, then all data of the host is queried.
+        """
+        return None
+
     def train(self):
         ...
 
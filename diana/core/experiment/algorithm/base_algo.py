@@ -10,9 +10,11 @@
 # PURPOSE.
 # See the Mulan PSL v2 for more details.
 # ******************************************************************************/
-from typing import Optional
+from typing import Optional, Union
 from abc import ABCMeta, abstractmethod
 
+from diana.utils.time_series import TimeSeries
+
 
 class BaseSingleItemAlgorithm(metaclass=ABCMeta):
     """
@@ -20,11 +22,12 @@ class BaseSingleItemAlgorithm(metaclass=ABCMeta):
     """
 
     @abstractmethod
-    def calculate(self, data: list, time_range: Optional[list] = None):
+    def calculate(self, data: Union[list, TimeSeries], time_range: Optional[list] = None):
         """
         overload the calculate function
         Args:
             data: single item data with timestamp, like [[1658544527, '100'], [1658544527, '100']...]
+                or TimeSeries
             time_range: time range of checking. only error found in this range could be record
 
         Returns:
@@ -32,12 +35,11 @@ class BaseSingleItemAlgorithm(metaclass=ABCMeta):
         """
         pass
 
-    def preprocess(self, data: list):
+    def preprocess(self, data: Union[list, TimeSeries]) -> TimeSeries:
         """
-        preprocess data
+        preprocess data, convert it into TimeSeries once so that it can be calculated by arrays
         """
-        for single_data in data:
-            single_data[1] = float(single_data[1])
+        return TimeSeries.from_points(data)
 
 
 class BaseMultiItemAlgorithmOne(metaclass=ABCMeta):
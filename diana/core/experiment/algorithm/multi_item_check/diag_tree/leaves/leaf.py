@@ -10,8 +10,7 @@
 # PURPOSE.
 # See the Mulan PSL v2 for more details.
 # ******************************************************************************/
-from typing import List, Dict, Optional
-from collections import defaultdict
+from typing import List, Dict, Optional, Union
 
 from diana.core.experiment.algorithm.multi_item_check.diag_tree.custom_exception import CheckError, CheckExpressionError
 from diana.core.experiment.algorithm.multi_item_check.diag_tree.leaves import MAIN_DATA_MACRO
@@ -20,6 +19,7 @@ from diana.core.experiment.algorithm.multi_item_check.diag_tree.leaves.element i
 from diana.core.experiment.algorithm.multi_item_check.diag_tree.leaves.parser import Parser
 from vulcanus.preprocessing.alignment import align
 from vulcanus.preprocessing.deduplicate import deduplicate
+from diana.utils.time_series import TimeSeries
 
 
 class ShiftVisitor:
@@ -205,7 +205,8 @@ class Leaf:
             # right now only support kpi data.
             merged_data = self._merge_data_list_by_method(all_data[metric_with_label], data_info.get("method"))
             start_index = self.find_start_index(merged_data, time_range[0] - self.time_shift)
-            tmp_data[data_macro] = merged_data[start_index:]
+            merged_data = merged_data[start_index:]
+            tmp_data[data_macro] = merged_data.to_list() if isinstance(merged_data, TimeSeries) else merged_data
 
         if self.data_type == "kpi":
             processed_data = align(sample_period, new_time_range, tmp_data)
@@ -214,11 +215,13 @@ class Leaf:
         return processed_data
 
     @staticmethod
-    def _merge_data_list_by_method(metric_data: Dict[str, list], method: Optional[str]) -> List[list]:
+    def _merge_data_list_by_method(
+        metric_data: Dict[str, Union[list, TimeSeries]], method: Optional[str]
+    ) -> Union[List[list], TimeSeries]:
         """
         merge multiple labels data list into one data list
         Args:
-            metric_data: a metric's all labels' data.  e.g.
+            metric_data: a metric's all labels' data, data list can also be TimeSeries.  e.g.
                 {
                     "metric1{label1='',label2='a'}": [[1660000000, 1], [1660000015, 1]],
                     "metric1{label1='',label2='b'}": [[1660000000, 1], [1660000015, 3]]
@@ -226,7 +229,7 @@ class Leaf:
             method: method to merge data.  for now only support 'avg', 'sum'
 
         Returns:
-            list: e.g. [[1660000000, 1], [1660000015, 2]]
+            list or TimeSeries: e.g. [[1660000000, 1], [1660000015, 2]]
         """
         merged_data = []
         if not method:
@@ -237,20 +240,10 @@ class Leaf:
         if method not in ["avg", "sum"]:
             return merged_data
 
-        new_metric_data = defaultdict(list)
-        for data_list in metric_data.values():
-            for timestamp, value in data_list:
-                new_metric_data[timestamp].append(value)
-        if method == "avg":
-            for timestamp, value in sorted(new_metric_data.items(), key=lambda x: x[0]):
-                merged_data.append([timestamp, round(sum(value) / len(value), 3)])
-        else:
-            for timestamp, value in sorted(new_metric_data.items(), key=lambda x: x[0]):
-                merged_data.append([timestamp, sum(value)])
-        return merged_data
+        return TimeSeries.merge([TimeSeries.from_points(data_list) for data_list in metric_data.values()], method)
 
     @staticmethod
-    def find_start_index(data: list, start_time_stamp: int) -> int:
+    def find_start_index(data: Union[list, TimeSeries], start_time_stamp: int) -> int:
         """
         Get the first data index which time stamp >= the start time stamp
         Args:
@@ -261,6 +254,8 @@ class Leaf:
             index (int)
 
         """
+        if isinstance(data, TimeSeries):
+            return data.start_index(start_time_stamp)
         if not data:
             return -1
 
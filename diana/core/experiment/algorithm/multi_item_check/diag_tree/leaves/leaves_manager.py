@@ -74,7 +74,7 @@ class LeavesManager:
         """
         do all leaves' check
         Args:
-            data: original data.
+            data: original data, data list can also be TimeSeries.
                 e.g. {
                         "metric1{label1=''}": {
                             "metric1{label1='',label2='a'}": [[1660000000, 1], [1660000015, 1]],
@@ -14,7 +14,7 @@
 Description: Diagnose related functions
 """
 import json
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional
 
 from vulcanus.log.log import LOGGER
 
@@ -77,6 +77,20 @@ class Diagnose(BaseMultiItemAlgorithmOne):
         """
         return self.leaves_manager.all_data_time_shift
 
+    @property
+    def required_data(self) -> Optional[Dict[str, int]]:
+        """
+        Metrics of all leaves and their time shift, original data is grouped by metric name so
+        labels of the leaves' metrics are dropped
+        """
+        if self.leaves_manager is None:
+            return None
+        required = {}
+        for metric, time_shift in self.input_data.items():
+            metric_name = metric.split("{")[0]
+            required[metric_name] = max(required.get(metric_name, 0), time_shift)
+        return required
+
     def calculate(self, data: dict, time_range: list) -> str:
         """
         calculate each node of the tree and judge the host has error or not
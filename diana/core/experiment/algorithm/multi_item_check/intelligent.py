@@ -17,7 +17,7 @@ import os
 import pickle
 import time
 from collections import defaultdict
-from typing import Dict, List, Tuple, NoReturn
+from typing import Dict, List, Tuple, NoReturn, Optional
 
 import numpy as np
 import pandas as pd
@@ -28,6 +28,7 @@ from diana.core.experiment.algorithm import Algorithm
 from diana.core.experiment.algorithm.preprocess.aggregate import transfer_str_2_series, data_aggregation
 from diana.core.experiment.algorithm.preprocess.filter import filtering, adtk_preprocess
 from diana.core.experiment.algorithm.preprocess.normalize import normalize
+from diana.utils.promql import build_selector
 
 
 @functools.lru_cache()
@@ -38,9 +39,14 @@ def load_model(model_path: str) -> object:
     return model
 
 
+# seconds before the end of the time range in which abnormal labels are reported
+FUSION_WINDOW = 600
+
+
 class Intelligent(Algorithm):
-    def __init__(self):
+    def __init__(self, sample_period: int = 15):
         self.config = None
+        self.sample_period = sample_period
 
     @property
     def info(self) -> Dict[str, str]:
@@ -71,10 +77,66 @@ class Intelligent(Algorithm):
 
         return labels
 
+    @property
+    def aggregation_rules(self) -> Dict[str, Dict[str, str]]:
+        """
+        Series of each metric in metric_list which are filtered by filter_rule and summed up, the data
+        can be aggregated by prometheus in advance.
+
+        Returns:
+            dict: metric name and its filter rule, e.g. {"metric1": {"label1": "value1"}, "metric2": {}}
+        """
+        if self.config is None:
+            return {}
+        return {
+            metric_name: metric_info.get('filter_rule') or {}
+            for metric_name, metric_info in self.config['metric_list'].items()
+        }
+
+    @staticmethod
+    def _history_points(model_info: dict) -> int:
+        """
+        Points needed before a point can be labeled, which are the windows of the enabled preprocess
+        model and check model, or the train length of nsigma
+        """
+        points = 0
+        for stage in ("preprocess_model", "check_model"):
+            model_name = model_info.get(stage, {}).get("enabled")
+            param = model_info.get(stage, {}).get("algorithm_list", {}).get(model_name, {}).get("param", {})
+            if model_name == "nsigma":
+                points += param.get("train_length", 0)
+                continue
+            window = param.get("window", 0)
+            points += sum(window) if isinstance(window, (list, tuple)) else window
+        return points
+
+    @property
+    def required_data(self) -> Optional[Dict[str, int]]:
+        """
+        Only the series in metric_list which match the filter_rule are read. Each metric needs the
+        history of its largest model window before the fusion window.
+        """
+        if self.config is None:
+            return None
+        history_points = {}
+        for rule_info in self.config['rule'].values():
+            for metric_name, model_info in rule_info['related_metrics'].items():
+                history_points[metric_name] = max(history_points.get(metric_name, 0), self._history_points(model_info))
+
+        required = {}
+        for metric_name, rule in self.aggregation_rules.items():
+            if metric_name in history_points:
+                lookback = FUSION_WINDOW + history_points[metric_name] * self.sample_period
+            else:
+                lookback = 0
+            required[build_selector(metric_name, rule)] = lookback
+        return required
+
     def load(self, path: str):
         try:
             with open(path, 'r') as file_io:
                 self.config = json.load(file_io)
+            self.sample_period = self.config.get('sample_period', self.sample_period)
         except Exception as error:
             print(error)
             return
@@ -120,7 +182,8 @@ class Intelligent(Algorithm):
             for column in concat_result.columns:
                 concat_result['total'] = concat_result['total'] & concat_result[column]
 
-        time = pd.to_datetime(time_range[1] - 600, unit='s') + pd.to_timedelta('8h')
+        # a time range longer than the fusion window is caught up after a lag, report all of it
+        time = pd.to_datetime(min(time_range[1] - FUSION_WINDOW, time_range[0]), unit='s') + pd.to_timedelta('8h')
         index = concat_result.index
         select_index = index[index > time]
         select_result = concat_result.loc[select_index]
@@ -246,7 +309,7 @@ class Intelligent(Algorithm):
     def calculate(self, data: Dict[str, Dict[str, list]], time_range: List[int]) -> bool:
         """
         Args:
-            data, original data from prometheus. e.g.
+            data, original data from prometheus, data list can also be TimeSeries. e.g.
             {
                 "metric1": {
                     "label1": [[time1, value1], [time2, value2]],
@@ -19,11 +19,13 @@ from typing import List, Dict, Literal
 
 import pandas as pd
 
+from diana.utils.time_series import TimeSeries
+
 
 def transfer_str_2_series(data: Dict[str, List]) -> Dict[str, pd.Series]:
     """
     Args:
-        data: original data from prometheus. e.g.
+        data: original data from prometheus, data list can also be TimeSeries. e.g.
                 {
                     "label1": [[time1, value1], [time2, value2]],
                     "label2": [],
@@ -38,6 +40,10 @@ def transfer_str_2_series(data: Dict[str, List]) -> Dict[str, pd.Series]:
     """
     result = {}
     for label, value in data.items():
+        if isinstance(value, TimeSeries):
+            if len(value):
+                result[label] = value.to_pandas()
+            continue
         temp = {}
         index = []
         for point in value:
@@ -10,11 +10,12 @@
 # PURPOSE.
 # See the Mulan PSL v2 for more details.
 # ******************************************************************************/
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 
 import pandas as pd
 
 from diana.core.experiment.algorithm.base_algo import BaseSingleItemAlgorithm
+from diana.utils.time_series import TimeSeries
 
 
 class EWMA(BaseSingleItemAlgorithm):
@@ -33,23 +34,23 @@ class EWMA(BaseSingleItemAlgorithm):
         }
         return data
 
-    def calculate(self, data: list, time_range: Optional[list] = None) -> list:
+    def calculate(self, data: Union[list, TimeSeries], time_range: Optional[list] = None) -> list:
         """
         overload the calculate function
         Args:
             data: single item data with timestamp, like [[1658544527, 100], [1658544527, 100]...]
+                or TimeSeries
             time_range: time range of checking. only error found in this range could be record
 
         Returns:
             list: abnormal data with timestamp, like [[1658544527, 100], [1658544527, 100]...]
         """
-        if not data:
+        if data is None or not len(data):
             return []
-        self.preprocess(data)
+        data = self.preprocess(data)
 
-        data = pd.DataFrame(data)
-        data_time = data[0]
-        data_value = data[1]
+        data_time = pd.Series(data.timestamps)
+        data_value = pd.Series(data.values)
 
         ewma_line = pd.DataFrame.ewm(data_value, alpha=self._alpha, adjust=self._adjust).mean()
         ewma_var = self._calculate_variance(data_value, ewma_line)
@@ -10,11 +10,12 @@
 # PURPOSE.
 # See the Mulan PSL v2 for more details.
 # ******************************************************************************/
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 
 import numpy as np
 
 from diana.core.experiment.algorithm.base_algo import BaseSingleItemAlgorithm
+from diana.utils.time_series import TimeSeries
 
 
 class NSigma(BaseSingleItemAlgorithm):
@@ -31,40 +32,27 @@ class NSigma(BaseSingleItemAlgorithm):
         }
         return data
 
-    def calculate(self, data: list, time_range: Optional[list] = None) -> list:
+    def calculate(self, data: Union[list, TimeSeries], time_range: Optional[list] = None) -> list:
         """
         overload calculate function
         Args:
             data: single item data with timestamp, like [[1658544527, 100], [1658544527, 100]...]
+                or TimeSeries
             time_range: time range of checking. only error found in this range could be record
         Returns:
             list: abnormal data with timestamp, like [[1658544527, 100], [1658544527, 100]...]
         """
-        if not data:
+        if data is None or not len(data):
             return []
-        self.preprocess(data)
+        data = self.preprocess(data)
 
-        data_time = []
-        data_value = []
-
-        for single_data in data:
-            data_time.append(single_data[0])
-            data_value.append(single_data[1])
-
-        ymean = np.mean(data_value)
-        ystd = np.std(data_value)
+        ymean = np.mean(data.values)
+        ystd = np.std(data.values)
         threshold1 = ymean - self._n * ystd
         threshold2 = ymean + self._n * ystd
 
-        abnormal_data = []
-
-        for index in range(0, len(data_value)):
-            if not (data_value[index] < threshold1) | (data_value[index] > threshold2):
-                continue
-            if not time_range:
-                abnormal_data.append([data_time[index], data_value[index]])
-                continue
-            if time_range[0] < data_time[index] < time_range[1]:
-                abnormal_data.append([data_time[index], data_value[index]])
+        abnormal = (data.values < threshold1) | (data.values > threshold2)
+        if time_range:
+            abnormal &= (data.timestamps > time_range[0]) & (data.timestamps < time_range[1])
 
-        return abnormal_data
+        return data[abnormal].to_list()
@@ -17,7 +17,7 @@ Description:
 """
 from copy import deepcopy
 from importlib import import_module
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import sqlalchemy
 
 from vulcanus.log.log import LOGGER
@@ -31,6 +31,7 @@ from diana.conf import configuration
 class App:
     def __init__(self):
         self.model = {}
+        self.model_paths = {}
 
     def load_detail(self):
         ...
@@ -116,27 +117,93 @@ class App:
         if self.check_model(self.model, model_info):
             return True
 
+        models = self.get_model_paths(model_info, default_mode)
+        if models is None:
+            return False
+
+        return self.load_models_by_path(models)
+
+    def get_model_paths(self, model_info: Dict[str, dict], default_mode: bool = False) -> Optional[Dict[str, dict]]:
+        """
+        Get model path and algorithm path of the models
+
+        Returns:
+            dict: e.g. {"model_id": {"model_path": "", "algo_path": ""}}
+            None if the database query fails
+        """
         if default_mode:
-            models = self._load_models_for_default(model_info)
-
-        else:
-            try:
-                with ModelDao() as modeldao_proxy:
-                    model_list = list(model_info.keys())
-                    status_code, models = modeldao_proxy.get_model(model_list)
-                if status_code != SUCCEED:
-                    return False
-            except sqlalchemy.exc.SQLAlchemyError:
-                LOGGER.error("connect to database fail.")
-                return False
+            return self._load_models_for_default(model_info)
+
+        try:
+            with ModelDao() as modeldao_proxy:
+                model_list = list(model_info.keys())
+                status_code, models = modeldao_proxy.get_model(model_list)
+            if status_code != SUCCEED:
+                return None
+        except sqlalchemy.exc.SQLAlchemyError:
+            LOGGER.error("connect to database fail.")
+            return None
+        return models
 
+    def load_models_by_path(self, models: Dict[str, dict]) -> bool:
+        """
+        Load models and keep their paths, so that they can be loaded again by other processes
+        Args:
+            models: e.g. {"model_id": {"model_path": "", "algo_path": ""}}
+        """
         for model_id, path_info in models.items():
             model = load_model(model_id, path_info['model_path'], path_info['algo_path'])
             if model is None:
                 return False
             self.model[model_id] = model
+            self.model_paths[model_id] = path_info
 
         return True
 
+    def aggregation_rules(self, detail: Dict[str, str]) -> Dict[str, Dict[str, Dict[str, str]]]:
+        """
+        Get the aggregation rules of the loaded model of each host, hosts whose model can not
+        aggregate data are skipped.
+        Args:
+            detail: it's a map between host and model. e.g.
+                {
+                    "host1": "model1",
+                    "host2": "model2"
+                }
+
+        Returns:
+            dict, e.g. {"host1": {"metric1": {"label1": "value1"}}}
+        """
+        rules = {}
+        for host_id, model_id in detail.items():
+            host_rules = getattr(self.model.get(model_id), "aggregation_rules", None)
+            if host_rules:
+                rules[host_id] = host_rules
+        return rules
+
+    def required_data(self, detail: Dict[str, str]) -> Optional[Dict[str, int]]:
+        """
+        Union of the data declared by the loaded models of the hosts
+        Args:
+            detail: it's a map between host and model. e.g.
+                {
+                    "host1": "model1",
+                    "host2": "model2"
+                }
+
+        Returns:
+            dict: selector and the max seconds of history needed before the checked time range,
+                e.g. {"metric1": 0, "metric2": 3600}
+            None if any model doesn't declare its data, then all data of the hosts is required
+        """
+        required = {}
+        for model_id in set(detail.values()):
+            model_data = getattr(self.model.get(model_id), "required_data", None)
+            if model_data is None:
+                return None
+            for selector, lookback in model_data.items():
+                required[selector] = max(required.get(selector, 0), lookback)
+        return required
+
     def execute(self, **kwargs):
         ...
@@ -16,10 +16,14 @@ Author:
 Description:
 """
 from collections import defaultdict
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List
 
+from vulcanus.log.log import LOGGER
+
 from diana.core.experiment.algorithm import Algorithm
 from diana.core.experiment.app import App
+from diana.core.experiment.compute_pool import compute_pool
 
 
 class MysqlNetworkDiagnoseApp(App):
@@ -53,7 +57,7 @@ class MysqlNetworkDiagnoseApp(App):
                     "host1": "model1",
                     "host2": "model2"
                 }
-            data: input original data. e.g.
+            data: input original data, data list can also be TimeSeries. e.g.
                 {
                     'id1': {
                         "metric1": {
@@ -71,6 +75,9 @@ class MysqlNetworkDiagnoseApp(App):
                     "host1": {"item1": ["metric_a"], "item2": ["metric_a", "metric_b"]}
                 }
         """
+        if compute_pool.enabled:
+            return self._do_check_in_pool(detail, data, time_range)
+
         result = {}
         for host_id, metrics in data.items():
             if metrics is None or detail.get(str(host_id)) is None:
@@ -82,6 +89,37 @@ class MysqlNetworkDiagnoseApp(App):
 
         return result
 
+    def _do_check_in_pool(self, detail: Dict[str, str], data: dict, time_range: list) -> Dict[str, List[int]]:
+        """
+        Same as do_check, but the hosts are checked in parallel by the compute pool
+        """
+        result = {}
+        futures = {}
+        for host_id, metrics in data.items():
+            if metrics is None or detail.get(str(host_id)) is None:
+                continue
+
+            model_id = detail[str(host_id)]
+            # models which are not loaded by path can't be loaded by worker processes
+            if model_id not in self.model_paths:
+                result[host_id] = self.model[model_id].calculate(metrics, time_range)
+                continue
+            try:
+                futures[host_id] = compute_pool.submit(model_id, self.model_paths[model_id], metrics, time_range)
+            except (BrokenProcessPool, RuntimeError) as error:
+                LOGGER.error("Compute pool can't be started, check host %s in this process. %s", host_id, error)
+                result[host_id] = self.model[model_id].calculate(metrics, time_range)
+
+        for host_id, future in futures.items():
+            try:
+                result[host_id] = future.result()
+            except BrokenProcessPool:
+                LOGGER.error("Compute pool is broken, check host %s in this process.", host_id)
+                model: Algorithm = self.model.get(detail[str(host_id)])
+                result[host_id] = model.calculate(data[host_id], time_range)
+
+        return result
+
     @staticmethod
     def format_result(check_result: Dict[str, Dict[str, List[str]]]) -> Dict[str, List[Dict[str, str]]]:
         """
@@ -134,7 +172,7 @@ class MysqlNetworkDiagnoseApp(App):
                         "host2": "model4"
                     }
                 }
-            data: input original data. e.g.
+            data: input original data, data list can also be TimeSeries. e.g.
                 {
                     'id1': {
                         "metric1": {
@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: process pool which runs the cpu bound detection of the executor
+"""
+import os
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+from vulcanus.common import singleton
+from vulcanus.log.log import LOGGER
+
+from diana.conf import configuration
+from diana.core.experiment.model import load_model
+from diana.utils.time_series import TimeSeries
+
+
+class ComputeError(Exception):
+    """
+    The model of a detection job can not be loaded in the worker process
+    """
+
+
+def pack_host_data(data: Dict[str, Dict[str, list]]) -> Dict[str, Dict[str, TimeSeries]]:
+    """
+    Turn the point lists of a host into TimeSeries, whose arrays are pickled as raw buffers
+    Args:
+        data: e.g. {"metric1": {"metric1{label1='a'}": [[1660000000, 1.0], [1660000015, 1.0]]}}
+
+    Returns:
+        dict: e.g. {"metric1": {"metric1{label1='a'}": TimeSeries}}
+    """
+    return {
+        metric: {label: TimeSeries.from_points(points) for label, points in series.items()}
+        for metric, series in data.items()
+    }
+
+
+def _init_worker(models: Dict[str, dict]):
+    # the executor process handles SIGINT and shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for model_id, path_info in models.items():
+        load_model(model_id, path_info['model_path'], path_info['algo_path'])
+
+
+def detect_host(model_id: str, path_info: dict, data: dict, time_range: List[int]):
+    """
+    Run a model on the data of one host in a worker process, the model is loaded once per process
+    Args:
+        model_id: id of the model
+        path_info: e.g. {"model_path": "", "algo_path": ""}
+        data: data of the host
+        time_range: time range of this diagnose
+
+    Returns:
+        result of model.calculate
+
+    Raises:
+        ComputeError
+    """
+    model = load_model(model_id, path_info['model_path'], path_info['algo_path'])
+    if model is None:
+        raise ComputeError("load model %s failed" % model_id)
+    return model.calculate(data, time_range)
+
+
+@singleton
+class ComputePool:
+    """
+    Worker processes shared by all consumer threads of the executor, so the detection of hosts
+    is not serialized by the GIL. The pool is created when the first job is submitted, and worker
+    processes load the models submitted so far when they start. When a job of a new model is
+    submitted, the pool is created again so that its workers load the new model too, jobs of the
+    former pool still run to the end.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.enabled = configuration.consumer.get("COMPUTE_POOL") == "on"
+        self._worker_num = int(configuration.consumer.get("COMPUTE_WORKER_NUM") or 0) or os.cpu_count()
+        self._models = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self, model_id: str, path_info: dict) -> ProcessPoolExecutor:
+        former_executor = None
+        with self._lock:
+            if self._models.get(model_id) != path_info:
+                self._models[model_id] = path_info
+                former_executor, self._executor = self._executor, None
+            if self._executor is None:
+                # the executor has kafka and database threads, so worker processes are not forked
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._worker_num,
+                    mp_context=get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(dict(self._models),),
+                )
+            executor = self._executor
+        if former_executor is not None:
+            former_executor.shutdown(wait=False)
+        return executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def submit(self, model_id: str, path_info: dict, data: dict, time_range: List[int]) -> Future:
+        """
+        Submit the detection of one host
+        Args:
+            model_id: id of the model
+            path_info: e.g. {"model_path": "", "algo_path": ""}
+            data: data of the host, point lists are packed into TimeSeries
+            time_range: time range of this diagnose
+
+        Returns:
+            Future: result of model.calculate
+
+        Raises:
+            BrokenProcessPool: the worker processes can't be started
+            RuntimeError: the pool is shut down
+        """
+        payload = pack_host_data(data)
+        executor = self._get_executor(model_id, path_info)
+        try:
+            return executor.submit(detect_host, model_id, path_info, payload, time_range)
+        except (BrokenProcessPool, RuntimeError) as error:
+            # e.g. a worker process died, or the pool is shut down by another thread
+            LOGGER.error("Compute pool can't run jobs, recreate it. %s", error)
+            self._reset_executor(executor)
+            return self._get_executor(model_id, path_info).submit(detect_host, model_id, path_info, payload, time_range)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+compute_pool = ComputePool()
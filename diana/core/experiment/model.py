@@ -15,14 +15,37 @@ Time:
 Author:
 Description:
 """
-import functools
+import threading
+from collections import OrderedDict
 from importlib import import_module
 
 from vulcanus.log.log import LOGGER
 
+# models keep the state of a calculation, e.g. the values of a diagnose tree, so every thread
+# loads its own instances instead of sharing them
+_local = threading.local()
+# models cached by each thread, the least recently used one is dropped beyond it
+MODEL_CACHE_SIZE = 128
+
 
-@functools.lru_cache()
 def load_model(model_id: str, model_path: str, algo_path: str) -> object:
+    """
+    Load a model, the model is cached per thread and reused by the later calls of the thread
+    """
+    models = getattr(_local, "models", None)
+    if models is None:
+        models = _local.models = OrderedDict()
+    key = (model_id, model_path, algo_path)
+    if key in models:
+        models.move_to_end(key)
+        return models[key]
+    model = models[key] = _load_model(model_id, model_path, algo_path)
+    if len(models) > MODEL_CACHE_SIZE:
+        models.popitem(last=False)
+    return model
+
+
+def _load_model(model_id: str, model_path: str, algo_path: str) -> object:
     try:
         # diana.core.experiment.algorithm.diag.Diag
         # module_path: diana.core.experiment.algorithm.diag
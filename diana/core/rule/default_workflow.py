@@ -14,13 +14,12 @@ from typing import Dict
 import uuid
 from importlib import import_module
 
-from vulcanus.kafka.kafka_exception import ProducerInitError
-from vulcanus.kafka.producer import BaseProducer
 
 from diana.core.experiment.app.mysql_network_diagnose import MysqlNetworkDiagnoseApp
 from diana.core.rule.functions import reformat_queried_data
 from diana.core.rule.model_assign import ModelAssign
 from diana.database.dao.data_dao import DataDao
+from diana.utils.kafka_producer import producer_manager
 from diana.errors.workflow_error import WorkflowModelAssignError
 from diana.conf import configuration
 from diana.conf.constant import ALGO_LIST
@@ -105,12 +104,12 @@ class DefaultWorkflow:
         return host_list
 
     def _get_app_execute_result(self, time_range):
-        data_dao = DataDao(configuration)
+        data_dao = DataDao()
         if not data_dao.connect():
             LOGGER.error("Promethus connection failed.")
             return DATABASE_CONNECT_ERROR, None
 
-        data_status, monitor_data = data_dao.query_data(time_range=time_range, host_list=self.__hosts)
+        data_status, monitor_data = data_dao.query_data(time_range=time_range, host_list=self.__hosts, columnar=True)
 
         if data_status != SUCCEED and data_status != PARTIAL_SUCCEED:
             LOGGER.error("Promethus data query error.")
@@ -144,14 +143,10 @@ class DefaultWorkflow:
             "alert_name": network_monitor_data["alert_name"],
             "host_check": self._kafka_host_check_msg(network_monitor_data),
         }
-        try:
-            producer = BaseProducer(configuration)
-            LOGGER.debug("Send workflow msg %s" % workflow_msg)
-            producer.send_msg(configuration.consumer.get('RESULT_NAME'), workflow_msg)
+        LOGGER.debug("Send workflow msg %s" % workflow_msg)
+        if producer_manager.send(configuration.consumer.get('RESULT_NAME'), workflow_msg):
             return SUCCEED
-        except ProducerInitError as error:
-            LOGGER.error("Produce workflow msg failed. %s" % error)
-            return TASK_EXECUTION_FAIL
+        return TASK_EXECUTION_FAIL
 
     def execute(self, time_range: list) -> str:
         """
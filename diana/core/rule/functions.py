@@ -11,13 +11,17 @@
 # See the Mulan PSL v2 for more details.
 # ******************************************************************************/
 from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from vulcanus.restful.resp.state import SUCCEED, PARTIAL_SUCCEED
+from diana.utils.time_series import TimeSeries
 
 
 def reformat_queried_data(queried_data: dict) -> dict:
     """
     reformat queried data
     Args:
-        queried_data: queried data from data dao.  e.g.
+        queried_data: queried data from data dao, data list can also be TimeSeries.  e.g.
             {
                 'id1': {
                     'metric1'{label1="a",label2="a"}':[[time1, 'value1'], [time2, 'value2']],
@@ -40,6 +44,7 @@ def reformat_queried_data(queried_data: dict) -> dict:
             },
             "id2": None
         }
+        TimeSeries is kept as it is, its values are already float.
     """
     reformat_data = defaultdict(dict)
     for host_id, data_info in queried_data.items():
@@ -52,6 +57,58 @@ def reformat_queried_data(queried_data: dict) -> dict:
             metric_name = metric_with_label.split("{")[0]
             if metric_name not in reformat_data[host_id]:
                 reformat_data[host_id][metric_name] = {}
+            if isinstance(data_list, TimeSeries):
+                reformat_data[host_id][metric_name][metric_with_label] = data_list
+                continue
             new_data_list = [[timestamp, float(point_data)] for timestamp, point_data in data_list]
             reformat_data[host_id][metric_name][metric_with_label] = new_data_list
     return dict(reformat_data)
+
+
+def group_by_lookback(required_data: Dict[str, int]) -> Dict[int, List[str]]:
+    """
+    Group selectors by the history they need, so that each group can be fetched by one time range
+    Args:
+        required_data: selector and the seconds of history needed before the checked time range,
+            e.g. {"metric1": 0, "metric2": 3600, "metric3": 3600}
+
+    Returns:
+        dict: e.g. {0: ["metric1"], 3600: ["metric2", "metric3"]}
+    """
+    groups = defaultdict(list)
+    for selector, lookback in required_data.items():
+        groups[lookback].append(selector)
+    return dict(groups)
+
+
+def merge_queried_data(results: List[Tuple[str, dict]]) -> Tuple[str, dict]:
+    """
+    Merge results of several data queries of the same or different hosts
+    Args:
+        results: list of (ret, data) returned by data dao, data is like
+            {'id1': {'metric1{label1="a"}': [[time1, 'value1']]}, 'id2': None}
+
+    Returns:
+        str: SUCCEED if all queries succeed, the status of the first failed query if no query
+            succeeds, otherwise PARTIAL_SUCCEED
+        dict: merged data, a host is None only when it gets no data of all queries
+    """
+    merged_data = {}
+    succeeded, error = False, None
+    for ret, data in results:
+        if ret in (SUCCEED, PARTIAL_SUCCEED):
+            succeeded = True
+        if ret != SUCCEED and error is None:
+            error = ret
+        for host_id, data_info in data.items():
+            if data_info is None:
+                merged_data.setdefault(host_id, None)
+            elif merged_data.get(host_id) is None:
+                merged_data[host_id] = dict(data_info)
+            else:
+                merged_data[host_id].update(data_info)
+    if error is None:
+        return SUCCEED, merged_data
+    if not succeeded:
+        return error, merged_data
+    return PARTIAL_SUCCEED, merged_data
@@ -15,14 +15,13 @@ Time:
 Author:
 Description:
 """
+import json
 import time
 from typing import Dict, Tuple
 import sqlalchemy
 
 from vulcanus.database.proxy import connect_database
 from vulcanus.conf.constant import URL_FORMAT
-from vulcanus.kafka.kafka_exception import ProducerInitError
-from vulcanus.kafka.producer import BaseProducer
 from vulcanus.log.log import LOGGER
 from vulcanus.restful.resp.state import (
     SUCCEED,
@@ -37,14 +36,20 @@ from vulcanus.exceptions import DatabaseConnectionFailed
 from diana.conf.constant import QUERY_HOST_DETAIL
 from diana.conf import configuration
 from diana.core.experiment.app.mysql_network_diagnose import MysqlNetworkDiagnoseApp
-from diana.core.rule.functions import reformat_queried_data
+from diana.core.rule.functions import reformat_queried_data, group_by_lookback, merge_queried_data
 from diana.core.rule.model_assign import ModelAssign
+from diana.core.rule.workflow_cache import workflow_cache
 from diana.database.dao.app_dao import AppDao
 from diana.database.dao.data_dao import DataDao
 from diana.database.dao.model_dao import ModelDao
 from diana.database.dao.result_dao import ResultDao
 from diana.database.dao.workflow_dao import WorkflowDao
 from diana.errors.workflow_error import WorkflowExecuteError, WorkflowModelAssignError
+from diana.utils.kafka_producer import producer_manager
+from diana.utils.promql import build_selector
+
+# seconds of data queried before the end of the checked time range, when models don't declare it
+DEFAULT_DATA_LOOKBACK = 1500
 
 
 class Workflow:
@@ -181,14 +186,10 @@ class Workflow:
             "alert_host": self._kafka_alert_host_msg(workflow),
             "host_check": self._kafka_host_check_msg(network_monitor_data),
         }
-        try:
-            producer = BaseProducer(configuration)
-            LOGGER.debug("Send workflow msg %s" % workflow_msg)
-            producer.send_msg(configuration.consumer.get('RESULT_NAME'), workflow_msg)
+        LOGGER.debug("Send workflow msg %s" % workflow_msg)
+        if producer_manager.send(configuration.consumer.get('RESULT_NAME'), workflow_msg):
             return SUCCEED
-        except ProducerInitError as error:
-            LOGGER.error("Produce workflow msg failed. %s" % error)
-            return TASK_EXECUTION_FAIL
+        return TASK_EXECUTION_FAIL
 
     @connect_database()
     def _get_workflow(self):
@@ -212,13 +213,109 @@ class Workflow:
             return DATABASE_QUERY_ERROR
         return dict(workflow=workflow, hosts=hosts, domain=domain)
 
+    @staticmethod
+    def _query_aggregated_data(data_dao, app, time_range, hosts, workflow, metrics=None) -> Tuple[str, dict]:
+        """
+        Query data of hosts whose model aggregates data with prometheus, hosts which share the same
+        aggregation rules are queried together. Original data of other hosts is queried as usual.
+        Models of the app should have been loaded. When metrics are given, only the rules of those
+        metrics are queried.
+        """
+        rules = app.aggregation_rules(workflow.get("detail", {}).get("multicheck", {}))
+        host_groups = {}
+        other_hosts = []
+        for host in hosts:
+            host_rules = rules.get(str(host["host_id"]))
+            if host_rules and metrics is not None:
+                host_rules = {
+                    metric_name: rule
+                    for metric_name, rule in host_rules.items()
+                    if build_selector(metric_name, rule) in metrics
+                }
+                if not host_rules:
+                    # nothing of this group is required by the model of the host
+                    continue
+            if not host_rules:
+                other_hosts.append(host)
+                continue
+            host_groups.setdefault(json.dumps(host_rules, sort_keys=True), (host_rules, []))[1].append(host)
+
+        results = [
+            data_dao.query_aggregated_data(time_range, group_hosts, group_rules, columnar=True)
+            for group_rules, group_hosts in host_groups.values()
+        ]
+        if other_hosts:
+            results.append(
+                data_dao.query_data(
+                    time_range=time_range, host_list=other_hosts, incremental=True, columnar=True, metrics=metrics
+                )
+            )
+
+        return merge_queried_data(results)
+
+    def _query_monitor_data(
+        self, data_dao, app, time_range, hosts, workflow, pushdown, demand_driven
+    ) -> Tuple[str, dict]:
+        """
+        Query data of the workflow. When models declare the data they read, only those series are
+        queried, and each of them is queried with the history its models need. Otherwise all series
+        of the hosts are queried in the default time range. Models of the app should have been loaded
+        if pushdown or demand_driven is True.
+        """
+        required_data = None
+        if demand_driven:
+            required_data = app.required_data(workflow.get("detail", {}).get("multicheck", {}))
+
+        if required_data:
+            queries = [
+                ([time_range[0] - lookback, time_range[1]], metrics)
+                for lookback, metrics in group_by_lookback(required_data).items()
+            ]
+        else:
+            queries = [([min(time_range[0], time_range[1] - DEFAULT_DATA_LOOKBACK), time_range[1]], None)]
+
+        results = []
+        for data_time_range, metrics in queries:
+            if pushdown:
+                results.append(self._query_aggregated_data(data_dao, app, data_time_range, hosts, workflow, metrics))
+            else:
+                results.append(
+                    data_dao.query_data(
+                        time_range=data_time_range, host_list=hosts, incremental=True, columnar=True, metrics=metrics
+                    )
+                )
+        if len(results) == 1:
+            return results[0]
+        return merge_queried_data(results)
+
     @connect_database()
-    def _get_app_execute_result(self, time_range, hosts, workflow):
-        data_dao = DataDao()
+    def fetch_data(self, time_range: list, hosts: list, workflow: dict, model_paths: dict = None):
+        """
+        Query the monitor data of the hosts, it's the I/O part of the check
+        Args:
+            time_range: ["1660471200"]
+            hosts: e.g. [{"host_id": "host1", "host_ip": "127.0.0.1"}]
+            workflow: workflow info
+            model_paths: paths of the models in model_info, models are loaded by them without
+                querying the database, e.g. {"model_id": {"model_path": "", "algo_path": ""}}
 
-        # data time range should based on the algorithm in the future
-        data_time_range = [time_range[1] - 1500, time_range[1]]
-        data_status, monitor_data = data_dao.query_data(time_range=data_time_range, host_list=hosts)
+        Returns:
+            str: status code if query failed
+            tuple: app whose models may be loaded, and the reformatted data
+        """
+        data_dao = DataDao()
+        if not data_dao.connect():
+            LOGGER.error("Prometheus connection failed.")
+            return DATABASE_CONNECT_ERROR
+        app = MysqlNetworkDiagnoseApp()
+        if model_paths:
+            app.load_models_by_path(model_paths)
+        pushdown = configuration.prometheus.get('AGGREGATION_PUSHDOWN') == "on"
+        demand_driven = configuration.prometheus.get('DEMAND_DRIVEN_FETCH') == "on"
+        models_loaded = (pushdown or demand_driven) and app.load_models(workflow.get("model_info"))
+        data_status, monitor_data = self._query_monitor_data(
+            data_dao, app, time_range, hosts, workflow, pushdown and models_loaded, demand_driven and models_loaded
+        )
 
         if data_status not in [SUCCEED, PARTIAL_SUCCEED]:
             LOGGER.error("Data query error")
@@ -226,12 +323,25 @@ class Workflow:
 
         processed_data = reformat_queried_data(monitor_data)
         LOGGER.debug("Finish querying workflow '%s' data and original data, start executing app." % self.__workflow_id)
+        return app, processed_data
 
-        app = MysqlNetworkDiagnoseApp()
+    def detect(self, app: MysqlNetworkDiagnoseApp, data: dict, time_range: list, workflow: dict):
+        """
+        Execute the app on the queried data, it's the cpu bound part of the check
+        Args:
+            app: app returned by fetch_data
+            data: data returned by fetch_data
+            time_range: ["1660471200"]
+            workflow: workflow info
+
+        Returns:
+            str: SUCCEED if nothing is abnormal
+            dict: execute result of the app
+        """
         network_monitor_data = app.execute(
             model_info=workflow.get("model_info"),
             detail=workflow.get("detail"),
-            data=processed_data,
+            data=data,
             time_range=time_range,
         )
         if not network_monitor_data:
@@ -240,25 +350,45 @@ class Workflow:
 
         return network_monitor_data
 
-    def execute(self, time_range: list, kafka=False, storage=True) -> str:
+    def _get_app_execute_result(self, time_range, hosts, workflow, model_paths=None):
+        fetched = self.fetch_data(time_range, hosts, workflow, model_paths)
+        if isinstance(fetched, str):
+            return fetched
+        app, processed_data = fetched
+        return self.detect(app, processed_data, time_range, workflow)
+
+    def load(self):
         """
-        Workflow control
-        Args:
-            time_range: ["1660471200"]
-            kafka: True
-            storage: True
+        Get the workflow and its hosts, from the workflow cache if it's enabled
+
         Returns:
-            int
+            str: status code if query failed
+            dict: e.g. {"workflow": {}, "hosts": [], "domain": "", "model_paths": {}}
         """
+        return workflow_cache.get(self.__workflow_id, self._load_definition)
+
+    def _load_definition(self):
         workflow = self._get_workflow()
-        if isinstance(workflow, str):
+        if isinstance(workflow, str) or not workflow_cache.enabled:
             return workflow
+        # keep the model paths as well, so that cached ticks don't query models
+        model_info = workflow["workflow"].get("model_info") or {}
+        workflow["model_paths"] = MysqlNetworkDiagnoseApp().get_model_paths(model_info)
+        return workflow
 
-        network_monitor_data = self._get_app_execute_result(time_range, workflow["hosts"], workflow["workflow"])
-        LOGGER.debug(network_monitor_data)
-        if isinstance(network_monitor_data, str):
-            return network_monitor_data
+    def save_result(self, network_monitor_data: dict, workflow: dict, time_range: list, kafka=False, storage=True):
+        """
+        Save the execute result into database and kafka
+        Args:
+            network_monitor_data: execute result of the app
+            workflow: result of load
+            time_range: ["1660471200"]
+            kafka: True
+            storage: True
 
+        Returns:
+            bool: whether the result is saved by any way
+        """
         storage_status, kafka_status = DATABASE_INSERT_ERROR, DATABASE_INSERT_ERROR
         if storage:
             try:
@@ -274,6 +404,29 @@ class Workflow:
 
         return storage_status == SUCCEED or kafka_status == SUCCEED
 
+    def execute(self, time_range: list, kafka=False, storage=True) -> str:
+        """
+        Workflow control
+        Args:
+            time_range: ["1660471200"]
+            kafka: True
+            storage: True
+        Returns:
+            int
+        """
+        workflow = self.load()
+        if isinstance(workflow, str):
+            return workflow
+
+        network_monitor_data = self._get_app_execute_result(
+            time_range, workflow["hosts"], workflow["workflow"], workflow.get("model_paths")
+        )
+        LOGGER.debug(network_monitor_data)
+        if isinstance(network_monitor_data, str):
+            return network_monitor_data
+
+        return self.save_result(network_monitor_data, workflow, time_range, kafka, storage)
+
     @staticmethod
     def assign_model(
         username: str,
@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: cache of workflow definitions in the executor
+"""
+import threading
+from collections import defaultdict
+from copy import deepcopy
+from typing import Callable, Dict, Optional, Union
+
+from vulcanus.log.log import LOGGER
+
+from diana.conf import configuration
+from diana.utils.cache import TTLCache
+from diana.utils.kafka_producer import producer_manager
+
+UPDATE = "update"
+DELETE = "delete"
+STOP = "stop"
+
+
+class WorkflowCache:
+    """
+    Definitions of workflows (workflow info, hosts, domain and model paths) which are loaded from
+    mysql and elasticsearch once and reused by the following ticks. An item is dropped when the
+    workflow is changed, and it expires after ttl seconds in case a change message is lost.
+
+    Every workflow has a version which is increased when it's invalidated, a definition loaded
+    before the invalidation is returned to its caller but not kept. Callers get their own copy of
+    a definition, since the stages of concurrent executions may change it.
+    """
+
+    def __init__(self, enabled: bool, maxsize: int, ttl: int):
+        """
+        Constructor
+        Args:
+            enabled: definitions are always loaded when it's False
+            maxsize: max number of definitions
+            ttl: seconds a definition is kept
+        """
+        self._enabled = enabled
+        self._definitions = TTLCache(maxsize, ttl)
+        self._versions = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def get(self, workflow_id: str, loader: Callable[[], Union[str, dict]]) -> Union[str, dict]:
+        """
+        Get the definition of a workflow, load it when it's not cached
+        Args:
+            workflow_id: id of the workflow
+            loader: function loading the definition, it returns a status code when it fails
+
+        Returns:
+            result of loader, failures are not cached
+        """
+        if not self._enabled:
+            return loader()
+
+        with self._lock:
+            version = self._versions[workflow_id]
+        definition = self._definitions.get(workflow_id)
+        if definition is not None:
+            return deepcopy(definition)
+
+        definition = loader()
+        if isinstance(definition, str):
+            return definition
+        with self._lock:
+            if self._versions[workflow_id] == version:
+                self._definitions.set(workflow_id, deepcopy(definition))
+        return definition
+
+    def invalidate(self, workflow_id: Optional[str] = None) -> None:
+        """
+        Drop the definition of a workflow, or all definitions when workflow_id is None
+        """
+        with self._lock:
+            if workflow_id is None:
+                for key in self._versions:
+                    self._versions[key] += 1
+            else:
+                self._versions[workflow_id] += 1
+            self._definitions.invalidate(workflow_id)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: e.g. {"hits": 10, "misses": 2, "size": 2}
+        """
+        return self._definitions.stats()
+
+
+workflow_cache = WorkflowCache(
+    configuration.diana.get("WORKFLOW_CACHE") == "on",
+    int(configuration.diana.get("WORKFLOW_CACHE_SIZE") or 0),
+    int(configuration.diana.get("WORKFLOW_CACHE_TTL") or 0),
+)
+
+
+def publish_workflow_change(workflow_id: str, action: str) -> bool:
+    """
+    Tell the executors that a workflow is changed through the control topic, the cache of this
+    process is invalidated directly. The message is sent even if the cache of this process is off,
+    since the executors may have theirs on.
+    Args:
+        workflow_id: id of the workflow
+        action: UPDATE, DELETE or STOP
+
+    Returns:
+        bool: whether the message is sent, it's always True when the control topic is not configured
+    """
+    workflow_cache.invalidate(workflow_id)
+    topic = configuration.producer.get("CONTROL_NAME")
+    if not topic:
+        return True
+
+    msg = {"workflow_id": workflow_id, "action": action}
+    if not producer_manager.send(topic, msg):
+        LOGGER.error("Publish %s of workflow %s failed.", action, workflow_id)
+        return False
+    return True
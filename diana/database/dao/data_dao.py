@@ -15,13 +15,31 @@ Time: 2022-07-27
 Author: YangYunYi
 Description: Query raw data from Prometheus
 """
-from typing import Dict, Tuple, List, Optional
+from collections import defaultdict
+from typing import Dict, Tuple, List, Optional, Union
 import datetime
+import time
+import requests
 from prometheus_api_client import PrometheusApiClientException
 from vulcanus.database.proxy import PromDbProxy
 from vulcanus.log.log import LOGGER
 from vulcanus.restful.resp.state import SUCCEED, DATABASE_QUERY_ERROR, NO_DATA, PARAM_ERROR, PARTIAL_SUCCEED
 from diana.conf import configuration
+from diana.utils.cache import TTLCache, SlidingWindowCache
+from diana.utils.downsample import downsample, LTTB
+from diana.utils.fetch_coordinator import fetch_coordinator, slice_matrix
+from diana.utils.fetch_engine import fetch_engine
+from diana.utils.prom_client import prom_client_pool
+from diana.utils.promql import parse_series, build_selector, instance_regex, parse_duration
+from diana.utils.stream_decode import decode_matrix, stream_decode_available, StreamDecodeError
+from diana.utils.time_series import to_columnar
+
+# series discovered for a (host, selector), shared by all DataDao objects of this process
+series_cache = TTLCache(
+    configuration.prometheus.get('SERIES_CACHE_SIZE') or 0, configuration.prometheus.get('SERIES_CACHE_TTL') or 0
+)
+# recently queried samples of (series, step), shared by all DataDao objects of this process
+window_cache = SlidingWindowCache(configuration.prometheus.get('WINDOW_CACHE_SIZE') or 0)
 
 
 class DataDao(PromDbProxy):
@@ -39,8 +57,46 @@ class DataDao(PromDbProxy):
             port (int)
         """
         PromDbProxy.__init__(self, host, port)
+        self._url = "http://%s:%s" % (
+            host or configuration.prometheus.get('IP'),
+            port or configuration.prometheus.get('PORT'),
+        )
         self.default_instance_port = configuration.agent.get('DEFAULT_INSTANCE_PORT') or 9100
         self.query_range_step = configuration.prometheus.get('QUERY_RANGE_STEP') or "15s"
+        self.batch_query = configuration.prometheus.get('BATCH_QUERY') == "on"
+        self.multi_host_query = configuration.prometheus.get('MULTI_HOST_QUERY') == "on"
+        self.max_instances_per_query = configuration.prometheus.get('MAX_INSTANCES_PER_QUERY') or 50
+        self.discovery_mode = configuration.prometheus.get('DISCOVERY_MODE') or "query"
+        self.series_discovery_window = configuration.prometheus.get('SERIES_DISCOVERY_WINDOW') or 300
+        self.incremental_query = configuration.prometheus.get('INCREMENTAL_QUERY') == "on"
+        self.stream_decode = configuration.prometheus.get('STREAM_DECODE') == "on"
+        if self.stream_decode and not stream_decode_available():
+            LOGGER.warning("ijson is not installed, range query responses will not be decoded as a stream.")
+            self.stream_decode = False
+
+    def connect(self) -> bool:
+        """
+        Use the process-wide pooled client, instead of creating a new one with its own connections
+
+        Returns:
+            bool: connect succeed or fail
+        """
+        if self.connected and self._prom is not None:
+            return True
+        try:
+            self._prom = prom_client_pool.get_client(self._url)
+        except (ValueError, TypeError, PrometheusApiClientException) as error:
+            LOGGER.error("Prometheus connect failed. %s" % error)
+            return False
+        self.connected = True
+        return True
+
+    def close(self):
+        """
+        Release the pooled client, its connections are kept alive for other users
+        """
+        self._prom = None
+        self.connected = False
 
     @staticmethod
     def __metric_dict2str(metric: Dict) -> str:
@@ -191,8 +247,12 @@ class DataDao(PromDbProxy):
                             "metric2{label1="label1_value", label2="label2_value", ..., }",
                             "metric2{label1="label1_value", label2="label2_value", ..., }",
                         ]
-                    }
+                    },
+                    "max_points": 1000,
+                    "downsample": "lttb"
                 }
+                max_points is optional, series with more samples are downsampled to it by "lttb",
+                which keeps the shape of the chart, or "min_max", which keeps the extremes of every bucket
 
         Returns:
             str: status code
@@ -225,6 +285,8 @@ class DataDao(PromDbProxy):
         time_range = data.get('time_range')
         query_ip = data.get('query_ip')
         query_info = data.get('query_info')
+        max_points = data.get('max_points')
+        downsample_method = data.get('downsample') or LTTB
 
         query_host = {"host_id": "query_host_id", "host_ip": query_ip}
 
@@ -255,22 +317,30 @@ class DataDao(PromDbProxy):
         if not query_info:
             return SUCCEED, res
 
+        query_items = []
         for metric_name, metric_list in query_info.items():
             if not metric_list:
                 _, metric_list = self.query_metric_list_of_host(host_ip, host_port, metric_name)
             if not metric_list:
                 query_data[metric_name] = []
-            for metric_info in metric_list:
-                data_status, monitor_data = self.query_data(
-                    time_range=time_range,
-                    host_list=query_host_list,
-                    metric=metric_info,
-                    adjusted_range_step=query_range_step,
-                )
-                values = []
-                if data_status == SUCCEED:
-                    values = monitor_data[query_host["host_id"]][metric_info]
-                add_two_dim_dict(query_data, metric_name, metric_info, values)
+            query_items.extend((metric_name, metric_info) for metric_info in metric_list)
+
+        def query_item(item: Tuple[str, str]) -> list:
+            data_status, monitor_data = self.query_data(
+                time_range=time_range,
+                host_list=query_host_list,
+                metric=item[1],
+                adjusted_range_step=query_range_step,
+            )
+            if data_status != SUCCEED:
+                return []
+            values = monitor_data[query_host["host_id"]][item[1]]
+            if max_points:
+                values = downsample(values, max_points, downsample_method)
+            return values
+
+        for (metric_name, metric_info), values in zip(query_items, fetch_engine.map(query_item, query_items)):
+            add_two_dim_dict(query_data, metric_name, metric_info, values)
 
         return SUCCEED, res
 
@@ -280,6 +350,9 @@ class DataDao(PromDbProxy):
         host_list: list,
         metric: Optional[str] = None,
         adjusted_range_step: Optional[int] = None,
+        incremental: bool = False,
+        columnar: bool = False,
+        metrics: Optional[List[str]] = None,
     ) -> Tuple[str, Dict]:
         """
         Query data
@@ -289,6 +362,13 @@ class DataDao(PromDbProxy):
                 [{"host_id": "id1", "host_ip": "172.168.128.164", "instance_port": 9100},
                  {"host_id": "id1", "host_ip": "172.168.128.164", "instance_port": 8080},
                  {"host_id": "id2", "host_ip": "172.168.128.165"}]
+            incremental(bool): only fetch samples newer than the sliding window cache of each series,
+                it takes effect when incremental_query is on. It suits callers which query a moving
+                window periodically, like workflows.
+            columnar(bool): return data lists as TimeSeries, whose values are already converted to float
+            metrics(list): only query series matched by any of the selectors, which are metric names
+                with optional equality matchers, e.g. ['metric1', 'metric2{label1="value1"}'].
+                metric is ignored when it's given
 
         Returns:
             ret(str): query ret
@@ -309,21 +389,42 @@ class DataDao(PromDbProxy):
         if not host_list:
             return PARAM_ERROR, host_data_list
 
-        status = SUCCEED
-        for host in host_list:
-            host_id = host["host_id"]
-            host_ip = host["host_ip"]
+        incremental = incremental and self.incremental_query
+        if self.multi_host_query and (metrics or metric is None or metric.find('{') == -1):
+            return self.__query_data_by_hosts(
+                time_range, host_list, metric, adjusted_range_step, incremental, columnar, metrics
+            )
+
+        def discover(host: dict) -> Tuple[str, List[str]]:
             host_port = host.get("instance_port", self.default_instance_port)
+            if metrics:
+                return self.query_metric_list_of_selectors(["%s:%s" % (host["host_ip"], host_port)], metrics)
+            return self.query_metric_list_of_host(host["host_ip"], host_port, metric)
+
+        discovery_results = fetch_engine.map(discover, host_list)
+        all_metrics = []
+        for ret, metric_list in discovery_results:
+            if ret == SUCCEED:
+                all_metrics.extend(metric_list)
+        fetch_ret, all_data_list = self.__query_data_by_host(
+            list(dict.fromkeys(all_metrics)), time_range, adjusted_range_step, incremental, columnar=columnar
+        )
+        if columnar:
+            all_data_list = {series: to_columnar(values) for series, values in all_data_list.items()}
+
+        # e.g. a cached window is returned but its new samples failed to be fetched
+        status = SUCCEED if fetch_ret == SUCCEED else PARTIAL_SUCCEED
+        for host, (ret, metric_list) in zip(host_list, discovery_results):
+            host_id = host["host_id"]
             if host_id not in host_data_list.keys():
                 host_data_list[host_id] = None
 
-            ret, metric_list = self.query_metric_list_of_host(host_ip, host_port, metric)
             if ret != SUCCEED:
                 status = PARTIAL_SUCCEED
                 host_data_list[host_id] = None
                 continue
-            ret, data_list = self.__query_data_by_host(metric_list, time_range, adjusted_range_step)
-            if ret != SUCCEED:
+            data_list = {metric_info: all_data_list[metric_info] for metric_info in metric_list}
+            if None in data_list.values():
                 status = PARTIAL_SUCCEED
             if not host_data_list[host_id]:
                 host_data_list[host_id] = data_list
@@ -332,6 +433,294 @@ class DataDao(PromDbProxy):
 
         return status, host_data_list
 
+    def __query_data_by_hosts(
+        self,
+        time_range: List[int],
+        host_list: list,
+        metric: Optional[str] = None,
+        adjusted_range_step: Optional[int] = None,
+        incremental: bool = False,
+        columnar: bool = False,
+        metrics: Optional[List[str]] = None,
+    ) -> Tuple[str, Dict]:
+        """
+        Query data of multiple hosts together. Hosts are split into chunks, the series of each chunk
+        are discovered and fetched with instance regex matchers, then the result is demultiplexed
+        by the instance label.
+        Args:
+            time_range(list): time range
+            host_list(list): host list, same as query_data
+            metric(str): metric name, optional
+            adjusted_range_step(int): query range step, optional
+            incremental(bool): use the sliding window cache
+            columnar(bool): return data lists as TimeSeries
+            metrics(list): series selectors, optional
+
+        Returns:
+            ret(str): query ret
+            host_data_list(dict): same as query_data
+        """
+        host_data_list = {host["host_id"]: None for host in host_list}
+        instance_hosts = self.__map_instance_hosts(host_list)
+
+        status = SUCCEED
+        chunks = self.__split_instances(list(instance_hosts.keys()))
+
+        def discover(chunk: List[str]) -> Tuple[str, List[str]]:
+            if metrics:
+                return self.query_metric_list_of_selectors(chunk, metrics)
+            return self.query_metric_list_of_instances(chunk, metric)
+
+        all_metrics = []
+        discovery_results = fetch_engine.map(discover, chunks)
+        for ret, metric_list in discovery_results:
+            if ret != SUCCEED:
+                status = PARTIAL_SUCCEED
+                continue
+            all_metrics.extend(metric_list)
+
+        ret, data_list = self.__query_data_by_host(
+            all_metrics, time_range, adjusted_range_step, incremental=incremental, batch=True, columnar=columnar
+        )
+        if ret != SUCCEED:
+            status = PARTIAL_SUCCEED
+        if columnar:
+            data_list = {series: to_columnar(values) for series, values in data_list.items()}
+
+        for series, values in data_list.items():
+            instance = parse_series(series)[1].get("instance")
+            for host_id in instance_hosts.get(instance, []):
+                if host_data_list[host_id] is None:
+                    host_data_list[host_id] = {}
+                host_data_list[host_id][series] = values
+
+        if None in host_data_list.values():
+            status = PARTIAL_SUCCEED
+        return status, host_data_list
+
+    def query_aggregated_data(
+        self,
+        time_range: List[int],
+        host_list: list,
+        aggregations: Dict[str, Dict[str, str]],
+        columnar: bool = False,
+    ) -> Tuple[str, Dict]:
+        """
+        Query data summed up by prometheus, so that only one series per metric per host is
+        transferred. Hosts are split into chunks and each chunk is queried with "sum by (instance)".
+        Args:
+            time_range(list): time range
+            host_list(list): host list, same as query_data
+            aggregations(dict): metric name and equality matchers of the series to sum up, e.g.
+                {"metric1": {"label1": "value1"}, "metric2": {}}
+            columnar(bool): return data lists as TimeSeries
+
+        Returns:
+            ret(str): query ret
+            host_data_list(dict): the key of each series has the instance label and the matchers,
+                so that it can still be filtered like the original series
+                    {
+                        'id1': {
+                            'metric1{instance="172.168.128.164:9100",label1="value1"}': [[time1, 'value1']],
+                            'metric2{instance="172.168.128.164:9100"}': [[time1, 'value1']]
+                        },
+                        'id2': None => get no data of this host
+                    }
+        """
+        if not host_list:
+            return PARAM_ERROR, {}
+
+        host_data_list = {host["host_id"]: None for host in host_list}
+        instance_hosts = self.__map_instance_hosts(host_list)
+        queries = []
+        for chunk in self.__split_instances(list(instance_hosts.keys())):
+            for metric_name, labels in aggregations.items():
+                if len(chunk) == 1:
+                    selector = build_selector(metric_name, dict(labels, instance=chunk[0]))
+                else:
+                    selector = build_selector(metric_name, labels, {"instance": instance_regex(chunk)})
+                queries.append((metric_name, labels, "sum by (instance) (%s)" % selector))
+
+        def query_aggregation(query: str) -> Optional[list]:
+            try:
+                return self.__query_range(query, time_range, self.query_range_step, columnar)
+            except (ValueError, TypeError, PrometheusApiClientException) as error:
+                LOGGER.error(
+                    "Prometheus query %s in %d-%d query data failed. %s" % (query, time_range[0], time_range[1], error)
+                )
+                return None
+
+        status = SUCCEED
+        results = fetch_engine.map(query_aggregation, [query for _, _, query in queries])
+        for (metric_name, labels, _), data in zip(queries, results):
+            if data is None:
+                status = PARTIAL_SUCCEED
+                continue
+            for item in data:
+                instance = item.get("metric", {}).get("instance")
+                series = build_selector(metric_name, dict(labels, instance=instance))
+                values = to_columnar(item.get("values")) if columnar else item.get("values")
+                for host_id in instance_hosts.get(instance, []):
+                    if host_data_list[host_id] is None:
+                        host_data_list[host_id] = {}
+                    host_data_list[host_id][series] = values
+
+        if None in host_data_list.values():
+            status = PARTIAL_SUCCEED
+        return status, host_data_list
+
+    def __map_instance_hosts(self, host_list: list) -> Dict[str, List]:
+        """
+        Map instance to the ids of hosts, If the port is not specified, the default value is used
+        Args:
+            host_list(list): host list, same as query_data
+
+        Returns:
+            dict: e.g. {"172.168.128.164:9100": ["id1"]}
+        """
+        instance_hosts = defaultdict(list)
+        for host in host_list:
+            host_port = host.get("instance_port", self.default_instance_port)
+            instance_hosts["%s:%s" % (host["host_ip"], host_port)].append(host["host_id"])
+        return instance_hosts
+
+    def __split_instances(self, instances: List[str]) -> List[List[str]]:
+        """
+        Split instances into chunks of at most max_instances_per_query instances
+        """
+        return [
+            instances[index : index + self.max_instances_per_query]
+            for index in range(0, len(instances), self.max_instances_per_query)
+        ]
+
+    def query_metric_list_of_instances(
+        self, instances: List[str], metric: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Query metric list of multiple instances by one query
+        Args:
+            instances(list): instance list, e.g. ["172.168.128.164:9100", "172.168.128.165:9100"]
+            metric(str): metric name, optional
+
+        Returns:
+            ret(str): query ret
+            metric_list(list): metric list of all instances
+                [
+                    'metric_name1{instance="172.168.128.164:9100",label1="value1"}',
+                    'metric_name1{instance="172.168.128.165:9100",label1="value1"}'
+                ]
+        """
+        if len(instances) == 1:
+            host_ip, host_port = instances[0].rsplit(':', 1)
+            return self.query_metric_list_of_host(host_ip, int(host_port), metric)
+
+        query_str = build_selector(metric or "", regex_labels={"instance": instance_regex(instances)})
+        try:
+            metric_list = self.__discover_series(query_str)
+            if not metric_list:
+                LOGGER.error("Query metric list result is empty. Can not get metric list of %s" % instances)
+                return NO_DATA, []
+            return SUCCEED, metric_list
+        except (ValueError, TypeError, PrometheusApiClientException, requests.RequestException) as error:
+            LOGGER.error("%s Prometheus query metric list failed. %s" % (instances, error))
+            return DATABASE_QUERY_ERROR, []
+
+    def query_metric_list_of_selectors(self, instances: List[str], selectors: List[str]) -> Tuple[str, List[str]]:
+        """
+        Query series of the instances which are matched by any of the selectors by one query
+        Args:
+            instances(list): instance list, e.g. ["172.168.128.164:9100", "172.168.128.165:9100"]
+            selectors(list): metric names with optional equality matchers, e.g. ['metric1{label1="value1"}']
+
+        Returns:
+            ret(str): query ret
+            metric_list(list): same as query_metric_list_of_instances
+        """
+        instance_selectors = []
+        for selector in selectors:
+            metric_name, labels = parse_series(selector)
+            if len(instances) == 1:
+                instance_selectors.append(build_selector(metric_name, dict(labels, instance=instances[0])))
+            else:
+                instance_selectors.append(build_selector(metric_name, labels, {"instance": instance_regex(instances)}))
+        try:
+            metric_list = self.__discover_series(instance_selectors)
+            if not metric_list:
+                LOGGER.debug("Query metric list result is empty. Can not get metric list of %s" % instances)
+                return NO_DATA, []
+            return SUCCEED, metric_list
+        except (ValueError, TypeError, PrometheusApiClientException, requests.RequestException) as error:
+            LOGGER.error("%s Prometheus query metric list failed. %s" % (instances, error))
+            return DATABASE_QUERY_ERROR, []
+
+    def __discover_series(self, query: Union[str, List[str]]) -> List[str]:
+        """
+        Discover series matched by the selector. Label sets rarely change between ticks,
+        so non-empty results are kept in the series cache until they expire.
+        Args:
+            query(str/list): series selector, e.g. '{instance="172.168.128.164:9100"}',
+                or a list of selectors whose series are united
+
+        Returns:
+            metric_list(list): series list, empty if nothing matched
+
+        Raises:
+            ValueError, TypeError, PrometheusApiClientException, requests.RequestException
+        """
+        query_str = query if isinstance(query, str) else " or ".join(query)
+        metric_list = series_cache.get(query_str)
+        if metric_list is not None:
+            return list(metric_list)
+
+        if self.discovery_mode == "series":
+            data = [{"metric": labels} for labels in self.query_series(query)]
+        else:
+            data = self._prom.custom_query(query=query_str)
+        if not data:
+            return []
+        metric_list = list(dict.fromkeys(self.__parse_metric_data(data)))
+        if metric_list:
+            series_cache.set(query_str, tuple(metric_list))
+        return metric_list
+
+    def query_series(
+        self, match: Union[str, List[str]], time_range: Optional[List[int]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Find label sets of series by the series metadata endpoint, no sample is evaluated or returned
+        Args:
+            match(str/list): series selector, e.g. '{instance="172.168.128.164:9100"}', or a list of them
+            time_range(list): time window the series should exist in,
+                default is the last series_discovery_window seconds
+
+        Returns:
+            list: label sets, e.g.
+                [{"__name__": "metric_name1", "instance": "172.168.128.164:9100", "label1": "label_value1"}]
+
+        Raises:
+            PrometheusApiClientException
+        """
+        if not time_range:
+            now = int(time.time())
+            time_range = [now - self.series_discovery_window, now]
+        params = {"match[]": match, "start": time_range[0], "end": time_range[1]}
+        response = self.__get("/api/v1/series", params)
+        if response.status_code != 200:
+            raise PrometheusApiClientException(
+                "HTTP Status Code {} ({!r})".format(response.status_code, response.content)
+            )
+        return response.json().get("data") or []
+
+    @staticmethod
+    def series_cache_stats() -> Dict[str, int]:
+        """
+        Get hit and miss counters of the series discovery cache
+
+        Returns:
+            dict: e.g. {"hits": 10, "misses": 2, "size": 2}
+        """
+        return series_cache.stats()
+
     def __parse_metric_data(self, metric_data: List) -> List[str]:
         """
         Parse metric data from prometheus to name<-> label_config dict
@@ -389,29 +778,38 @@ class DataDao(PromDbProxy):
             else:
                 query_str = metric + query_str
         try:
-            data = self._prom.custom_query(query=query_str)
-            if not data:
+            metric_list = self.__discover_series(query_str)
+            if not metric_list:
                 if query_str.startswith('{'):
                     LOGGER.error(
                         "Query metric list result is empty. "
                         "Can not get metric list of host %s:%s " % (host_ip, host_port)
                     )
                 return NO_DATA, []
-            metric_list = self.__parse_metric_data(data)
             return SUCCEED, metric_list
 
-        except (ValueError, TypeError, PrometheusApiClientException) as error:
+        except (ValueError, TypeError, PrometheusApiClientException, requests.RequestException) as error:
             LOGGER.error("host %s:%d Prometheus query metric list failed. %s" % (host_ip, host_port, error))
             return DATABASE_QUERY_ERROR, []
 
     def __query_data_by_host(
-        self, metrics_list: List[str], time_range: List[int], adjusted_range_step: Optional[int] = None
+        self,
+        metrics_list: List[str],
+        time_range: List[int],
+        adjusted_range_step: Optional[int] = None,
+        incremental: bool = False,
+        batch: bool = False,
+        columnar: bool = False,
     ) -> Tuple[str, Dict]:
         """
         Query data of a host
         Args:
             metrics_list(list): metric list of this host
             time_range(list): time range to query
+            adjusted_range_step(int): query range step, optional
+            incremental(bool): use the sliding window cache
+            batch(bool): fetch series by metric groups even if batch_query is off
+            columnar(bool): data lists may be returned as TimeSeries
 
         Returns:
             ret(str): query ret
@@ -425,35 +823,265 @@ class DataDao(PromDbProxy):
                 }
 
         """
-        start_time = datetime.datetime.fromtimestamp(time_range[0])
-        end_time = datetime.datetime.fromtimestamp(time_range[1])
-
         query_range_step = self.query_range_step
         if adjusted_range_step is not None:
             query_range_step = adjusted_range_step
 
-        data_list = {}
-        ret = SUCCEED
+        if incremental:
+            return self.__query_data_incrementally(metrics_list, time_range, query_range_step, batch, columnar)
+        return self.__fetch_data(metrics_list, time_range, query_range_step, batch, columnar)
+
+    def __query_data_incrementally(
+        self, metrics_list: List[str], time_range: List[int], query_range_step, batch: bool, columnar: bool = False
+    ) -> Tuple[str, Dict]:
+        """
+        Only fetch the samples after the last cached one of each series, append them to the sliding
+        window cache and return the whole window. Series are fetched together when their windows
+        end at the same time, which is the usual case of periodic workflow ticks.
+        Args:
+            metrics_list(list): series list
+            time_range(list): time range to query
+            query_range_step(str/int): query range step
+            batch(bool): fetch series by metric groups even if batch_query is off
+            columnar(bool): data lists may be fetched as TimeSeries
+
+        Returns:
+            ret(str): query ret
+            data_list(dict): same as __query_data_by_host
+        """
+        step = parse_duration(query_range_step)
+        partitions = defaultdict(list)
         for metric in metrics_list:
-            try:
-                data = self._prom.custom_query_range(
-                    query=metric, start_time=start_time, end_time=end_time, step=query_range_step
+            partitions[window_cache.fetch_start((metric, step), time_range[0], step)].append(metric)
+
+        ret = SUCCEED
+        data_list = {}
+        for fetch_start, metrics in partitions.items():
+            fetched = None
+            if fetch_start <= time_range[1]:
+                fetch_ret, fetched = self.__fetch_data(
+                    metrics, [fetch_start, time_range[1]], query_range_step, batch, columnar
                 )
+                if fetch_ret != SUCCEED:
+                    ret = PARTIAL_SUCCEED
+
+            for metric in metrics:
+                values = fetched.get(metric) if fetched is not None else None
+                if fetched is not None and values is None:
+                    # the new samples are missing, the cached window is returned but it's not up to date
+                    ret = PARTIAL_SUCCEED
+                    if fetch_start == time_range[0]:
+                        # nothing cached and nothing fetched
+                        data_list[metric] = None
+                        continue
+                data_list[metric] = window_cache.update((metric, step), time_range, values or [], step)
+        return ret, data_list
+
+    def __fetch_data(
+        self, metrics_list: List[str], time_range: List[int], query_range_step, batch: bool, columnar: bool = False
+    ) -> Tuple[str, Dict]:
+        """
+        Fetch range data of series from prometheus
+        Args:
+            metrics_list(list): series list
+            time_range(list): time range to query
+            query_range_step(str/int): query range step
+            batch(bool): fetch series by metric groups even if batch_query is off
+            columnar(bool): data lists may be returned as TimeSeries
+
+        Returns:
+            ret(str): query ret
+            data_list(dict): same as __query_data_by_host
+        """
+        if batch or self.batch_query:
+            return self.__query_data_by_group(
+                self.__group_metrics(metrics_list), time_range, query_range_step, columnar
+            )
+
+        def query_series(metric: str) -> Optional[list]:
+            try:
+                data = self.__query_range(metric, time_range, query_range_step, columnar)
                 if not data or "values" not in data[0]:
                     LOGGER.debug(
                         "Query data result is empty. "
                         "metric %s in %d-%d doesn't record in the prometheus " % (metric, time_range[0], time_range[1])
                     )
-                    data_list[metric] = None
-                    ret = PARTIAL_SUCCEED
-                    continue
-                data_list[metric] = data[0]["values"]
+                    return None
+                return data[0]["values"]
 
             except (ValueError, TypeError, PrometheusApiClientException) as error:
                 LOGGER.error(
                     "Prometheus metric %s in %d-%d query data failed. %s"
                     % (metric, time_range[0], time_range[1], error)
                 )
-                data_list[metric] = None
-                ret = PARTIAL_SUCCEED
+                return None
+
+        data_list = dict(zip(metrics_list, fetch_engine.map(query_series, metrics_list)))
+        ret = PARTIAL_SUCCEED if None in data_list.values() else SUCCEED
+        return ret, data_list
+
+    def __group_metrics(self, metrics_list: List[str]) -> Dict[str, List[str]]:
+        """
+        Group series by metric name, each group can be fetched by one range query. Series of
+        different instances are matched by an instance regex of at most max_instances_per_query
+        instances, so that the query never exceeds the url length limit.
+        Args:
+            metrics_list(list): series list, e.g.
+                [
+                    'metric1{instance="172.168.128.164:9100",label1="value1"}',
+                    'metric1{instance="172.168.128.165:9100",label1="value2"}'
+                ]
+
+        Returns:
+            dict: group selector and its series list, e.g.
+                {
+                    'metric1{instance=~"172\\.168\\.128\\.164:9100|172\\.168\\.128\\.165:9100"}': [
+                        'metric1{instance="172.168.128.164:9100",label1="value1"}',
+                        'metric1{instance="172.168.128.165:9100",label1="value2"}'
+                    ]
+                }
+        """
+        groups = {}
+        name_groups = defaultdict(list)
+        name_instances = defaultdict(set)
+        for metric in metrics_list:
+            metric_name, labels = parse_series(metric)
+            if not metric_name or "instance" not in labels:
+                # can not be grouped safely, query it by itself
+                groups[metric] = [metric]
+                continue
+            name_groups[metric_name].append(metric)
+            name_instances[metric_name].add(labels["instance"])
+
+        for metric_name, group_metrics in name_groups.items():
+            instances = sorted(name_instances[metric_name])
+            instance_selectors = {}
+            for chunk in self.__split_instances(instances):
+                if len(chunk) == 1:
+                    selector = build_selector(metric_name, {"instance": chunk[0]})
+                else:
+                    selector = build_selector(metric_name, regex_labels={"instance": instance_regex(chunk)})
+                for instance in chunk:
+                    instance_selectors[instance] = selector
+            for metric in group_metrics:
+                groups.setdefault(instance_selectors[parse_series(metric)[1]["instance"]], []).append(metric)
+        return groups
+
+    def __query_data_by_group(
+        self, groups: Dict[str, List[str]], time_range: List[int], query_range_step, columnar: bool = False
+    ) -> Tuple[str, Dict]:
+        """
+        Query data with one range query per group, and split the matrix back to each series
+        Args:
+            groups(dict): group selector and its series list, see __group_metrics
+            time_range(list): time range to query
+            query_range_step(str/int): query range step
+            columnar(bool): data lists may be returned as TimeSeries
+
+        Returns:
+            ret(str): query ret
+            data_list(dict): same as __query_data_by_host
+        """
+
+        def query_group(selector: str) -> Optional[list]:
+            try:
+                return self.__query_range(selector, time_range, query_range_step, columnar)
+            except (ValueError, TypeError, PrometheusApiClientException) as error:
+                LOGGER.error(
+                    "Prometheus metric %s in %d-%d query data failed. %s"
+                    % (selector, time_range[0], time_range[1], error)
+                )
+                return None
+
+        data_list = {}
+        ret = SUCCEED
+        selectors = list(groups.keys())
+        for selector, data in zip(selectors, fetch_engine.map(query_group, selectors)):
+            group_data = {}
+            for item in data or []:
+                group_data[self.__metric_dict2str(item.get("metric", {}))] = item.get("values")
+
+            for metric in groups[selector]:
+                values = group_data.get(metric)
+                if values is None and metric == selector and len(group_data) == 1:
+                    # a series queried by itself matches whatever label set prometheus returns
+                    (values,) = group_data.values()
+                if values is None:
+                    LOGGER.debug(
+                        "Query data result is empty. "
+                        "metric %s in %d-%d doesn't record in the prometheus " % (metric, time_range[0], time_range[1])
+                    )
+                    ret = PARTIAL_SUCCEED
+                data_list[metric] = values
         return ret, data_list
+
+    def __query_range(self, query: str, time_range: List[int], query_range_step, columnar: bool = False) -> list:
+        """
+        Range query. When stream_decode is on and columnar data is wanted, the response is decoded
+        as a stream into TimeSeries, so that the memory is bounded by the samples instead of the json.
+        Queries of workflows sharing hosts are merged by the fetch coordinator, so the result is
+        shared and must not be modified. The time range is aligned to the step first, so that
+        workflows ticking at different phases of a step evaluate the same points and share a query,
+        and a query covered by a wider one of another workflow is cut from it.
+        Args:
+            query(str): PromQL
+            time_range(list): time range to query
+            query_range_step(str/int): query range step
+            columnar(bool): values may be returned as TimeSeries
+
+        Returns:
+            list: e.g. [{"metric": {"__name__": "metric1", ...}, "values": [[time1, 'value1']]}]
+
+        Raises:
+            ValueError, TypeError, PrometheusApiClientException
+        """
+        stream = columnar and self.stream_decode
+        if not fetch_coordinator.enabled:
+            return self.__load_range(query, time_range, query_range_step, stream)
+
+        step = parse_duration(query_range_step)
+        aligned_range = [time_range[0] - time_range[0] % step, time_range[1] - time_range[1] % step]
+        return fetch_coordinator.fetch_range(
+            (self._url, query, query_range_step, stream),
+            aligned_range,
+            lambda fetch_range: self.__load_range(query, fetch_range, query_range_step, stream),
+            slice_matrix,
+        )
+
+    def __load_range(self, query: str, time_range: List[int], query_range_step, stream: bool) -> list:
+        if not stream:
+            return self._prom.custom_query_range(
+                query=query,
+                start_time=datetime.datetime.fromtimestamp(time_range[0]),
+                end_time=datetime.datetime.fromtimestamp(time_range[1]),
+                step=query_range_step,
+            )
+
+        params = {"query": query, "start": time_range[0], "end": time_range[1], "step": query_range_step}
+        capacity = (time_range[1] - time_range[0]) // parse_duration(query_range_step) + 1
+        try:
+            with self.__get("/api/v1/query_range", params, stream=True) as response:
+                if response.status_code != 200:
+                    raise PrometheusApiClientException(
+                        "HTTP Status Code {} ({!r})".format(response.status_code, response.content)
+                    )
+                response.raw.decode_content = True
+                return decode_matrix(response.raw, capacity)
+        except (requests.RequestException, StreamDecodeError) as error:
+            raise PrometheusApiClientException(str(error))
+
+    def __get(self, path: str, params: dict, stream: bool = False) -> requests.Response:
+        """
+        Send a get request to the prometheus api, the session of the client is reused when it exists
+        """
+        url = "%s%s" % (self._prom.url, path)
+        session = getattr(self._prom, "_session", None)
+        if session is not None:
+            return session.get(url, params=params, headers=self._prom.headers, stream=stream)
+        return requests.get(
+            url,
+            params=params,
+            headers=self._prom.headers,
+            verify=getattr(self._prom, "ssl_verification", True),
+            stream=stream,
+        )
@@ -23,7 +23,10 @@ from diana.mode import mode
 from diana.mode.scheduler import Scheduler
 from diana.core.check.check_scheduler.check_scheduler import check_scheduler
 from diana.conf import configuration
+from diana.database.dao.data_dao import DataDao
 from diana.url import URLS
+from diana.utils.kafka_producer import producer_manager
+from diana.utils.stats_reporter import stats_reporter
 
 
 @mode.register('configurable')
@@ -50,4 +53,7 @@ class ConfigurableScheduler(Scheduler):
         apscheduler.start()
 
         check_scheduler.start_all_workflow(app)
+        stats_reporter.register("series_cache", DataDao.series_cache_stats)
+        stats_reporter.register("producer", producer_manager.stats)
+        stats_reporter.start()
         return app
@@ -15,14 +15,21 @@ Time:
 Author:
 Description:
 """
-from typing import NoReturn
+import signal
+from typing import NoReturn, Optional, Union
 
 from vulcanus.log.log import LOGGER
 
 from diana.conf import configuration
-from diana.core.check.consumer import ConsumerManager
+from diana.core.check.consumer import ConsumerManager, ProcessManager
+from diana.core.check.consumer.control_consumer import create_control_consumer
+from diana.core.check.consumer.pipeline import DETECT, FETCH, LOAD, STORE, PipelineWorkflowConsumer, WorkflowPipeline
 from diana.core.check.consumer.workflow_consumer import WorkflowConsumer
+from diana.core.rule.workflow_cache import workflow_cache
+from diana.database.dao.data_dao import DataDao
 from diana.mode import mode, Mode
+from diana.utils.kafka_producer import producer_manager
+from diana.utils.stats_reporter import stats_reporter
 
 
 @mode.register('executor')
@@ -37,11 +44,83 @@ class Executor(Mode):
 
     @staticmethod
     def run() -> NoReturn:
-        consumer_list = [
-            WorkflowConsumer(
-                configuration.consumer.get('TASK_NAME'), configuration.consumer.get('TASK_GROUP_ID'), configuration
-            )
-        ]
-        manager = ConsumerManager(consumer_list)
+        worker_num = int(configuration.consumer.get('WORKER_NUM') or 1)
+        LOGGER.info(
+            "check executor start succeed, %d %s workers", worker_num, configuration.consumer.get('WORKER_MODE')
+        )
+        if configuration.consumer.get('WORKER_MODE') == "process" and worker_num > 1:
+            manager = ProcessManager(run_worker_process, worker_num)
+            _stop_on_signal(manager)
+            manager.run()
+        else:
+            run_consumers(worker_num)
+        LOGGER.info("check executor stopped")
+
+
+def create_pipeline() -> WorkflowPipeline:
+    concurrency = {
+        LOAD: configuration.consumer.get('LOAD_CONCURRENCY'),
+        FETCH: configuration.consumer.get('FETCH_CONCURRENCY'),
+        DETECT: configuration.consumer.get('DETECT_CONCURRENCY'),
+        STORE: configuration.consumer.get('STORE_CONCURRENCY'),
+    }
+    return WorkflowPipeline(concurrency, int(configuration.consumer.get('PIPELINE_QUEUE_SIZE') or 0))
+
+
+def create_consumer_manager(worker_num: int, pipeline: Optional[WorkflowPipeline] = None) -> ConsumerManager:
+    """
+    Create consumers of the same group, kafka assigns the partitions of the task topic among them
+    """
+    topic, group_id = configuration.consumer.get('TASK_NAME'), configuration.consumer.get('TASK_GROUP_ID')
+
+    def create_consumer():
+        if pipeline is not None:
+            return PipelineWorkflowConsumer(topic, group_id, configuration, pipeline)
+        return WorkflowConsumer(topic, group_id, configuration)
+
+    return ConsumerManager([create_consumer() for _ in range(worker_num)], consumer_factory=create_consumer)
+
+
+def run_consumers(worker_num: int):
+    """
+    Run consumers in threads until SIGTERM, they share a pipeline if it's enabled. The cached
+    workflows are invalidated by the control consumer.
+    """
+    pipeline = None
+    if configuration.consumer.get('PIPELINE') == "on":
+        pipeline = create_pipeline()
+        pipeline.start()
+    control_consumer = None
+    if workflow_cache.enabled:
+        control_consumer = create_control_consumer()
+        control_consumer.start()
+    manager = create_consumer_manager(worker_num, pipeline)
+    _stop_on_signal(manager)
+    stats_reporter.register("series_cache", DataDao.series_cache_stats)
+    stats_reporter.register("producer", producer_manager.stats)
+    stats_reporter.register("consumer", manager.health)
+    stats_reporter.start()
+    try:
         manager.run()
-        LOGGER.info("check executor start succeed")
+    finally:
+        stats_reporter.stop()
+        if control_consumer is not None:
+            control_consumer.stop_consumer()
+        if pipeline is not None:
+            pipeline.stop()
+
+
+def run_worker_process():
+    """
+    Entry of a worker process, it runs one consumer until it gets SIGTERM
+    """
+    run_consumers(1)
+
+
+def _stop_on_signal(manager: Union[ConsumerManager, ProcessManager]):
+    def handler(signum, frame):
+        LOGGER.info("receive signal %d, stop check executor", signum)
+        manager.stop()
+
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import unittest
+from unittest import mock
+
+from diana.core.check.check_scheduler.dispatcher import TimingWheel, check_dispatcher
+from diana.core.check.check_scheduler.task_keeper import CheckTaskKeeper
+from diana.core.check.check_scheduler.time_keeper import time_keeper_manager
+
+
+class TestTimingWheel(unittest.TestCase):
+    def test_advance_should_return_timers_every_interval(self):
+        wheel = TimingWheel(4)
+        wheel.add("workflow1", "payload1", 3, 0)
+        wheel.add("workflow2", "payload2", 5, 0)
+
+        due = {tick: wheel.advance(tick) for tick in range(1, 16)}
+        self.assertEqual([tick for tick, payloads in due.items() if "payload1" in payloads], [3, 6, 9, 12, 15])
+        self.assertEqual([tick for tick, payloads in due.items() if "payload2" in payloads], [5, 10, 15])
+
+    def test_remove_should_stop_timer(self):
+        wheel = TimingWheel(4)
+        wheel.add("workflow1", "payload1", 2, 0)
+        self.assertTrue(wheel.remove("workflow1"))
+        self.assertFalse(wheel.remove("workflow1"))
+        self.assertEqual([wheel.advance(tick) for tick in range(1, 5)], [[], [], [], []])
+        self.assertEqual(len(wheel), 0)
+
+    def test_add_should_replace_timer_of_same_key(self):
+        wheel = TimingWheel(8)
+        wheel.add("workflow1", "payload1", 2, 0)
+        wheel.add("workflow1", "payload2", 3, 0)
+        self.assertEqual([wheel.advance(tick) for tick in range(1, 4)], [[], [], ["payload2"]])
+
+    def test_add_should_delay_first_due(self):
+        wheel = TimingWheel(8)
+        wheel.add("workflow1", "payload1", 5, 0, delay=2)
+        self.assertEqual([tick for tick in range(1, 13) if wheel.advance(tick)], [2, 7, 12])
+
+
+class TestCheckDispatcher(unittest.TestCase):
+    def test_dispatch_should_publish_due_workflows_in_one_batch(self):
+        time_ranges = {"workflow1": [1, 61], "workflow2": [2, 62]}
+        with mock.patch.object(time_keeper_manager, "get_time_ranges", return_value=time_ranges) as get_ranges, \
+                mock.patch.object(CheckTaskKeeper, "publish_check_tasks", return_value=2) as publish:
+            self.assertEqual(check_dispatcher._dispatch([("workflow1", "admin"), ("workflow2", "admin"),
+                                                         ("workflow3", "admin")]), 2)
+        get_ranges.assert_called_once_with(["workflow1", "workflow2", "workflow3"])
+        publish.assert_called_once_with([
+            {"workflow_id": "workflow1", "username": "admin", "time_range": [1, 61]},
+            {"workflow_id": "workflow2", "username": "admin", "time_range": [2, 62]},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import unittest
+from unittest import mock
+
+from diana.core.check.check_scheduler.time_keeper import CheckTimeKeeper, phase_offset, last_phase_moment
+
+
+class TestPhaseOffset(unittest.TestCase):
+    def test_phase_offset_should_be_stable_and_within_step(self):
+        offsets = [phase_offset("workflow%d" % index, 60) for index in range(600)]
+        self.assertEqual(offsets, [phase_offset("workflow%d" % index, 60) for index in range(600)])
+        self.assertTrue(all(0 <= offset < 60 for offset in offsets))
+        # workflows are spread over the step instead of sharing one second
+        self.assertGreater(len(set(offsets)), 50)
+
+    def test_last_phase_moment_should_not_be_after_moment(self):
+        self.assertEqual(last_phase_moment(1660471225, 60, 5), 1660471205)
+        self.assertEqual(last_phase_moment(1660471205, 60, 5), 1660471205)
+        self.assertEqual(last_phase_moment(1660471204, 60, 5), 1660471145)
+
+
+class TestCheckTimeKeeper(unittest.TestCase):
+    @mock.patch("diana.core.check.check_scheduler.time_keeper.time.time")
+    def test_time_ranges_should_be_contiguous_from_phase(self, mock_time):
+        mock_time.return_value = 1660471225
+        time_keeper = CheckTimeKeeper(60, 5)
+
+        ranges = []
+        for moment in (1660471265, 1660471325, 1660471500):
+            mock_time.return_value = moment
+            ranges.append(time_keeper.get_time_range())
+        self.assertEqual(ranges, [[1660471205, 1660471265], [1660471265, 1660471325], [1660471325, 1660471385]])
+
+    @mock.patch("diana.core.check.check_scheduler.time_keeper.time.time")
+    def test_time_range_should_start_now_without_phase(self, mock_time):
+        mock_time.return_value = 1660471225
+        time_keeper = CheckTimeKeeper(60)
+        mock_time.return_value = 1660471285
+        self.assertEqual(time_keeper.get_time_range(), [1660471225, 1660471285])
+
+    @mock.patch("diana.core.check.check_scheduler.time_keeper.time.time")
+    def test_time_range_should_catch_up_lag_in_one_range(self, mock_time):
+        mock_time.return_value = 1660471200
+        time_keeper = CheckTimeKeeper(60, max_range=3600)
+
+        ranges = []
+        for moment in (1660471260, 1660476000, 1660476060, 1660476120):
+            mock_time.return_value = moment
+            ranges.append(time_keeper.get_time_range())
+        self.assertEqual(ranges, [[1660471200, 1660471260], [1660471260, 1660474860],
+                                  [1660474860, 1660476060], [1660476060, 1660476120]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import unittest
+from unittest import mock
+
+from diana.core.check.check_scheduler.time_keeper import time_keeper_manager
+from diana.core.check.check_scheduler.time_keeper_store import TimeKeeperStore, TIME_KEEPER_KEY
+
+
+class TestTimeKeeperStore(unittest.TestCase):
+    def test_load_should_convert_moments(self):
+        client = mock.Mock()
+        client.hgetall.return_value = {"workflow1": "1660471200", "workflow2": "1660471260"}
+        self.assertEqual(TimeKeeperStore(client).load(), {"workflow1": 1660471200, "workflow2": 1660471260})
+        client.hgetall.assert_called_once_with(TIME_KEEPER_KEY)
+
+    def test_save_should_write_moments_by_one_request(self):
+        client = mock.Mock()
+        TimeKeeperStore(client).save({"workflow1": 1660471200, "workflow2": 1660471260})
+        client.hset.assert_called_once_with(TIME_KEEPER_KEY, mapping={"workflow1": 1660471200, "workflow2": 1660471260})
+
+
+class TestTimeKeeperManagerRestore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = mock.Mock()
+        self.store = time_keeper_manager._store
+        self.max_range = time_keeper_manager._max_range
+        self.flush_interval = time_keeper_manager._flush_interval
+        time_keeper_manager._store = TimeKeeperStore(self.client)
+        time_keeper_manager._flush_interval = 3600
+
+    def tearDown(self) -> None:
+        time_keeper_manager._store = self.store
+        time_keeper_manager._max_range = self.max_range
+        time_keeper_manager._flush_interval = self.flush_interval
+        for workflow_id in ("workflow1", "workflow2"):
+            time_keeper_manager.delete_time_keeper(workflow_id)
+
+    @mock.patch("diana.core.check.check_scheduler.time_keeper.time.time")
+    def test_restore_should_resume_from_stored_positions(self, mock_time):
+        mock_time.return_value = 1660471500
+        self.client.hgetall.return_value = {"workflow1": "1660471450", "deleted_workflow": "1660471200"}
+        time_keeper_manager._max_range = None
+
+        resumed = time_keeper_manager.restore_time_keepers({"workflow1": (60, None), "workflow2": (60, None)})
+        self.assertEqual(resumed, 1)
+        self.client.hgetall.assert_called_once()
+
+        mock_time.return_value = 1660471510
+        time_ranges = time_keeper_manager.get_time_ranges(["workflow1", "workflow2"])
+        self.assertEqual(time_ranges, {"workflow1": [1660471450, 1660471510], "workflow2": [1660471500, 1660471510]})
+        # positions are saved by the flush thread instead of the tick
+        self.client.hset.assert_not_called()
+
+        time_keeper_manager.flush()
+        self.client.hset.assert_called_once_with(
+            TIME_KEEPER_KEY, mapping={"workflow1": 1660471510, "workflow2": 1660471510}
+        )
+
+    @mock.patch("diana.core.check.check_scheduler.time_keeper.time.time")
+    def test_restore_should_start_from_now_when_position_lags_without_catch_up(self, mock_time):
+        mock_time.return_value = 1660471500
+        self.client.hgetall.return_value = {"workflow1": "1660467900"}
+        time_keeper_manager._max_range = None
+
+        self.assertEqual(time_keeper_manager.restore_time_keepers({"workflow1": (60, None)}), 0)
+        mock_time.return_value = 1660471560
+        self.assertEqual(time_keeper_manager.get_time_range("workflow1"), [1660471500, 1660471560])
+
+    @mock.patch("diana.core.check.check_scheduler.time_keeper.time.time")
+    def test_restore_should_catch_up_lagging_position_with_catch_up(self, mock_time):
+        mock_time.return_value = 1660471500
+        self.client.hgetall.return_value = {"workflow1": "1660467900"}
+        time_keeper_manager._max_range = 3600
+
+        self.assertEqual(time_keeper_manager.restore_time_keepers({"workflow1": (60, None)}), 1)
+        mock_time.return_value = 1660471560
+        self.assertEqual(time_keeper_manager.get_time_range("workflow1"), [1660467900, 1660471500])
+
+    def test_delete_should_drop_pending_position(self):
+        time_keeper_manager.add_time_keeper("workflow1", 60)
+        time_keeper_manager.get_time_ranges(["workflow1"])
+        time_keeper_manager.delete_time_keeper("workflow1")
+
+        time_keeper_manager.flush()
+        self.client.hset.assert_not_called()
+        self.client.hdel.assert_called_with(TIME_KEEPER_KEY, "workflow1")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import threading
+import time
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from diana import conf
+from diana.core.check.consumer import Consumer, ConsumerManager
+
+ConsumerRecord = namedtuple("ConsumerRecord", ["value", "offset"], defaults=[0])
+
+
+class FakeConsumer(Consumer):
+    def __init__(self):
+        super().__init__("CHECK_TASK", "CHECK_TASK_GROUP_ID", {})
+        self.msgs = []
+
+    @staticmethod
+    def _create_consumer(topic, group_id, configuration):
+        # an idle consumer which doesn't need a broker
+        return mock.Mock(**{"poll.side_effect": lambda: time.sleep(0.01) or {}})
+
+    def _process_msgs(self, msg):
+        if msg == "bad":
+            raise ValueError(msg)
+        self.msgs.append(msg)
+
+
+class TestConsumer(unittest.TestCase):
+    def test_parse_data_should_retry_failed_msg_without_dead_letter_topic(self):
+        consumer = FakeConsumer()
+        data = {"partition": [ConsumerRecord("good", 4), ConsumerRecord("bad", 5), ConsumerRecord("good", 6)]}
+
+        with mock.patch.object(conf.configuration, "consumer", {}):
+            self.assertTrue(consumer._parse_data(data))
+        self.assertEqual(consumer.msgs, ["good", "good"])
+        self.assertEqual((consumer.processed, consumer.failed), (2, 1))
+        self.assertEqual(consumer._retry_offsets, {"partition": 5})
+
+    def test_parse_data_should_send_failed_msg_to_dead_letter_topic(self):
+        consumer = FakeConsumer()
+        data = {"partition": [ConsumerRecord("bad", 5)]}
+
+        with mock.patch.object(conf.configuration, "consumer", {"DEAD_LETTER_NAME": "CHECK_DEAD_LETTER"}), \
+                mock.patch("diana.core.check.consumer.producer_manager") as mock_producer:
+            mock_producer.send.return_value = True
+            self.assertTrue(consumer._parse_data(data))
+        mock_producer.send.assert_called_once_with(
+            "CHECK_DEAD_LETTER", {"topic": "CHECK_TASK", "msg": "bad", "error": "bad"}, wait=True
+        )
+        self.assertEqual(consumer._retry_offsets, {})
+
+    def test_parse_data_should_retry_failed_msg_when_dead_letter_is_not_delivered(self):
+        consumer = FakeConsumer()
+        data = {"partition": [ConsumerRecord("bad", 5)]}
+
+        with mock.patch.object(conf.configuration, "consumer", {"DEAD_LETTER_NAME": "CHECK_DEAD_LETTER"}), \
+                mock.patch("diana.core.check.consumer.producer_manager") as mock_producer:
+            mock_producer.send.return_value = False
+            consumer._parse_data(data)
+        self.assertEqual(consumer._retry_offsets, {"partition": 5})
+
+    def run_consumer(self, consumer, batches):
+        """
+        Run the loop of the consumer until the batches are polled
+        """
+        polls = iter(batches)
+
+        def poll():
+            try:
+                return next(polls)
+            except StopIteration:
+                consumer.stop_consumer()
+                return {}
+
+        consumer.consumer._consumer = mock.Mock(**{"highwater.return_value": None})
+        consumer._retry_backoff = 0
+        with mock.patch.object(consumer.consumer, "poll", side_effect=poll), mock.patch.object(
+            consumer.consumer, "commit"
+        ) as mock_commit:
+            consumer.run()
+        return mock_commit
+
+    def test_run_should_commit_once_per_batch(self):
+        consumer = FakeConsumer()
+        batches = [{"partition": [ConsumerRecord("1"), ConsumerRecord("2"), ConsumerRecord("3")]}, {}]
+        batches.append({"partition": [ConsumerRecord("4")]})
+
+        mock_commit = self.run_consumer(consumer, batches)
+        self.assertEqual(consumer.msgs, ["1", "2", "3", "4"])
+        self.assertEqual(mock_commit.call_count, 2)
+        health = consumer.health()
+        self.assertEqual((health["batches"], health["last_batch_size"], health["avg_batch_size"]), (2, 1, 2))
+        self.assertEqual(health["commits"], 2)
+
+    def test_run_should_commit_by_interval(self):
+        consumer = FakeConsumer()
+        consumer._commit_interval = 60
+        batches = [{"partition": [ConsumerRecord(str(index))]} for index in range(5)]
+
+        mock_commit = self.run_consumer(consumer, batches)
+        self.assertEqual(len(consumer.msgs), 5)
+        # the processed batches are committed when the consumer is idle
+        mock_commit.assert_called_once()
+
+    def test_run_should_seek_back_to_failed_msg_before_commit(self):
+        consumer = FakeConsumer()
+        batches = [{"partition": [ConsumerRecord("1", 0), ConsumerRecord("bad", 1), ConsumerRecord("2", 2)]}]
+
+        with mock.patch.object(conf.configuration, "consumer", {}):
+            mock_commit = self.run_consumer(consumer, batches)
+
+        consumer.consumer._consumer.seek.assert_called_once_with("partition", 1)
+        # the committed position is the failed msg, so it's polled again
+        self.assertEqual(mock_commit.call_count, 1)
+
+    def test_health_should_report_lag_of_partitions(self):
+        consumer = FakeConsumer()
+        consumer.consumer._consumer = mock.Mock()
+        consumer.consumer._consumer.highwater.side_effect = lambda partition: {"p0": 10, "p1": None}[partition]
+        consumer._record_batch({"p0": [ConsumerRecord("1", 6), ConsumerRecord("2", 7)], "p1": [ConsumerRecord("3", 1)]})
+
+        self.assertEqual(consumer.health()["lag"], 2)
+
+
+class TestConsumerManager(unittest.TestCase):
+    def test_run_should_return_after_stop(self):
+        consumers = [FakeConsumer(), FakeConsumer()]
+        manager = ConsumerManager(consumers, health_check_interval=0.01)
+        thread = threading.Thread(target=manager.run)
+        thread.start()
+        time.sleep(0.05)
+
+        self.assertTrue(all(health["alive"] for health in manager.health()))
+        manager.stop()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(any(consumer.is_alive() for consumer in consumers))
+
+    def test_check_health_should_replace_dead_consumer(self):
+        dead_consumer = FakeConsumer()
+        new_consumer = mock.Mock()
+        manager = ConsumerManager([dead_consumer], consumer_factory=lambda: new_consumer)
+
+        manager.check_health()
+        self.assertIs(manager.consumer_list[0], new_consumer)
+        new_consumer.start.assert_called_once()
+
+    def test_check_health_should_keep_dead_consumer_without_factory(self):
+        dead_consumer = FakeConsumer()
+        manager = ConsumerManager([dead_consumer])
+
+        manager.check_health()
+        self.assertIs(manager.consumer_list[0], dead_consumer)
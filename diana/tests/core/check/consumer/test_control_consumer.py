@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import unittest
+from unittest import mock
+
+from kafka import TopicPartition
+
+from diana.core.check.consumer.control_consumer import LatestConsumer
+
+CONFIGURATION = mock.Mock(consumer={"KAFKA_SERVER_LIST": "127.0.0.1:9092", "TIMEOUT_MS": 10, "MAX_RECORDS": 5})
+
+
+class TestLatestConsumer(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("diana.core.check.consumer.control_consumer.KafkaConsumer")
+        self.kafka_consumer = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_init_should_read_all_partitions_from_latest_offsets_without_group(self):
+        self.kafka_consumer.partitions_for_topic.return_value = {0, 1}
+        LatestConsumer("CHECK_CONTROL", CONFIGURATION)
+
+        partitions = [TopicPartition("CHECK_CONTROL", 0), TopicPartition("CHECK_CONTROL", 1)]
+        self.kafka_consumer.assign.assert_called_once_with(partitions)
+        self.kafka_consumer.seek_to_end.assert_called_once_with(*partitions)
+
+    def test_poll_should_assign_partitions_when_topic_is_created(self):
+        self.kafka_consumer.partitions_for_topic.side_effect = [None, {0}]
+        self.kafka_consumer.assignment.return_value = set()
+        consumer = LatestConsumer("CHECK_CONTROL", CONFIGURATION)
+
+        consumer.poll()
+        self.kafka_consumer.assign.assert_called_once_with([TopicPartition("CHECK_CONTROL", 0)])
+        self.kafka_consumer.poll.assert_called_once_with(timeout_ms=10, max_records=5)
@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import time
+import unittest
+from collections import namedtuple
+from concurrent.futures import Future
+from unittest import mock
+
+from vulcanus.restful.resp.state import DATABASE_QUERY_ERROR, SUCCEED
+
+from diana.core.check.consumer.pipeline import PipelineWorkflowConsumer, WorkflowPipeline
+
+ConsumerRecord = namedtuple("ConsumerRecord", ["value", "offset"], defaults=[0])
+
+
+class FakeWorkflow:
+    fetch_delay = 0
+
+    def __init__(self, username, workflow_id):
+        self.workflow_id = workflow_id
+
+    def load(self):
+        if self.workflow_id == "not_exist":
+            return DATABASE_QUERY_ERROR
+        return {"workflow": {}, "hosts": [], "domain": "domain1"}
+
+    def fetch_data(self, time_range, hosts, workflow, model_paths=None):
+        time.sleep(self.fetch_delay)
+        if self.workflow_id == "broken":
+            raise ValueError("broken")
+        return mock.Mock(model_paths={}), {"host1": {}}
+
+    def detect(self, app, data, time_range, workflow):
+        if self.workflow_id == "normal":
+            return SUCCEED
+        return {"host_result": {"host1": []}, "alert_name": "network abnormal"}
+
+    def save_result(self, network_monitor_data, workflow, time_range, kafka=False, storage=True):
+        return storage
+
+
+class TestWorkflowPipeline(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("diana.core.check.consumer.pipeline.Workflow", FakeWorkflow)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pipeline = WorkflowPipeline({"fetch": 4}, 8)
+        self.pipeline.start()
+        self.addCleanup(self.pipeline.stop)
+
+    def test_submit_should_return_same_result_as_execute(self):
+        futures = [
+            self.pipeline.submit("admin", "not_exist", [1660000000, 1660000060]),
+            self.pipeline.submit("admin", "normal", [1660000000, 1660000060]),
+            self.pipeline.submit("admin", "abnormal", [1660000000, 1660000060]),
+            self.pipeline.submit("admin", "abnormal", [1660000000, 1660000060], storage=False),
+        ]
+        self.assertEqual([future.result(1) for future in futures], [DATABASE_QUERY_ERROR, SUCCEED, True, False])
+
+    def test_submit_should_raise_error_of_stage(self):
+        future = self.pipeline.submit("admin", "broken", [1660000000, 1660000060])
+        self.assertRaises(ValueError, future.result, 1)
+
+    def test_fetch_of_workflows_should_overlap(self):
+        with mock.patch.object(FakeWorkflow, "fetch_delay", 0.2):
+            start = time.time()
+            futures = [self.pipeline.submit("admin", "abnormal", [1660000000, 1660000060]) for _ in range(4)]
+            self.assertEqual([future.result(2) for future in futures], [True] * 4)
+        self.assertLess(time.time() - start, 0.6)
+
+
+class TestPipelineWorkflowConsumer(unittest.TestCase):
+    def test_parse_data_should_finish_batch_before_it_is_committed(self):
+        pipeline = mock.Mock()
+        pipeline.submit.side_effect = lambda *args: executed_future(args[1])
+        consumer = PipelineWorkflowConsumer("CHECK_TASK", "CHECK_TASK_GROUP_ID", {}, pipeline)
+        msgs = [{"username": "admin", "workflow_id": workflow_id, "time_range": [1]} for workflow_id in ("1", "2")]
+        committable = consumer._parse_data({"partition": [ConsumerRecord(msg) for msg in msgs]})
+
+        self.assertTrue(committable)
+        self.assertEqual(pipeline.submit.call_count, 2)
+        self.assertEqual(consumer.processed, 2)
+
+    def test_parse_data_should_not_be_committed_when_pipeline_is_stopped(self):
+        pipeline = mock.Mock()
+        pipeline.submit.side_effect = lambda *args: executed_future(None, cancelled=True)
+        consumer = PipelineWorkflowConsumer("CHECK_TASK", "CHECK_TASK_GROUP_ID", {}, pipeline)
+        msg = {"username": "admin", "workflow_id": "1", "time_range": [1]}
+        self.assertFalse(consumer._parse_data({"partition": [ConsumerRecord(msg)]}))
+        self.assertFalse(consumer.running_flag)
+
+    def test_run_should_seek_back_batch_when_pipeline_is_stopped(self):
+        pipeline = mock.Mock()
+        pipeline.submit.side_effect = lambda *args: executed_future(None, cancelled=True)
+        consumer = PipelineWorkflowConsumer("CHECK_TASK", "CHECK_TASK_GROUP_ID", {}, pipeline)
+        consumer.consumer._consumer = mock.Mock(**{"highwater.return_value": None})
+        consumer._retry_backoff = 0
+        msg = {"username": "admin", "workflow_id": "1", "time_range": [1]}
+        batch = {"partition": [ConsumerRecord(msg, 3), ConsumerRecord(msg, 4)]}
+
+        with mock.patch.object(consumer.consumer, "poll", return_value=batch) as mock_poll, mock.patch.object(
+            consumer.consumer, "commit"
+        ):
+            consumer.run()
+
+        # the consumer stops, and its committed position is the first record of the batch
+        mock_poll.assert_called_once()
+        consumer.consumer._consumer.seek.assert_called_once_with("partition", 3)
+
+
+def executed_future(result, cancelled=False):
+    future = Future()
+    if cancelled:
+        future.cancel()
+    else:
+        future.set_result(result)
+    return future
@@ -13,6 +13,7 @@
 import unittest
 
 from diana.core.experiment.algorithm.single_item_check.nsigma import NSigma
+from diana.utils.time_series import TimeSeries
 
 
 class TestNSigma(unittest.TestCase):
@@ -36,3 +37,15 @@ class TestNSigma(unittest.TestCase):
         data = [[1,1],[2,1],[3,1],[4,1],[5,1],[6,1],[7,1],[8,1],[9,1],[10,1],[11,1],[12,1],[13,1],[14,1]]
         res = algorithm.calculate(data)
         self.assertEqual(res, [])
+
+    def test_calculate_should_return_error_data_when_input_is_time_series(self):
+        algorithm = NSigma(3)
+        data = TimeSeries.from_points([[1,1],[2,1],[3,1],[4,1],[5,1],[6,100],[7,100],[8,2000],[9,1],[10,1],[11,1],
+                                       [12,1],[13,1],[14,1]])
+        res = algorithm.calculate(data)
+        self.assertEqual(res, [[8, 2000]])
+
+    def test_calculate_should_return_empty_list_when_input_is_none(self):
+        algorithm = NSigma(3)
+        res = algorithm.calculate(None)
+        self.assertEqual(res, [])
@@ -11,6 +11,7 @@
 # See the Mulan PSL v2 for more details.
 # ******************************************************************************/
 import unittest
+from unittest.mock import Mock
 
 from diana.core.experiment.app import App
 
@@ -40,3 +41,22 @@ class TestApp(unittest.TestCase):
         app = App()
         app.load_models(model_info=mock_model_info, default_mode=True)
         self.assertEqual({}, app.model)
+
+    def test_aggregation_rules_should_skip_host_when_model_can_not_aggregate(self):
+        app = App()
+        app.model = {'intelligent': Mock(aggregation_rules={'metric1': {'label1': 'value1'}}),
+                     'ewma': object()}
+        rules = app.aggregation_rules({'host1': 'intelligent', 'host2': 'ewma', 'host3': 'unknown'})
+        self.assertDictEqual(rules, {'host1': {'metric1': {'label1': 'value1'}}})
+
+    def test_required_data_should_union_models_and_keep_max_lookback(self):
+        app = App()
+        app.model = {'model1': Mock(required_data={'metric1': 0, 'metric2': 60}),
+                     'model2': Mock(required_data={'metric2': 3600})}
+        self.assertDictEqual(app.required_data({'host1': 'model1', 'host2': 'model2'}),
+                             {'metric1': 0, 'metric2': 3600})
+
+    def test_required_data_should_return_none_when_any_model_does_not_declare(self):
+        app = App()
+        app.model = {'model1': Mock(required_data={'metric1': 0}), 'model2': object()}
+        self.assertIsNone(app.required_data({'host1': 'model1', 'host2': 'model2'}))
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from diana.core.experiment.app.mysql_network_diagnose import MysqlNetworkDiagnoseApp
+from diana.core.experiment.compute_pool import ComputeError, compute_pool, detect_host, pack_host_data
+from diana.utils.time_series import TimeSeries
+
+PATH_INFO = {"model_path": "", "algo_path": "algo.Model"}
+
+
+def done_future(result=None, exception=None):
+    future = Future()
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+    return future
+
+
+class TestComputePool(unittest.TestCase):
+    def test_pack_host_data_should_turn_points_into_time_series(self):
+        series = TimeSeries([1660000000], [2.0])
+        data = {"metric1": {"label1": [[1660000000, "1"], [1660000015, "3"]], "label2": series}}
+
+        packed = pack_host_data(data)
+        self.assertEqual(packed["metric1"]["label1"].timestamps.tolist(), [1660000000, 1660000015])
+        self.assertEqual(packed["metric1"]["label1"].values.tolist(), [1.0, 3.0])
+        self.assertIs(packed["metric1"]["label2"], series)
+
+    def test_detect_host_should_run_loaded_model(self):
+        model = mock.Mock()
+        model.calculate.return_value = {"item1": ["metric1"]}
+        with mock.patch("diana.core.experiment.compute_pool.load_model", return_value=model) as mock_load:
+            result = detect_host("model1", PATH_INFO, {"metric1": {}}, [1660000000, 1660000060])
+
+        self.assertEqual(result, {"item1": ["metric1"]})
+        mock_load.assert_called_once_with("model1", "", "algo.Model")
+        model.calculate.assert_called_once_with({"metric1": {}}, [1660000000, 1660000060])
+
+    def test_detect_host_should_raise_when_model_is_not_loaded(self):
+        with mock.patch("diana.core.experiment.compute_pool.load_model", return_value=None):
+            self.assertRaises(ComputeError, detect_host, "model1", PATH_INFO, {}, [1660000000, 1660000060])
+
+
+class TestComputePoolExecutor(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("_executor", None), ("_models", {})):
+            patcher = mock.patch.object(compute_pool, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("diana.core.experiment.compute_pool.ProcessPoolExecutor")
+        self.mock_executor = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_submit_should_recreate_pool_to_preload_new_model(self):
+        first, second = mock.Mock(), mock.Mock()
+        self.mock_executor.side_effect = [first, second]
+        compute_pool.submit("model1", PATH_INFO, {}, [1660000000, 1660000060])
+        compute_pool.submit("model1", PATH_INFO, {}, [1660000000, 1660000060])
+        self.assertEqual(self.mock_executor.call_count, 1)
+
+        model2_info = {"model_path": "", "algo_path": "algo.Model2"}
+        compute_pool.submit("model2", model2_info, {}, [1660000000, 1660000060])
+        self.assertEqual(self.mock_executor.call_args.kwargs["initargs"], ({"model1": PATH_INFO, "model2": model2_info},))
+        first.shutdown.assert_called_once_with(wait=False)
+        self.assertEqual(first.submit.call_count, 2)
+        second.submit.assert_called_once()
+
+    def test_submit_should_recreate_pool_when_it_is_shut_down(self):
+        first, second = mock.Mock(), mock.Mock()
+        first.submit.side_effect = RuntimeError("cannot schedule new futures after shutdown")
+        second.submit.return_value = done_future()
+        self.mock_executor.side_effect = [first, second]
+
+        future = compute_pool.submit("model1", PATH_INFO, {}, [1660000000, 1660000060])
+        self.assertIs(future, second.submit.return_value)
+        first.shutdown.assert_called_once_with(wait=False)
+
+
+class TestDoCheckInPool(unittest.TestCase):
+    def setUp(self):
+        self.app = MysqlNetworkDiagnoseApp()
+        self.model = mock.Mock()
+        self.model.calculate.return_value = {"item2": ["metric2"]}
+        self.app.model = {"model1": self.model}
+        self.app.model_paths = {"model1": PATH_INFO}
+        self.data = {"host1": {"metric1": {"label1": [[1660000000, 1.0]]}}, "host2": None}
+        patcher = mock.patch.object(compute_pool, "enabled", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_do_check_should_submit_hosts_to_pool(self):
+        with mock.patch.object(compute_pool, "submit", return_value=done_future({"item1": ["metric1"]})) as mock_submit:
+            result = self.app.do_check({"host1": "model1", "host2": "model1"}, self.data, [1660000000, 1660000060])
+
+        self.assertEqual(result, {"host1": {"item1": ["metric1"]}})
+        mock_submit.assert_called_once_with("model1", PATH_INFO, self.data["host1"], [1660000000, 1660000060])
+        self.model.calculate.assert_not_called()
+
+    def test_do_check_should_check_in_process_when_pool_is_broken(self):
+        with mock.patch.object(compute_pool, "submit", return_value=done_future(exception=BrokenProcessPool())):
+            result = self.app.do_check({"host1": "model1"}, self.data, [1660000000, 1660000060])
+
+        self.assertEqual(result, {"host1": {"item2": ["metric2"]}})
+        self.model.calculate.assert_called_once_with(self.data["host1"], [1660000000, 1660000060])
+
+    def test_do_check_should_check_in_process_when_pool_can_not_start(self):
+        error = RuntimeError("cannot schedule new futures after shutdown")
+        with mock.patch.object(compute_pool, "submit", side_effect=error):
+            result = self.app.do_check({"host1": "model1"}, self.data, [1660000000, 1660000060])
+
+        self.assertEqual(result, {"host1": {"item2": ["metric2"]}})
+        self.model.calculate.assert_called_once_with(self.data["host1"], [1660000000, 1660000060])
+
+    def test_do_check_should_raise_programming_error_of_submit(self):
+        with mock.patch.object(compute_pool, "submit", side_effect=TypeError("unexpected argument")):
+            self.assertRaises(TypeError, self.app.do_check, {"host1": "model1"}, self.data, [1660000000, 1660000060])
+        self.model.calculate.assert_not_called()
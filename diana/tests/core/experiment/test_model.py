@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from diana.core.experiment.model import load_model
+
+
+class Model:
+    def load(self, path):
+        self.path = path
+
+
+class TestLoadModel(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("diana.core.experiment.model.import_module", return_value=SimpleNamespace(Model=Model))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("diana.core.experiment.model._local", threading.local())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_model_should_reuse_model_in_same_thread(self):
+        model = load_model("model1", "path1", "module.Model")
+        self.assertIs(load_model("model1", "path1", "module.Model"), model)
+        self.assertEqual(model.path, "path1")
+
+    def test_load_model_should_drop_least_recently_used_model(self):
+        with mock.patch("diana.core.experiment.model.MODEL_CACHE_SIZE", 2):
+            model1 = load_model("model1", "path3", "module.Model")
+            model2 = load_model("model2", "path3", "module.Model")
+            self.assertIs(load_model("model1", "path3", "module.Model"), model1)
+            load_model("model3", "path3", "module.Model")
+
+            self.assertIs(load_model("model1", "path3", "module.Model"), model1)
+            self.assertIsNot(load_model("model2", "path3", "module.Model"), model2)
+
+    def test_load_model_should_load_separate_model_in_each_thread(self):
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(load_model("model2", "path2", "module.Model")))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(models), 2)
+        self.assertIsNot(models[0], models[1])
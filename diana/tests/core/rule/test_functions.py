@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import unittest
+
+from vulcanus.restful.resp.state import SUCCEED, PARTIAL_SUCCEED, DATABASE_QUERY_ERROR, NO_DATA
+from diana.core.rule.functions import group_by_lookback, merge_queried_data
+
+
+class TestGroupByLookback(unittest.TestCase):
+    def test_group_by_lookback_should_group_selectors_with_same_lookback(self):
+        required_data = {"metric1": 0, "metric2{cpu=\"0\"}": 3600, "metric3": 3600}
+        self.assertEqual(group_by_lookback(required_data), {0: ["metric1"], 3600: ["metric2{cpu=\"0\"}", "metric3"]})
+
+    def test_group_by_lookback_should_return_empty_when_nothing_required(self):
+        self.assertEqual(group_by_lookback({}), {})
+
+
+class TestMergeQueriedData(unittest.TestCase):
+    def test_merge_should_union_metrics_of_same_host(self):
+        results = [
+            (SUCCEED, {"id1": {"metric1": [[1, 1.0]]}, "id2": None}),
+            (SUCCEED, {"id1": {"metric2": [[1, 2.0]]}, "id2": {"metric2": [[1, 3.0]]}}),
+        ]
+        status, data = merge_queried_data(results)
+        self.assertEqual(status, SUCCEED)
+        self.assertEqual(
+            data, {"id1": {"metric1": [[1, 1.0]], "metric2": [[1, 2.0]]}, "id2": {"metric2": [[1, 3.0]]}}
+        )
+
+    def test_merge_should_keep_data_when_later_query_of_host_fails(self):
+        results = [(SUCCEED, {"id1": {"metric1": [[1, 1.0]]}}), (DATABASE_QUERY_ERROR, {"id1": None, "id2": None})]
+        status, data = merge_queried_data(results)
+        self.assertEqual(status, PARTIAL_SUCCEED)
+        self.assertEqual(data, {"id1": {"metric1": [[1, 1.0]]}, "id2": None})
+
+    def test_merge_should_return_error_when_all_queries_fail(self):
+        results = [(DATABASE_QUERY_ERROR, {"id1": None}), (NO_DATA, {"id1": None, "id2": None})]
+        status, data = merge_queried_data(results)
+        self.assertEqual(status, DATABASE_QUERY_ERROR)
+        self.assertEqual(data, {"id1": None, "id2": None})
+
+    def test_merge_should_return_partial_succeed_when_partial_query_is_mixed_with_failure(self):
+        results = [(PARTIAL_SUCCEED, {"id1": {"metric1": [[1, 1.0]]}, "id2": None}), (NO_DATA, {"id1": None})]
+        status, _ = merge_queried_data(results)
+        self.assertEqual(status, PARTIAL_SUCCEED)
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+import unittest
+from unittest import mock
+
+from vulcanus.restful.resp.state import DATABASE_QUERY_ERROR
+
+from diana.core.rule import workflow_cache as workflow_cache_module
+from diana.core.rule.workflow_cache import UPDATE, WorkflowCache, publish_workflow_change
+
+DEFINITION = {"workflow": {}, "hosts": [], "domain": "domain1", "model_paths": {}}
+
+
+class TestWorkflowCache(unittest.TestCase):
+    def test_get_should_load_definition_once(self):
+        cache = WorkflowCache(True, 10, 60)
+        loader = mock.Mock(return_value=DEFINITION)
+
+        self.assertEqual(cache.get("workflow1", loader), DEFINITION)
+        self.assertEqual(cache.get("workflow1", loader), DEFINITION)
+        loader.assert_called_once()
+
+    def test_get_should_return_copy_of_definition(self):
+        cache = WorkflowCache(True, 10, 60)
+        definition = cache.get("workflow1", mock.Mock(return_value={"workflow": {}, "hosts": []}))
+        definition["hosts"].append({"host_id": "host1"})
+
+        self.assertEqual(cache.get("workflow1", mock.Mock())["hosts"], [])
+
+    def test_get_should_not_cache_failure(self):
+        cache = WorkflowCache(True, 10, 60)
+        loader = mock.Mock(side_effect=[DATABASE_QUERY_ERROR, DEFINITION])
+
+        self.assertEqual(cache.get("workflow1", loader), DATABASE_QUERY_ERROR)
+        self.assertEqual(cache.get("workflow1", loader), DEFINITION)
+
+    def test_get_should_always_load_when_disabled(self):
+        cache = WorkflowCache(False, 10, 60)
+        loader = mock.Mock(return_value=DEFINITION)
+
+        cache.get("workflow1", loader)
+        cache.get("workflow1", loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_invalidate_should_reload_definition(self):
+        cache = WorkflowCache(True, 10, 60)
+        loader = mock.Mock(return_value=DEFINITION)
+        cache.get("workflow1", loader)
+        cache.get("workflow2", loader)
+
+        cache.invalidate("workflow1")
+        cache.get("workflow1", loader)
+        cache.get("workflow2", loader)
+        self.assertEqual(loader.call_count, 3)
+
+    def test_get_should_not_keep_definition_loaded_before_invalidation(self):
+        cache = WorkflowCache(True, 10, 60)
+
+        def loader():
+            # the workflow is updated while its old definition is being loaded
+            cache.invalidate("workflow1")
+            return DEFINITION
+
+        self.assertEqual(cache.get("workflow1", loader), DEFINITION)
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+class TestPublishWorkflowChange(unittest.TestCase):
+    def test_publish_should_invalidate_and_send_control_msg(self):
+        cache = WorkflowCache(True, 10, 60)
+        cache.get("workflow1", lambda: DEFINITION)
+        with mock.patch.object(workflow_cache_module, "workflow_cache", cache), mock.patch.object(
+            workflow_cache_module.producer_manager, "send", return_value=True
+        ) as mock_send:
+            self.assertTrue(publish_workflow_change("workflow1", UPDATE))
+
+        self.assertEqual(cache.stats()["size"], 0)
+        self.assertEqual(mock_send.call_args[0][1], {"workflow_id": "workflow1", "action": UPDATE})
+
+    def test_publish_should_send_change_when_cache_is_off(self):
+        cache = WorkflowCache(False, 10, 60)
+        with mock.patch.object(workflow_cache_module, "workflow_cache", cache), mock.patch.object(
+            workflow_cache_module.producer_manager, "send", return_value=True
+        ) as mock_send:
+            self.assertTrue(publish_workflow_change("workflow1", UPDATE))
+
+        self.assertEqual(mock_send.call_args[0][1], {"workflow_id": "workflow1", "action": UPDATE})
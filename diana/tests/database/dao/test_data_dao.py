@@ -15,12 +15,16 @@ Time: 2022-07-27
 Author: YangYunYi
 Description: Test Data dao
 """
+import io
 import unittest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
 from prometheus_api_client import PrometheusConnect, PrometheusApiClientException
 from vulcanus.restful.resp.state import SUCCEED, PARAM_ERROR, PARTIAL_SUCCEED
 from diana.database.dao.data_dao import DataDao
-from diana.conf import configuration
+from diana.utils.cache import TTLCache, SlidingWindowCache
+from diana.utils.fetch_coordinator import FetchCoordinator
+from diana.utils.stream_decode import stream_decode_available
+from diana.utils.time_series import TimeSeries
 
 test_cases = [
     # input 1: normal
@@ -269,7 +273,7 @@ class DataDaoTestcase(unittest.TestCase):
     def setUp(self) -> None:
         host = "127.0.0.1"
         port = 9200
-        self.dao = DataDao(configuration, host, port)
+        self.dao = DataDao(host, port)
         url = f"http://{host}:{port}"
         self.dao._prom = PrometheusConnect(url=url, disable_ssl=True)
         self.dao.connected = True
@@ -366,6 +370,243 @@ class DataDaoTestcase(unittest.TestCase):
         self.assertEqual(PARTIAL_SUCCEED, ret)
         self.assertDictEqual(data_list, query_ret[3])
 
+    def test_query_data_should_query_once_per_metric_when_batch_query(self):
+        self.dao.batch_query = True
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'gala_gopher_tcp_link_rx_bytes', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus', 'tgid': '1'}, 'value': [1658975590.796, '0']},
+            {'metric': {'__name__': 'gala_gopher_tcp_link_rx_bytes', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus', 'tgid': '2'}, 'value': [1658975590.796, '0']},
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock(side_effect=[
+            [{'metric': {'__name__': 'gala_gopher_tcp_link_rx_bytes', 'instance': '172.168.128.164:9100',
+                         'job': 'prometheus', 'tgid': '1'}, 'values': [[1658913069, '1']]},
+             {'metric': {'__name__': 'gala_gopher_tcp_link_rx_bytes', 'instance': '172.168.128.164:9100',
+                         'job': 'prometheus', 'tgid': '2'}, 'values': [[1658913069, '2']]}],
+            []])
+
+        ret, data_list = self.dao.query_data(test_cases[0]["time_range"],
+                                             test_cases[0]["host_list"])
+        self.assertEqual(PARTIAL_SUCCEED, ret)
+        self.assertEqual(2, self.dao._prom.custom_query_range.call_count)
+        self.assertDictEqual(data_list, {1: {
+            'gala_gopher_tcp_link_rx_bytes{instance="172.168.128.164:9100",tgid="1"}': [[1658913069, '1']],
+            'gala_gopher_tcp_link_rx_bytes{instance="172.168.128.164:9100",tgid="2"}': [[1658913069, '2']],
+            'up{instance="172.168.128.164:9100"}': None}})
+
+    def test_query_data_should_demultiplex_by_instance_when_multi_host_query(self):
+        self.dao.multi_host_query = True
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']},
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.165:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'values': [[1658913069, '1']]},
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.165:9100',
+                        'job': 'prometheus'}, 'values': [[1658913069, '0']]}])
+
+        ret, data_list = self.dao.query_data(test_cases[0]["time_range"],
+                                             [{"host_id": 1, "host_ip": "172.168.128.164", "instance_port": 9100},
+                                              {"host_id": 2, "host_ip": "172.168.128.165", "instance_port": 9100},
+                                              {"host_id": 3, "host_ip": "172.168.128.166", "instance_port": 9100}])
+        self.assertEqual(PARTIAL_SUCCEED, ret)
+        self.assertEqual(1, self.dao._prom.custom_query.call_count)
+        self.assertEqual(1, self.dao._prom.custom_query_range.call_count)
+        self.assertDictEqual(data_list, {
+            1: {'up{instance="172.168.128.164:9100"}': [[1658913069, '1']]},
+            2: {'up{instance="172.168.128.165:9100"}': [[1658913069, '0']]},
+            3: None})
+
+    def test_query_data_should_skip_discovery_when_series_cache_hit(self):
+        self.dao._prom.custom_query = MagicMock(
+            return_value=metric_list_ret[0])
+        self.dao._prom.custom_query_range = MagicMock(
+            side_effect=raw_data_ret[0] + raw_data_ret[0])
+
+        with patch('diana.database.dao.data_dao.series_cache', TTLCache(10, 60)) as cache:
+            self.dao.query_data(test_cases[0]["time_range"], test_cases[0]["host_list"])
+            ret, data_list = self.dao.query_data(test_cases[0]["time_range"],
+                                                 test_cases[0]["host_list"])
+            self.assertDictEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+        self.assertEqual(SUCCEED, ret)
+        self.assertEqual(1, self.dao._prom.custom_query.call_count)
+        self.assertDictEqual(data_list, query_ret[0])
+
+    def test_query_metric_list_of_host_should_use_series_endpoint_when_discovery_mode_is_series(self):
+        self.dao.discovery_mode = "series"
+        self.dao._prom.custom_query = MagicMock(return_value=metric_list_ret[0])
+        self.dao._prom._session.get = MagicMock(return_value=Mock(
+            status_code=200,
+            json=Mock(return_value={"status": "success",
+                                    "data": [item['metric'] for item in metric_list_ret[0]]})))
+
+        ret, metric_list = self.dao.query_metric_list_of_host("172.168.128.164", 9100)
+        self.assertEqual(SUCCEED, ret)
+        self.dao._prom.custom_query.assert_not_called()
+        self.assertEqual(self.dao._prom._session.get.call_args[1]["params"]["match[]"],
+                         '{instance="172.168.128.164:9100"}')
+        self.assertListEqual(metric_list, list(query_ret[0][1].keys()))
+
+    def test_query_data_should_only_fetch_new_samples_when_incremental(self):
+        self.dao.incremental_query = True
+        self.dao.query_range_step = "15s"
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock(side_effect=[
+            [{'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100', 'job': 'prometheus'},
+              'values': [[1000, '1'], [1015, '2'], [1030, '3']]}],
+            [{'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100', 'job': 'prometheus'},
+              'values': [[1015, '2'], [1030, '3'], [1045, '4']]}]])
+        host_list = [{"host_id": 1, "host_ip": "172.168.128.164", "instance_port": 9100}]
+
+        with patch('diana.database.dao.data_dao.window_cache', SlidingWindowCache(10)):
+            self.dao.query_data([1000, 1030], host_list, incremental=True)
+            ret, data_list = self.dao.query_data([1015, 1045], host_list, incremental=True)
+
+        self.assertEqual(SUCCEED, ret)
+        second_call = self.dao._prom.custom_query_range.call_args_list[1][1]
+        # samples of the last two steps of the first query are fetched again
+        self.assertEqual(second_call["start_time"].timestamp(), 1015)
+        self.assertDictEqual(data_list, {1: {'up{instance="172.168.128.164:9100"}': [
+            [1015, '2'], [1030, '3'], [1045, '4']]}})
+
+    def test_query_data_should_return_partial_succeed_when_incremental_fetch_fails(self):
+        self.dao.incremental_query = True
+        self.dao.query_range_step = "15s"
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock(side_effect=[
+            [{'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100', 'job': 'prometheus'},
+              'values': [[1000, '1'], [1015, '2'], [1030, '3'], [1045, '4'], [1060, '5']]}],
+            PrometheusApiClientException("query failed")])
+        host_list = [{"host_id": 1, "host_ip": "172.168.128.164", "instance_port": 9100}]
+
+        with patch('diana.database.dao.data_dao.window_cache', SlidingWindowCache(10)):
+            self.dao.query_data([1000, 1060], host_list, incremental=True)
+            ret, data_list = self.dao.query_data([1015, 1075], host_list, incremental=True)
+
+        # the cached samples are returned, but the window is not up to date
+        self.assertEqual(PARTIAL_SUCCEED, ret)
+        self.assertDictEqual(data_list, {1: {'up{instance="172.168.128.164:9100"}': [[1015, '2'], [1030, '3']]}})
+
+    def test_query_data_should_share_range_query_of_workflows_at_different_phases(self):
+        self.dao.query_range_step = "15s"
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100', 'job': 'prometheus'},
+             'values': [[1659998505, '1'], [1660000005, '2']]}])
+        host_list = [{"host_id": 1, "host_ip": "172.168.128.164", "instance_port": 9100}]
+
+        with patch('diana.database.dao.data_dao.fetch_coordinator', FetchCoordinator(True, 10, 30)):
+            # ticks of two workflows in the same step, the second one has a shorter lookback
+            self.dao.query_data([1659998506, 1660000006], host_list)
+            ret, data_list = self.dao.query_data([1659998530, 1660000014], host_list)
+
+        self.assertEqual(SUCCEED, ret)
+        self.assertEqual(1, self.dao._prom.custom_query_range.call_count)
+        query = self.dao._prom.custom_query_range.call_args[1]
+        self.assertEqual(query["start_time"].timestamp(), 1659998505)
+        self.assertEqual(query["end_time"].timestamp(), 1660000005)
+        self.assertDictEqual(data_list, {1: {'up{instance="172.168.128.164:9100"}': [[1660000005, '2']]}})
+
+    def test_query_data_should_return_time_series_when_columnar(self):
+        self.dao._prom.custom_query = MagicMock(
+            return_value=metric_list_ret[0])
+        self.dao._prom.custom_query_range = MagicMock(
+            side_effect=raw_data_ret[0])
+
+        ret, data_list = self.dao.query_data(test_cases[0]["time_range"],
+                                             test_cases[0]["host_list"], columnar=True)
+        self.assertEqual(SUCCEED, ret)
+        for series, values in data_list[1].items():
+            self.assertIsInstance(values, TimeSeries)
+            self.assertEqual(values, [[int(ts), float(value)] for ts, value in query_ret[0][1][series]])
+
+    def test_query_aggregated_data_should_sum_by_instance(self):
+        self.dao._prom.custom_query_range = MagicMock(return_value=[
+            {'metric': {'instance': '172.168.128.164:9100'}, 'values': [[1658913069, '3']]},
+            {'metric': {'instance': '172.168.128.165:9100'}, 'values': [[1658913069, '5']]}])
+
+        ret, data_list = self.dao.query_aggregated_data(
+            test_cases[0]["time_range"],
+            [{"host_id": 1, "host_ip": "172.168.128.164", "instance_port": 9100},
+             {"host_id": 2, "host_ip": "172.168.128.165", "instance_port": 9100}],
+            {"gala_gopher_tcp_link_rx_bytes": {"tgid": "1"}})
+        self.assertEqual(SUCCEED, ret)
+        self.assertEqual(self.dao._prom.custom_query_range.call_args[1]["query"],
+                         'sum by (instance) (gala_gopher_tcp_link_rx_bytes{tgid="1",'
+                         'instance=~"172\\\\.168\\\\.128\\\\.164:9100|172\\\\.168\\\\.128\\\\.165:9100"})')
+        self.assertDictEqual(data_list, {
+            1: {'gala_gopher_tcp_link_rx_bytes{instance="172.168.128.164:9100",tgid="1"}': [[1658913069, '3']]},
+            2: {'gala_gopher_tcp_link_rx_bytes{instance="172.168.128.165:9100",tgid="1"}': [[1658913069, '5']]}})
+
+    @unittest.skipUnless(stream_decode_available(), "ijson is not installed")
+    def test_query_data_should_decode_stream_when_stream_decode_and_columnar(self):
+        self.dao.batch_query = True
+        self.dao.stream_decode = True
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock()
+        body = b'{"status":"success","data":{"resultType":"matrix","result":[{"metric":{"__name__":"up",' \
+               b'"instance":"172.168.128.164:9100","job":"prometheus"},"values":[[1658913069,"1"]]}]}}'
+        response = MagicMock(status_code=200, raw=io.BytesIO(body))
+        response.__enter__.return_value = response
+        self.dao._prom._session.get = MagicMock(return_value=response)
+
+        ret, data_list = self.dao.query_data(test_cases[0]["time_range"],
+                                             test_cases[0]["host_list"], columnar=True)
+        self.assertEqual(SUCCEED, ret)
+        self.dao._prom.custom_query_range.assert_not_called()
+        self.assertEqual(self.dao._prom._session.get.call_args[1]["params"]["query"],
+                         'up{instance="172.168.128.164:9100"}')
+        self.assertEqual(data_list[1]['up{instance="172.168.128.164:9100"}'], [[1658913069, 1.0]])
+
+    def test_connect_should_share_pooled_client_between_daos(self):
+        first_dao = DataDao("127.0.0.1", 9090)
+        second_dao = DataDao("127.0.0.1", 9090)
+        self.assertTrue(first_dao.connect())
+        self.assertTrue(second_dao.connect())
+        self.assertIs(first_dao._prom, second_dao._prom)
+
+    def test_query_data_should_only_discover_required_series_when_metrics_given(self):
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100',
+                        'job': 'prometheus'}, 'values': [[1658913069, '1']]}])
+
+        ret, data_list = self.dao.query_data(test_cases[0]["time_range"], test_cases[0]["host_list"],
+                                             metrics=['up', 'node_load1{cpu="0"}'])
+        self.assertEqual(SUCCEED, ret)
+        self.assertEqual(self.dao._prom.custom_query.call_args[1]["query"],
+                         'up{instance="172.168.128.164:9100"} or node_load1{cpu="0",instance="172.168.128.164:9100"}')
+        self.assertDictEqual(data_list, {1: {'up{instance="172.168.128.164:9100"}': [[1658913069, '1']]}})
+
+    def test_query_metric_data_should_downsample_when_max_points_given(self):
+        self.dao._prom.custom_query = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100'}, 'value': [1658975590.796, '1']}])
+        self.dao._prom.custom_query_range = MagicMock(return_value=[
+            {'metric': {'__name__': 'up', 'instance': '172.168.128.164:9100'},
+             'values': [[1658913069 + 15 * i, str(i % 10)] for i in range(100)]}])
+
+        ret, res = self.dao.query_metric_data({
+            "time_range": [1658913069, 1658914569], "query_ip": "172.168.128.164",
+            "query_info": {"up": ['up{instance="172.168.128.164:9100"}']}, "max_points": 10})
+        self.assertEqual(SUCCEED, ret)
+        values = res["results"]["up"]['up{instance="172.168.128.164:9100"}']
+        self.assertEqual(len(values), 10)
+        self.assertEqual(values[0], [1658913069, '0'])
+        self.assertEqual(values[-1], [1658913069 + 15 * 99, '9'])
+
 
 if __name__ == '__main__':
     unittest.main()
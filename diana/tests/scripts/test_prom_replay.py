@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+
+from diana.utils.cache import TTLCache, SlidingWindowCache
+
+
+class TTLCacheTestcase(unittest.TestCase):
+    def test_get_should_return_value_when_not_expired(self):
+        cache = TTLCache(2, 60)
+        cache.set("a", [1])
+        self.assertEqual(cache.get("a"), [1])
+        self.assertIsNone(cache.get("b"))
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from vulcanus.restful.resp.state import SUCCEED
+from diana.database.dao.data_dao import DataDao
+
+# scripts is not a package, the script is loaded from its file
+_SCRIPT_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "scripts", "prom_replay.py")
+_spec = importlib.util.spec_from_file_location("prom_replay", _SCRIPT_PATH)
+prom_replay = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(prom_replay)
+
+INSTANCE = "172.168.128.164:9100"
+
+
+class TestParseSelector(unittest.TestCase):
+    def test_parse_selector_should_return_name_and_label_matchers(self):
+        matchers = prom_replay.parse_selector('metric1{instance=~"172\\\\.168\\\\..*",label1!="a", label2!~"b|c"}')
+        self.assertEqual(
+            matchers,
+            [("__name__", "=", "metric1"), ("instance", "=~", "172\\.168\\..*"), ("label1", "!=", "a"),
+             ("label2", "!~", "b|c")],
+        )
+
+    def test_parse_selector_should_unescape_quoted_value(self):
+        self.assertEqual(prom_replay.parse_selector('{label1="say \\"hi\\""}'), [("label1", "=", 'say "hi"')])
+
+    def test_parse_selector_should_raise_when_selector_is_not_supported(self):
+        for selector in ("", "rate(metric1[5m])", "metric1{label1=a}", "metric1{label1=>\"a\"}"):
+            self.assertRaises(prom_replay.QueryError, prom_replay.parse_selector, selector)
+
+    def test_split_or_should_keep_or_in_quoted_value(self):
+        self.assertEqual(
+            prom_replay.split_or('metric1{label1="a or b"} or metric2'), ['metric1{label1="a or b"}', "metric2"]
+        )
+
+    def test_series_should_match_regex_against_whole_value(self):
+        series = prom_replay.Series({"__name__": "metric1", "instance": INSTANCE}, [1658913000], ["1"])
+        self.assertTrue(series.matches(prom_replay.parse_selector('metric1{instance=~"172\\\\.168\\\\..*"}')))
+        self.assertFalse(series.matches(prom_replay.parse_selector('metric1{instance=~"172\\\\.168"}')))
+        self.assertFalse(series.matches(prom_replay.parse_selector('metric1{instance!~".*:9100"}')))
+
+    def test_parse_time_should_accept_timestamp_and_duration(self):
+        self.assertEqual(prom_replay.parse_time("1658913069.5"), 1658913069.5)
+        self.assertEqual(prom_replay.parse_time("1m30s"), 90)
+        self.assertRaises(prom_replay.QueryError, prom_replay.parse_time, "15x")
+
+
+class TestRecordAndServe(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def start_server(self, dataset):
+        server = prom_replay.create_server(dataset)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server.server_address[1]
+
+    def test_recorded_data_should_be_queried_by_data_dao_from_replay_server(self):
+        # series are discovered by instant queries at now, so the samples are recent
+        start = int(time.time()) // 15 * 15 - 120
+        timestamps = [start + 15 * index for index in range(9)]
+        source = prom_replay.Dataset([
+            prom_replay.Series({"__name__": "metric1", "instance": INSTANCE, "label1": "a"}, timestamps,
+                               [str(index) for index in range(9)]),
+            prom_replay.Series({"__name__": "metric2", "instance": INSTANCE}, timestamps, ["0.5"] * 9),
+            prom_replay.Series({"__name__": "metric1", "instance": "172.168.128.165:9100"}, timestamps, ["9"] * 9),
+        ])
+        # the source server stands for the prometheus which is recorded
+        source_port = self.start_server(source)
+        path = os.path.join(self.tmp_dir, "dataset.jsonl.gz")
+        recorded = prom_replay.record(
+            "http://127.0.0.1:%d" % source_port, ['{instance="%s"}' % INSTANCE], timestamps[0], timestamps[-1], "15s"
+        )
+        self.assertEqual(prom_replay.write_dataset(path, recorded), 2)
+
+        dataset = prom_replay.Dataset.load(path)
+        self.assertEqual(dataset.instances(), [INSTANCE])
+        data_dao = DataDao("127.0.0.1", self.start_server(dataset))
+        self.assertTrue(data_dao.connect())
+        ret, data = data_dao.query_data([start + 30, start + 90], prom_replay.host_list(dataset.instances()))
+
+        self.assertEqual(ret, SUCCEED)
+        self.assertEqual(
+            data,
+            {
+                "host0": {
+                    'metric1{instance="%s",label1="a"}' % INSTANCE: [[start + 15 * index, str(index)]
+                                                                     for index in range(2, 7)],
+                    'metric2{instance="%s"}' % INSTANCE: [[start + 15 * index, "0.5"] for index in range(2, 7)],
+                }
+            },
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch
+
+from diana.utils.cache import TTLCache, SlidingWindowCache
+
+
+class TTLCacheTestcase(unittest.TestCase):
+    def test_get_should_return_value_when_not_expired(self):
+        cache = TTLCache(2, 60)
+        cache.set("a", [1])
+        self.assertEqual(cache.get("a"), [1])
+        self.assertIsNone(cache.get("b"))
+        self.assertDictEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    def test_get_should_return_none_when_expired(self):
+        cache = TTLCache(2, 60)
+        with patch("diana.utils.cache.time.monotonic", return_value=100):
+            cache.set("a", [1])
+        with patch("diana.utils.cache.time.monotonic", return_value=161):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_set_should_evict_least_recently_used_when_full(self):
+        cache = TTLCache(2, 60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_cache_should_be_disabled_when_ttl_is_zero(self):
+        cache = TTLCache(2, 0)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertDictEqual(cache.stats(), {"hits": 0, "misses": 0, "size": 0})
+
+
+class SlidingWindowCacheTestcase(unittest.TestCase):
+    def test_fetch_start_should_follow_last_settled_sample_when_window_covers_start(self):
+        cache = SlidingWindowCache(2)
+        self.assertEqual(cache.fetch_start("a", 1000, 15), 1000)
+        cache.update("a", [1000, 1060], [[1000, "1"], [1015, "2"], [1030, "3"], [1045, "4"], [1060, "5"]], 15)
+        # samples of the last two steps are fetched again
+        self.assertEqual(cache.fetch_start("a", 1015, 15), 1045)
+        self.assertEqual(cache.fetch_start("a", 900, 15), 900)
+
+    def test_update_should_slide_window_when_newer_samples_appended(self):
+        cache = SlidingWindowCache(2)
+        cache.update("a", [1000, 1030], [[1000, "1"], [1015, "2"], [1030, "3"]], 15)
+        points = cache.update("a", [1015, 1045], [[1015, "2"], [1030, "3"], [1045, "4"]], 15)
+        self.assertListEqual(points, [[1015, "2"], [1030, "3"], [1045, "4"]])
+        self.assertEqual(cache.fetch_start("a", 1000, 15), 1000)
+
+    def test_update_should_not_cache_unsettled_samples(self):
+        cache = SlidingWindowCache(2)
+        points = cache.update("a", [1000, 1030], [[1000, "1"], [1015, "2"], [1030, "2"]], 15)
+        self.assertListEqual(points, [[1000, "1"], [1015, "2"], [1030, "2"]])
+
+        # the sample at 1030 was a stale lookback value, the refetched one replaces it
+        points = cache.update("a", [1000, 1060], [[1015, "2"], [1030, "3"], [1045, "4"], [1060, "5"]], 15)
+        self.assertListEqual(points, [[1000, "1"], [1015, "2"], [1030, "3"], [1045, "4"], [1060, "5"]])
+
+    def test_update_should_evict_least_recently_used_when_full(self):
+        cache = SlidingWindowCache(1)
+        cache.update("a", [1000, 1030], [[1000, "1"]], 15)
+        cache.update("b", [1000, 1030], [[1000, "1"]], 15)
+        self.assertEqual(cache.fetch_start("a", 1000, 15), 1000)
+        self.assertEqual(cache.fetch_start("b", 1000, 15), 1015)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from diana.utils.downsample import downsample, lttb_indices, min_max_indices
+from diana.utils.time_series import TimeSeries
+
+
+class DownsampleTestcase(unittest.TestCase):
+    def test_lttb_should_keep_first_last_and_peaks(self):
+        timestamps = np.arange(12)
+        values = np.array([0, 1, 0, 9, 0, 1, 0, 1, -9, 1, 0, 0], dtype=np.float64)
+        indices = lttb_indices(timestamps, values, 6)
+        self.assertEqual(len(indices), 6)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 11)
+        self.assertIn(3, indices)
+        self.assertIn(8, indices)
+
+    def test_min_max_should_keep_extremes_of_every_bucket(self):
+        values = np.array([5, 1, 9, 3, 3, 7, 2, 8], dtype=np.float64)
+        self.assertEqual(min_max_indices(values, 4).tolist(), [1, 2, 6, 7])
+
+    def test_downsample_should_keep_format_of_points(self):
+        points = [[1658913069 + 15 * i, str(i % 7)] for i in range(100)]
+        result = downsample(points, 20)
+        self.assertEqual(len(result), 20)
+        self.assertTrue(all(point in points for point in result))
+
+        series = downsample(TimeSeries.from_points(points), 20, "min_max")
+        self.assertIsInstance(series, TimeSeries)
+        self.assertLessEqual(len(series), 20)
+
+    def test_downsample_should_return_points_when_they_are_few(self):
+        points = [[1658913069, '1'], [1658913084, '2']]
+        self.assertIs(downsample(points, 10), points)
+        self.assertIsNone(downsample(None, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import threading
+import unittest
+from unittest import mock
+
+from diana.utils.fetch_coordinator import FetchCoordinator, slice_matrix
+from diana.utils.time_series import TimeSeries
+
+
+class FetchCoordinatorTestcase(unittest.TestCase):
+    def test_fetch_should_merge_concurrent_queries_of_same_key(self):
+        coordinator = FetchCoordinator(True, 0, 0)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return [{"metric": {}, "values": [[1, "1"]]}]
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(coordinator.fetch("key", loader)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(coordinator.fetch("key", loader))) for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        while coordinator.shared < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_fetch_should_raise_error_and_not_keep_it(self):
+        coordinator = FetchCoordinator(True, 10, 30)
+
+        def loader():
+            raise ValueError("query failed")
+
+        self.assertRaises(ValueError, coordinator.fetch, "key", loader)
+        self.assertEqual(coordinator.fetch("key", lambda: []), [])
+
+    def test_fetch_should_serve_recent_result(self):
+        coordinator = FetchCoordinator(True, 10, 30)
+        self.assertEqual(coordinator.fetch("key", lambda: [1]), [1])
+        self.assertEqual(coordinator.fetch("key", lambda: [2]), [1])
+        self.assertEqual(coordinator.fetch("other", lambda: [3]), [3])
+        self.assertEqual(coordinator.stats()["hits"], 1)
+
+        coordinator.invalidate()
+        self.assertEqual(coordinator.fetch("key", lambda: [2]), [2])
+
+    def test_fetch_range_should_cut_result_of_covering_range(self):
+        coordinator = FetchCoordinator(True, 10, 30)
+        loader = mock.Mock(return_value=[{"metric": {}, "values": [[990, "1"], [1005, "2"], [1020, "3"]]}])
+
+        coordinator.fetch_range("key", [990, 1020], loader, slice_matrix)
+        result = coordinator.fetch_range("key", [1005, 1020], loader, slice_matrix)
+        self.assertEqual(result, [{"metric": {}, "values": [[1005, "2"], [1020, "3"]]}])
+        loader.assert_called_once_with([990, 1020])
+
+        coordinator.fetch_range("key", [1005, 1035], loader, slice_matrix)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_slice_matrix_should_cut_time_series(self):
+        result = [{"metric": {}, "values": TimeSeries([990, 1005, 1020], [1.0, 2.0, 3.0])}, {"metric": {}}]
+        self.assertEqual(slice_matrix(result, [1000, 1010]), [{"metric": {}, "values": [[1005, 2.0]]}, {"metric": {}}])
+
+    def test_fetch_should_always_load_when_disabled(self):
+        coordinator = FetchCoordinator(False, 10, 30)
+        self.assertEqual(coordinator.fetch("key", lambda: [1]), [1])
+        self.assertEqual(coordinator.fetch("key", lambda: [2]), [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
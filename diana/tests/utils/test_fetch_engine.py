@@ -0,0 +1,33 @@
+import threading
+import unittest
+
+from diana.utils.fetch_engine import fetch_engine
+
+
+class FetchEngineTestcase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.max_workers = fetch_engine._max_workers
+        fetch_engine._max_workers = 4
+
+    def tearDown(self) -> None:
+        fetch_engine.shutdown()
+        fetch_engine._max_workers = self.max_workers
+
+    def test_map_should_keep_order_of_items(self):
+        self.assertEqual(fetch_engine.map(lambda x: x * 2, range(20)), [x * 2 for x in range(20)])
+
+    def test_map_should_run_serially_when_called_inside_worker(self):
+        def outer(item):
+            return fetch_engine.map(lambda x: threading.current_thread().name, range(3))
+
+        for thread_names in fetch_engine.map(outer, range(8)):
+            self.assertEqual(len(set(thread_names)), 1)
+
+    def test_map_should_run_on_caller_thread_when_concurrency_is_one(self):
+        fetch_engine._max_workers = 1
+        caller = threading.current_thread().name
+        self.assertEqual(fetch_engine.map(lambda x: threading.current_thread().name, range(3)), [caller] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
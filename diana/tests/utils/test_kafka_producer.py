@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+
+from kafka.errors import KafkaTimeoutError, KafkaConnectionError
+from kafka.future import Future
+
+from diana.utils.kafka_producer import producer_manager
+
+
+class ProducerManagerTestcase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pooled = producer_manager._pooled
+        producer_manager._pooled = True
+        producer_manager.close()
+        self.producer = mock.Mock()
+        self.futures = []
+        self.producer.send.side_effect = lambda topic, value: self.futures.append(Future()) or self.futures[-1]
+
+    def tearDown(self) -> None:
+        producer_manager.close()
+        producer_manager._pooled = self.pooled
+
+    def test_send_should_reuse_producer_of_topic(self):
+        with mock.patch.object(producer_manager, "_create_producer", return_value=self.producer) as create:
+            self.assertTrue(producer_manager.send("CHECK_TASK", {"workflow_id": "1"}))
+            self.assertTrue(producer_manager.send("CHECK_TASK", {"workflow_id": "2"}))
+        create.assert_called_once()
+        self.assertEqual(self.producer.send.call_count, 2)
+
+    def test_stats_should_count_pending_and_delivered_msgs(self):
+        with mock.patch.object(producer_manager, "_create_producer", return_value=self.producer):
+            before = producer_manager.stats()
+            producer_manager.send("CHECK_TASK", {"workflow_id": "1"})
+            producer_manager.send("CHECK_TASK", {"workflow_id": "2"})
+            self.assertEqual(producer_manager.stats()["pending"], before["pending"] + 2)
+
+            self.futures[0].success(None)
+            self.futures[1].failure(KafkaTimeoutError())
+        stats = producer_manager.stats()
+        self.assertEqual(stats["pending"], before["pending"])
+        self.assertEqual(stats["sent"], before["sent"] + 1)
+        self.assertEqual(stats["failed"], before["failed"] + 1)
+
+    def test_send_should_return_false_when_producer_can_not_be_created(self):
+        with mock.patch.object(producer_manager, "_create_producer", side_effect=KafkaConnectionError()):
+            self.assertFalse(producer_manager.send("CHECK_TASK", {"workflow_id": "1"}))
+
+    def test_send_should_return_false_when_waited_msg_is_not_delivered(self):
+        future = mock.Mock()
+        future.get.side_effect = KafkaTimeoutError()
+        self.producer.send.side_effect = None
+        self.producer.send.return_value = future
+        with mock.patch.object(producer_manager, "_create_producer", return_value=self.producer):
+            self.assertFalse(producer_manager.send("CHECK_DEAD_LETTER", {"workflow_id": "1"}, wait=True))
+        future.get.assert_called_once()
+
+    def test_close_should_close_producers(self):
+        with mock.patch.object(producer_manager, "_create_producer", return_value=self.producer):
+            producer_manager.send("CHECK_TASK", {"workflow_id": "1"})
+        producer_manager.close()
+        self.producer.close.assert_called_once()
+        self.assertEqual(producer_manager.stats()["producers"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from diana.utils.prom_client import prom_client_pool
+
+
+class PromClientPoolTestcase(unittest.TestCase):
+    def setUp(self) -> None:
+        # the pool is shared by the process, clients created by other tests are dropped
+        prom_client_pool.close()
+
+    def tearDown(self) -> None:
+        prom_client_pool.close()
+
+    def test_get_client_should_return_same_client_when_url_is_same(self):
+        client = prom_client_pool.get_client("http://127.0.0.1:9090")
+        self.assertIs(client, prom_client_pool.get_client("http://127.0.0.1:9090"))
+        self.assertIsNot(client, prom_client_pool.get_client("http://127.0.0.2:9090"))
+        self.assertEqual(prom_client_pool.stats()["clients"], 2)
+
+    def test_get_client_should_use_pooled_adapter_and_gzip(self):
+        client = prom_client_pool.get_client("http://127.0.0.1:9090")
+        adapter = client._session.get_adapter("http://127.0.0.1:9090/api/v1/query_range")
+        self.assertEqual(adapter._pool_maxsize, prom_client_pool.stats()["pool_maxsize"])
+        self.assertEqual(self.request_encoding(client), "gzip, deflate")
+
+    def test_get_client_should_ask_for_identity_when_compression_is_off(self):
+        with mock.patch.object(prom_client_pool, "_compression", False):
+            client = prom_client_pool.get_client("http://127.0.0.1:9090")
+        self.assertEqual(self.request_encoding(client), "identity")
+
+    @staticmethod
+    def request_encoding(client) -> str:
+        """
+        Accept-Encoding of a request sent by the session of the client
+        """
+        request = requests.Request("GET", "http://127.0.0.1:9090/api/v1/query", headers=client.headers)
+        return client._session.prepare_request(request).headers["Accept-Encoding"]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from unittest import mock
+
+from diana.utils.stats_reporter import StatsReporter
+
+
+class TestStatsReporter(unittest.TestCase):
+    def test_report_should_log_every_source(self):
+        reporter = StatsReporter(60)
+        reporter.register("cache", lambda: {"hits": 1})
+        reporter.register("broken", mock.Mock(side_effect=ValueError("broken")))
+        reporter.register("producer", lambda: {"sent": 2})
+
+        with mock.patch("diana.utils.stats_reporter.LOGGER") as mock_logger:
+            reporter.report()
+
+        mock_logger.info.assert_has_calls(
+            [mock.call("%s stats: %s", "cache", {"hits": 1}), mock.call("%s stats: %s", "producer", {"sent": 2})]
+        )
+        mock_logger.error.assert_called_once()
+
+    def test_start_should_do_nothing_when_interval_is_not_positive(self):
+        reporter = StatsReporter(0)
+        reporter.start()
+
+        self.assertIsNone(reporter._thread)
+
+    def test_stop_should_end_reporting_thread(self):
+        reporter = StatsReporter(60)
+        reporter.start()
+        reporter.stop()
+
+        self.assertIsNone(reporter._thread)
@@ -0,0 +1,31 @@
+import io
+import json
+import unittest
+
+from diana.utils.stream_decode import decode_matrix, StreamDecodeError, stream_decode_available
+
+
+@unittest.skipUnless(stream_decode_available(), "ijson is not installed")
+class DecodeMatrixTestcase(unittest.TestCase):
+    def test_decode_matrix_should_return_time_series_when_response_is_matrix(self):
+        body = {"status": "success", "data": {"resultType": "matrix", "result": [
+            {"metric": {"__name__": "up", "instance": "172.168.128.164:9100"},
+             "values": [[1658913069, "1"], [1658913084, "0"], [1658913099, "1"]]},
+            {"metric": {"__name__": "up", "instance": "172.168.128.165:9100"}, "values": []}]}}
+
+        result = decode_matrix(io.BytesIO(json.dumps(body).encode()), 2)
+        self.assertEqual(len(result), 2)
+        self.assertDictEqual(result[0]["metric"], {"__name__": "up", "instance": "172.168.128.164:9100"})
+        self.assertEqual(result[0]["values"], [[1658913069, 1.0], [1658913084, 0.0], [1658913099, 1.0]])
+        self.assertEqual(len(result[1]["values"]), 0)
+
+    def test_decode_matrix_should_raise_when_status_is_error(self):
+        body = {"status": "error", "errorType": "bad_data", "error": "parse error"}
+        self.assertRaises(StreamDecodeError, decode_matrix, io.BytesIO(json.dumps(body).encode()), 2)
+
+    def test_decode_matrix_should_raise_when_json_is_truncated(self):
+        self.assertRaises(StreamDecodeError, decode_matrix, io.BytesIO(b'{"status": "success", "data": {'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+
+from diana.utils.time_series import TimeSeries
+
+
+class TimeSeriesTestcase(unittest.TestCase):
+    def test_from_points_should_convert_str_values_when_input_is_legacy_list(self):
+        series = TimeSeries.from_points([[1658913069.5, '1'], [1658913084.5, '2.5']])
+        self.assertEqual(series.timestamps.dtype, np.int64)
+        self.assertEqual(series.values.dtype, np.float64)
+        self.assertListEqual(series.to_list(), [[1658913069, 1.0], [1658913084, 2.5]])
+        self.assertEqual(series, [[1658913069, 1.0], [1658913084, 2.5]])
+
+    def test_series_should_behave_like_list_when_iterated_or_indexed(self):
+        series = TimeSeries([1, 2, 3], [1.0, 2.0, 3.0])
+        self.assertEqual(len(series), 3)
+        self.assertListEqual(series[1], [2, 2.0])
+        self.assertListEqual([point[0] for point in series], [1, 2, 3])
+        self.assertEqual(series[1:], TimeSeries([2, 3], [2.0, 3.0]))
+
+    def test_merge_should_sum_or_average_by_timestamp(self):
+        series_list = [TimeSeries([1, 2], [1.0, 1.0]), TimeSeries([2, 3], [2.0, 3.0])]
+        self.assertListEqual(TimeSeries.merge(series_list, "sum").to_list(), [[1, 1.0], [2, 3.0], [3, 3.0]])
+        self.assertListEqual(TimeSeries.merge(series_list, "avg").to_list(), [[1, 1.0], [2, 1.5], [3, 3.0]])
+
+    def test_start_index_should_return_minus_one_when_all_before_start(self):
+        series = TimeSeries([10, 20, 30], [1.0, 2.0, 3.0])
+        self.assertEqual(series.start_index(15), 1)
+        self.assertEqual(series.start_index(20), 1)
+        self.assertEqual(series.start_index(31), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -37,6 +37,9 @@ from diana.conf.constant import (
     CHECK_RESULT_CONFIRM,
     QUERY_DOMAIN_COUNT,
     DOWNLOAD_HOST_CHECK_RESULT,
+    QUERY_METRIC_NAMES,
+    QUERY_METRIC_DATA,
+    QUERY_METRIC_LIST,
 )
 from diana.controllers import (
     app_controller,
@@ -45,6 +48,7 @@ from diana.controllers import (
     model_controller,
     algorithm_controller,
     result_controller,
+    metric_controller,
 )
 
 URLS = []
@@ -79,6 +83,11 @@ SPECIFIC_URLS = {
         (result_controller.QueryDomainResultCount, QUERY_DOMAIN_COUNT),
         (result_controller.DownloadAlertReport, DOWNLOAD_HOST_CHECK_RESULT),
     ],
+    'METRIC': [
+        (metric_controller.QueryHostMetricNames, QUERY_METRIC_NAMES),
+        (metric_controller.QueryHostMetricData, QUERY_METRIC_DATA),
+        (metric_controller.QueryHostMetricList, QUERY_METRIC_LIST),
+    ],
 }
 
 for _, value in SPECIFIC_URLS.items():
@@ -0,0 +1,230 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: in-process caches
+"""
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional
+
+# samples of the last steps of a query may still change while prometheus ingestion lags, e.g.
+# the sample at the end is a lookback of an older one, so they are fetched again by the next query
+UNSETTLED_STEPS = 2
+
+
+class TTLCache:
+    """
+    Thread safe cache whose items expire after ttl seconds, the least recently used item is
+    evicted when the cache is full.
+
+    Attributes:
+        hits (int): number of get which found a valid item
+        misses (int): number of get which found nothing or an expired item
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        """
+        Constructor
+        Args:
+            maxsize: max item number, the cache is disabled when it's not positive
+            ttl: seconds an item stays valid, the cache is disabled when it's not positive
+        """
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._maxsize > 0 and self._ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a valid item
+        Args:
+            key: item key
+
+        Returns:
+            item value, None if not found or expired
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._data.pop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Set an item, evict the least recently used item if the cache is full
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drop an item, or all items when key is None
+        """
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: e.g. {"hits": 10, "misses": 2, "size": 2}
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class _Window:
+    """
+    Samples of one series, ordered by timestamp
+    """
+
+    __slots__ = ("start", "retention", "points")
+
+    def __init__(self, start: int, retention: int):
+        self.start = start
+        self.retention = retention
+        self.points = deque()
+
+
+class SlidingWindowCache:
+    """
+    Thread safe cache of recently queried samples of series. Each series keeps a window of
+    samples which slides forward as newer samples are appended, so that a caller querying a
+    moving time range only needs to fetch the samples after the last cached one. Samples of the
+    last UNSETTLED_STEPS steps of a query are returned but not cached.
+
+    The least recently used window is evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        Constructor
+        Args:
+            maxsize: max window number, the cache is disabled when it's not positive
+        """
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._maxsize > 0
+
+    def fetch_start(self, key: Hashable, start: int, step: int) -> int:
+        """
+        Get the time from which samples need to be fetched
+        Args:
+            key: window key
+            start: start of the time range to query
+            step: query range step in seconds
+
+        Returns:
+            int: start if the window does not cover the start of the time range, otherwise the
+                time of the next sample after the last cached one
+        """
+        if not self.enabled:
+            return start
+        with self._lock:
+            window = self._data.get(key)
+            if window is None or window.start > start or not window.points:
+                self.misses += 1
+                return start
+            self.hits += 1
+            return max(start, int(window.points[-1][0]) + step)
+
+    def update(self, key: Hashable, time_range: List[int], points: List[list], step: int) -> List[list]:
+        """
+        Append samples newer than the cached ones to the window, drop the samples which slid out
+        Args:
+            key: window key
+            time_range: time range of the query
+            points: samples fetched, e.g. [[1658913305, "1.0"], [1658913320, "2.0"]]
+            step: query range step in seconds
+
+        Returns:
+            list: samples of the window in the time range
+        """
+        if not self.enabled:
+            return list(points)
+        start, end = time_range
+        settled_end = end - UNSETTLED_STEPS * step
+        with self._lock:
+            window = self._data.get(key)
+            if window is None or window.start > start:
+                window = _Window(start, end - start)
+                self._data[key] = window
+            window.retention = max(window.retention, end - start)
+            self._data.move_to_end(key)
+
+            last = window.points[-1][0] if window.points else None
+            unsettled = []
+            for point in points:
+                if last is not None and point[0] <= last:
+                    continue
+                if point[0] > settled_end:
+                    unsettled.append(list(point))
+                    continue
+                window.points.append(point)
+                last = point[0]
+
+            window.start = max(window.start, end - window.retention)
+            while window.points and window.points[0][0] < window.start:
+                window.points.popleft()
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+            settled = [list(point) for point in window.points if start <= point[0] <= end]
+            return settled + [point for point in unsettled if start <= point[0] <= end]
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drop a window, or all windows when key is None
+        """
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: e.g. {"hits": 10, "misses": 2, "size": 2}
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
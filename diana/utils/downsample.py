@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: downsample time series for charts
+"""
+from typing import List, Union
+
+import numpy as np
+
+from diana.utils.time_series import TimeSeries
+
+LTTB = "lttb"
+MIN_MAX = "min_max"
+
+
+def lttb_indices(timestamps: np.ndarray, values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets, keep the first and last point and, from each bucket between them,
+    the point forming the largest triangle with the point kept from the previous bucket and the
+    average of the next bucket. The choice of a bucket depends on the previous one, so buckets are
+    walked in order, while the points of a bucket are evaluated together.
+    Args:
+        timestamps: ascending timestamps
+        values: values, same length as timestamps
+        max_points: number of points to keep, at least 3
+
+    Returns:
+        np.ndarray: ascending indices of the points kept
+    """
+    size = len(timestamps)
+    if max_points >= size or max_points < 3:
+        return np.arange(size)
+
+    x = timestamps.astype(np.float64)
+    y = values.astype(np.float64)
+    # bucket i covers [edges[i], edges[i + 1]) of the points between the first and the last
+    edges = np.floor(np.linspace(1, size - 1, max_points - 1)).astype(np.int64)
+    # average point of every bucket, the last point is the "next bucket" of the last bucket
+    sums_x = np.add.reduceat(x[1:-1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:-1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # doubled triangle areas of the points of the bucket
+        areas = np.abs(
+            (x[previous] - avg_x[bucket + 1]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y[bucket + 1] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def min_max_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Split points into max_points / 2 buckets and keep the minimum and the maximum of each bucket
+    Args:
+        values: values ordered by timestamp
+        max_points: number of points to keep, at least 2
+
+    Returns:
+        np.ndarray: ascending indices of the points kept
+    """
+    size = len(values)
+    if max_points >= size or max_points < 2:
+        return np.arange(size)
+
+    buckets = np.arange(size) * (max_points // 2) // size
+    # sorted by bucket then value, the first point of a bucket is its minimum and the last one its maximum
+    order = np.lexsort((values, buckets))
+    sorted_buckets = buckets[order]
+    boundaries = np.flatnonzero(np.diff(sorted_buckets)) + 1
+    firsts = np.concatenate(([0], boundaries))
+    lasts = np.concatenate((boundaries - 1, [size - 1]))
+    return np.unique(np.concatenate((order[firsts], order[lasts])))
+
+
+def downsample(points: Union[TimeSeries, List[list]], max_points: int, method: str = LTTB):
+    """
+    Reduce the points of a series to at most max_points, only existing points are kept, so the
+    result has the same format as the input.
+    Args:
+        points: TimeSeries or list like [[1658913069, '1'], [1658913084, '2']]
+        max_points: max number of points
+        method: 'lttb' keeps the visual shape, 'min_max' keeps the extremes of every bucket
+
+    Returns:
+        TimeSeries or list: same type as points
+    """
+    if points is None or len(points) <= max_points:
+        return points
+    series = TimeSeries.from_points(points)
+    if method == MIN_MAX:
+        indices = min_max_indices(series.values, max_points)
+    else:
+        indices = lttb_indices(series.timestamps, series.values, max_points)
+    if isinstance(points, TimeSeries):
+        return points[indices]
+    return [points[index] for index in indices.tolist()]
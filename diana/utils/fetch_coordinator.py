@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: deduplicate prometheus queries of workflows sharing hosts
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from diana.conf import configuration
+from diana.utils.cache import TTLCache
+from diana.utils.time_series import TimeSeries
+
+# recent time ranges kept for a query key, newer ranges replace the older ones
+RANGES_PER_KEY = 4
+
+
+class FetchCoordinator:
+    """
+    Merge identical queries issued by workflows at the same time into one in-flight query, and
+    fan the result out to all callers waiting for it. Results of recently finished queries are
+    served from memory for ttl seconds. A range query can also be served by a recent or in-flight
+    query of a wider time range, e.g. the query of a workflow with a longer lookback.
+
+    Results are shared by all callers, so they must be treated as read only.
+    """
+
+    def __init__(self, enabled: bool, maxsize: int, ttl: int):
+        """
+        Constructor
+        Args:
+            enabled: queries are always executed directly when it's False
+            maxsize: max number of recent results, results are not kept when it's not positive
+            ttl: seconds a result is kept, results are not kept when it's not positive
+        """
+        self._enabled = enabled
+        self._recent = TTLCache(maxsize, ttl)
+        self._in_flight = {}
+        # query key and the time ranges of its recent results, the newest range first
+        self._ranges = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.shared = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def fetch(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get the result of a query, only one caller executes the query of a key at the same time
+        Args:
+            key: identity of the query, e.g. (url, query, start, end, step)
+            loader: function executing the query
+
+        Returns:
+            result of loader
+
+        Raises:
+            the exception raised by loader, every caller waiting for the query gets it
+        """
+        if not self._enabled:
+            return loader()
+
+        with self._lock:
+            result = self._recent.get(key)
+            if result is not None:
+                return result
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.fetches += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = loader()
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        else:
+            self._recent.set(key, result)
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def fetch_range(
+        self,
+        key: Hashable,
+        time_range: List[int],
+        loader: Callable[[List[int]], Any],
+        slicer: Callable[[Any, List[int]], Any],
+    ) -> Any:
+        """
+        Get the result of a range query, it's cut from a recent or in-flight query of the same key
+        whose time range covers it, otherwise the query is executed
+        Args:
+            key: identity of the query without its time range, e.g. (url, query, step)
+            time_range: [start, end]
+            loader: function executing the query of a time range
+            slicer: function cutting a result to a time range, the result must not be modified
+
+        Returns:
+            result of loader in the time range
+
+        Raises:
+            the exception raised by loader, every caller waiting for the query gets it
+        """
+        if not self._enabled:
+            return loader(time_range)
+
+        start, end = time_range
+        with self._lock:
+            result = self._recent_covering(key, start, end)
+            future = None
+            for (flight_key, flight_start, flight_end), flight in self._in_flight.items():
+                if flight_key == key and flight_start <= start and end <= flight_end:
+                    future = flight
+                    break
+            leader = result is None and future is None
+            if leader:
+                future = Future()
+                self._in_flight[(key, start, end)] = future
+                self.fetches += 1
+            elif result is None:
+                self.shared += 1
+        if result is not None:
+            return slicer(result, time_range)
+        if not leader:
+            return slicer(future.result(), time_range)
+
+        try:
+            result = loader(time_range)
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        else:
+            with self._lock:
+                self._recent.set((key, start, end), result)
+                self._add_range(key, start, end)
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop((key, start, end), None)
+
+    def _recent_covering(self, key: Hashable, start: int, end: int) -> Optional[Any]:
+        for range_start, range_end in self._ranges.get(key, ()):
+            if range_start <= start and end <= range_end:
+                result = self._recent.get((key, range_start, range_end))
+                if result is not None:
+                    return result
+        return None
+
+    def _add_range(self, key: Hashable, start: int, end: int) -> None:
+        # ranges of expired results are dropped with the oldest ones, at most maxsize are kept
+        ranges = [(start, end)] + [item for item in self._ranges.pop(key, []) if item != (start, end)]
+        self._ranges[key] = ranges[:RANGES_PER_KEY]
+        while len(self._ranges) > max(self._maxsize, 0):
+            self._ranges.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """
+        Drop all recent results
+        """
+        with self._lock:
+            self._recent.invalidate()
+            self._ranges.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: e.g. {"fetches": 10, "shared": 3, "hits": 5, "misses": 12, "size": 8}
+        """
+        stats = {"fetches": self.fetches, "shared": self.shared}
+        stats.update(self._recent.stats())
+        return stats
+
+
+def slice_matrix(result: List[dict], time_range: List[int]) -> List[dict]:
+    """
+    Cut the points of a range query result to a time range, the result is not modified
+    Args:
+        result: e.g. [{"metric": {"__name__": "metric1"}, "values": [[1658913069, "1"]]}], values
+            can also be TimeSeries
+        time_range: [start, end]
+
+    Returns:
+        list: same format as result
+    """
+    start, end = time_range
+    sliced = []
+    for series in result:
+        values = series.get("values")
+        if values is None:
+            sliced.append(series)
+        elif isinstance(values, TimeSeries):
+            sliced.append(dict(series, values=values[(values.timestamps >= start) & (values.timestamps <= end)]))
+        else:
+            sliced.append(dict(series, values=[point for point in values if start <= point[0] <= end]))
+    return sliced
+
+fetch_coordinator = FetchCoordinator(
+    configuration.prometheus.get("FETCH_DEDUP") == "on",
+    int(configuration.prometheus.get("FETCH_RESULT_CACHE_SIZE") or 0),
+    int(configuration.prometheus.get("FETCH_RESULT_TTL") or 0),
+)
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: concurrent fetch engine of prometheus queries
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Any
+
+from vulcanus.common import singleton
+from diana.conf import configuration
+
+
+@singleton
+class FetchEngine:
+    """
+    Run independent queries on a process-wide bounded thread pool.
+
+    Only leaf queries should be submitted. A map called inside a worker runs serially on that
+    worker, so nested maps can never wait for a worker which will not be released.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._max_workers = int(configuration.prometheus.get("QUERY_CONCURRENCY") or 1)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="prom-fetch")
+            return self._executor
+
+    def _run_in_worker(self, func: Callable, item: Any) -> Any:
+        self._local.in_worker = True
+        try:
+            return func(item)
+        finally:
+            self._local.in_worker = False
+
+    def map(self, func: Callable, items: Iterable) -> List[Any]:
+        """
+        Call func for every item and return the results in order of items
+        Args:
+            func(Callable): function with one argument
+            items(Iterable): arguments
+
+        Returns:
+            list: results
+        """
+        items = list(items)
+        if self._max_workers <= 1 or len(items) <= 1 or getattr(self._local, "in_worker", False):
+            return [func(item) for item in items]
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._run_in_worker, func, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """
+        Shutdown the thread pool, it will be recreated on next map
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+fetch_engine = FetchEngine()
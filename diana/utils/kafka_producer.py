@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: process-wide pooled kafka producers
+"""
+import atexit
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+from kafka import KafkaProducer
+from kafka.errors import KafkaError
+
+from vulcanus.common import singleton
+from vulcanus.kafka.kafka_exception import ProducerInitError
+from vulcanus.kafka.producer import BaseProducer
+from vulcanus.log.log import LOGGER
+from diana.conf import configuration
+
+# seconds to wait for the delivery of a message sent with wait=True
+SEND_WAIT_TIMEOUT = 10
+
+
+@singleton
+class ProducerManager:
+    """
+    Kafka producers shared by the whole process, one per topic. Messages are sent asynchronously
+    and batched by the producer according to linger_ms and batch_size, the connections and
+    metadata are kept across ticks. Pending messages are flushed when the process exits.
+
+    When pooled_producer is off, a new producer is created for every message as before.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._pooled = configuration.producer.get("POOLED_PRODUCER") == "on"
+        self._producers = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._sent = 0
+        self._failed = 0
+        self._pending = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        if self._pooled:
+            atexit.register(self.close)
+
+    @staticmethod
+    def _create_producer() -> KafkaProducer:
+        compression_type = configuration.producer.get("COMPRESSION_TYPE")
+        api_version = configuration.producer.get("API_VERSION")
+        return KafkaProducer(
+            bootstrap_servers=configuration.producer.get("KAFKA_SERVER_LIST"),
+            api_version=tuple(int(number) for number in str(api_version).split(".")) if api_version else None,
+            acks=configuration.producer.get("ACKS"),
+            retries=configuration.producer.get("RETRIES"),
+            retry_backoff_ms=configuration.producer.get("RETRY_BACKOFF_MS"),
+            linger_ms=configuration.producer.get("LINGER_MS") or 0,
+            batch_size=configuration.producer.get("BATCH_SIZE") or 16384,
+            compression_type=None if compression_type in (None, "", "none") else compression_type,
+            value_serializer=lambda value: json.dumps(value).encode("utf-8"),
+        )
+
+    def _get_producer(self, topic: str) -> Optional[KafkaProducer]:
+        with self._lock:
+            producer = self._producers.get(topic)
+            if producer is None:
+                try:
+                    producer = self._create_producer()
+                except KafkaError as error:
+                    LOGGER.error("Create producer of topic %s failed. %s", topic, error)
+                    return None
+                self._producers[topic] = producer
+            return producer
+
+    def send(self, topic: str, msg: dict, wait: bool = False) -> bool:
+        """
+        Send a message, it's delivered in background when pooled_producer is on
+        Args:
+            topic(str): topic name
+            msg(dict): message which can be dumped into json
+            wait(bool): block until the message is delivered
+
+        Returns:
+            bool: whether the message is accepted, or delivered if wait is True
+        """
+        if not self._pooled:
+            try:
+                BaseProducer(configuration).send_msg(topic, msg)
+                return True
+            except ProducerInitError as error:
+                LOGGER.error("Produce msg of topic %s failed. %s", topic, error)
+                return False
+
+        producer = self._get_producer(topic)
+        if producer is None:
+            return False
+        start = time.perf_counter()
+        try:
+            future = producer.send(topic, value=msg)
+        except KafkaError as error:
+            LOGGER.error("Produce msg of topic %s failed. %s", topic, error)
+            with self._stats_lock:
+                self._failed += 1
+            return False
+        with self._stats_lock:
+            self._pending += 1
+        future.add_callback(self._on_success, start)
+        future.add_errback(self._on_error, topic)
+        if not wait:
+            return True
+        try:
+            future.get(timeout=SEND_WAIT_TIMEOUT)
+        except KafkaError:
+            # it's counted and logged by _on_error
+            return False
+        return True
+
+    def _on_success(self, start: float, _metadata) -> None:
+        latency = time.perf_counter() - start
+        with self._stats_lock:
+            self._pending -= 1
+            self._sent += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    def _on_error(self, topic: str, error: Exception) -> None:
+        LOGGER.error("Deliver msg of topic %s failed. %s", topic, error)
+        with self._stats_lock:
+            self._pending -= 1
+            self._failed += 1
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Block until all pending messages are delivered or failed
+        """
+        with self._lock:
+            producers = list(self._producers.values())
+        for producer in producers:
+            try:
+                producer.flush(timeout)
+            except KafkaError as error:
+                LOGGER.error("Flush producer failed. %s", error)
+
+    def close(self) -> None:
+        """
+        Flush and close all producers, they will be recreated when they are needed again
+        """
+        with self._lock:
+            producers = list(self._producers.values())
+            self._producers.clear()
+        for producer in producers:
+            try:
+                producer.close()
+            except KafkaError as error:
+                LOGGER.error("Close producer failed. %s", error)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            dict: e.g. {"producers": 2, "sent": 100, "failed": 0, "pending": 3,
+                        "latency_avg_ms": 2.5, "latency_max_ms": 10.1}
+        """
+        with self._stats_lock:
+            return {
+                "producers": len(self._producers),
+                "sent": self._sent,
+                "failed": self._failed,
+                "pending": self._pending,
+                "latency_avg_ms": round(self._latency_total / self._sent * 1000, 3) if self._sent else 0.0,
+                "latency_max_ms": round(self._latency_max * 1000, 3),
+            }
+
+
+producer_manager = ProducerManager()
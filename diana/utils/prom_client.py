@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: process-wide pooled prometheus clients
+"""
+import threading
+from typing import Dict
+
+from prometheus_api_client import PrometheusConnect
+from prometheus_api_client.prometheus_connect import MAX_REQUEST_RETRIES, RETRY_BACKOFF_FACTOR, RETRY_ON_STATUS
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from vulcanus.common import singleton
+from diana.conf import configuration
+
+
+@singleton
+class PromClientPool:
+    """
+    Prometheus clients shared by all DataDao objects of this process, one per url. The http
+    connections of a client are kept alive in a pool, so they are reused across workflow ticks,
+    requests and threads.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        concurrency = int(configuration.prometheus.get("QUERY_CONCURRENCY") or 1)
+        self._pool_connections = int(configuration.prometheus.get("POOL_CONNECTIONS") or 10)
+        # every fetch thread can hold a connection
+        self._pool_maxsize = max(int(configuration.prometheus.get("POOL_MAXSIZE") or 10), concurrency)
+        self._compression = configuration.prometheus.get("HTTP_COMPRESSION") != "off"
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, url: str) -> PrometheusConnect:
+        """
+        Get the pooled client of the url, create it for the first time
+        Args:
+            url(str): e.g. http://127.0.0.1:9090
+
+        Returns:
+            PrometheusConnect
+        """
+        with self._lock:
+            client = self._clients.get(url)
+            if client is None:
+                client = self._create_client(url)
+                self._clients[url] = client
+            return client
+
+    def _create_client(self, url: str) -> PrometheusConnect:
+        # requests asks for compressed responses by default, so "off" has to ask for identity
+        headers = {"Accept-Encoding": "gzip, deflate" if self._compression else "identity"}
+        client = PrometheusConnect(url=url, headers=headers, disable_ssl=True)
+        client._session.headers.update(headers)
+        retry = Retry(total=MAX_REQUEST_RETRIES, backoff_factor=RETRY_BACKOFF_FACTOR, status_forcelist=RETRY_ON_STATUS)
+        # replace the default adapter of the url, whose pool only keeps 10 connections
+        client._session.mount(
+            url,
+            HTTPAdapter(pool_connections=self._pool_connections, pool_maxsize=self._pool_maxsize, max_retries=retry),
+        )
+        return client
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: e.g. {"clients": 1, "pool_maxsize": 10}
+        """
+        with self._lock:
+            return {"clients": len(self._clients), "pool_maxsize": self._pool_maxsize}
+
+    def close(self) -> None:
+        """
+        Close all pooled connections, clients will be recreated when they are needed again
+        """
+        with self._lock:
+            for client in self._clients.values():
+                client._session.close()
+            self._clients.clear()
+
+
+prom_client_pool = PromClientPool()
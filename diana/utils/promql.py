@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: helpers to parse and build PromQL series selectors
+"""
+import re
+from typing import Dict, List, Tuple, Optional
+
+_LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*"((?:[^"\\]|\\.)*)"')
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+
+
+def parse_duration(duration) -> int:
+    """
+    Convert a prometheus duration or a number of seconds into seconds
+    Args:
+        duration(str/int): e.g. "15s", "1m30s", 15
+
+    Returns:
+        int: seconds, at least 1
+    """
+    if isinstance(duration, (int, float)):
+        return max(int(duration), 1)
+    duration = str(duration).strip()
+    try:
+        return max(int(float(duration)), 1)
+    except ValueError:
+        pass
+    matches = _DURATION_PATTERN.findall(duration)
+    if not matches or "".join(value + unit for value, unit in matches) != duration:
+        raise ValueError("invalid duration %s" % duration)
+    return max(int(sum(float(value) * _DURATION_UNITS[unit] for value, unit in matches)), 1)
+
+
+def escape_label_value(value: str) -> str:
+    """
+    Escape a label value so that it can be put inside double quotes of PromQL
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def instance_regex(instances: List[str]) -> str:
+    """
+    Build a regex which matches any of the instances exactly
+    Args:
+        instances(list): e.g. ["172.168.128.164:9100", "172.168.128.165:9100"]
+
+    Returns:
+        str: e.g. '172\\.168\\.128\\.164:9100|172\\.168\\.128\\.165:9100'
+    """
+    return "|".join(re.escape(instance) for instance in instances)
+
+
+def parse_series(series: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split a series string into metric name and label dict
+    Args:
+        series(str): e.g. 'metric1{instance="172.168.128.164:9100",label1="value1"}'
+
+    Returns:
+        str: metric name, e.g. metric1
+        dict: labels, e.g. {"instance": "172.168.128.164:9100", "label1": "value1"}
+    """
+    index = series.find('{')
+    if index == -1:
+        return series.strip(), {}
+
+    labels = {}
+    for label_name, label_value in _LABEL_PATTERN.findall(series[index + 1 : series.rfind('}')]):
+        labels[label_name] = label_value.replace('\\"', '"').replace('\\\\', '\\')
+    return series[:index].strip(), labels
+
+
+def build_selector(
+    metric_name: str, labels: Optional[Dict[str, str]] = None, regex_labels: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Build series selector by metric name and label matchers
+    Args:
+        metric_name(str): metric name, can be empty
+        labels(dict): equality matchers, e.g. {"instance": "172.168.128.164:9100"}
+        regex_labels(dict): regex matchers, e.g. {"instance": "172.168.128.164:9100|172.168.128.165:9100"}
+
+    Returns:
+        str: e.g. 'metric1{instance="172.168.128.164:9100"}'
+    """
+    matchers = []
+    for label_name, label_value in sorted((labels or {}).items()):
+        matchers.append('%s="%s"' % (label_name, escape_label_value(label_value)))
+    for label_name, label_value in sorted((regex_labels or {}).items()):
+        matchers.append('%s=~"%s"' % (label_name, escape_label_value(label_value)))
+
+    if not matchers:
+        return metric_name
+    return "%s{%s}" % (metric_name, ",".join(matchers))
@@ -1,6 +1,6 @@
 # from typing_extensions import Required
 from urllib import request
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 
 
 class QueryHostMetricNamesSchema(Schema):
@@ -11,6 +11,8 @@ class QueryHostMetricDataSchema(Schema):
     time_range = fields.List(fields.Integer, required=True)
     query_ip = fields.String(required=True)
     query_info = fields.Dict()
+    max_points = fields.Integer(required=False, validate=validate.Range(min=3))
+    downsample = fields.String(required=False, validate=validate.OneOf(["lttb", "min_max"]))
 
 
 class QueryHostMetricListSchema(Schema):
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: log the counters of caches, producers and consumers periodically
+"""
+import threading
+from typing import Any, Callable, Dict
+
+from vulcanus.log.log import LOGGER
+
+from diana.conf import configuration
+
+
+class StatsReporter:
+    """
+    Log the stats of the registered sources every interval seconds in a daemon thread, e.g.
+    "series_cache stats: {'hits': 10, 'misses': 2, 'size': 2}"
+    """
+
+    def __init__(self, interval: int):
+        """
+        Constructor
+        Args:
+            interval: seconds between two reports, nothing is reported when it's not positive
+        """
+        self._interval = interval
+        self._sources: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, source: Callable[[], Any]) -> None:
+        """
+        Register a source of stats
+        Args:
+            name: name in the log, a source registered with the same name is replaced
+            source: function returning the stats
+        """
+        with self._lock:
+            self._sources[name] = source
+
+    def report(self) -> None:
+        with self._lock:
+            sources = list(self._sources.items())
+        for name, source in sources:
+            try:
+                LOGGER.info("%s stats: %s", name, source())
+            except Exception as error:
+                LOGGER.error("Get %s stats failed. %s", name, error)
+
+    def start(self) -> None:
+        if self._interval <= 0 or self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-reporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            self.report()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+stats_reporter = StatsReporter(int(configuration.diana.get("STATS_INTERVAL") or 0))
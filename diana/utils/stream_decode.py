@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: decode prometheus range query responses incrementally
+"""
+from typing import BinaryIO, Dict, List
+
+import numpy as np
+
+from diana.utils.time_series import TimeSeries
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_RESULT_PREFIX = "data.result.item"
+_METRIC_PREFIX = "data.result.item.metric"
+_POINT_PREFIX = "data.result.item.values.item.item"
+
+
+class StreamDecodeError(Exception):
+    """
+    The response is not a successful matrix result
+    """
+
+
+def stream_decode_available() -> bool:
+    return ijson is not None
+
+
+class _SeriesBuffer:
+    """
+    Preallocated arrays of a series which are doubled when they are full
+    """
+
+    def __init__(self, capacity: int):
+        self.metric = {}
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self._timestamp = None
+
+    def add(self, item):
+        # a point is [timestamp, "value"], the timestamp comes first
+        if self._timestamp is None:
+            self._timestamp = item
+            return
+        if self.size == len(self.timestamps):
+            self.timestamps = np.resize(self.timestamps, max(2 * self.size, 1))
+            self.values = np.resize(self.values, max(2 * self.size, 1))
+        self.timestamps[self.size] = int(self._timestamp)
+        self.values[self.size] = float(item)
+        self.size += 1
+        self._timestamp = None
+
+    def to_series(self) -> TimeSeries:
+        return TimeSeries(self.timestamps[: self.size], self.values[: self.size])
+
+
+def decode_matrix(stream: BinaryIO, capacity: int) -> List[Dict]:
+    """
+    Decode the body of /api/v1/query_range from a file like stream, the samples are written into
+    arrays directly, so the whole json document is never held in memory.
+    Args:
+        stream: response body
+        capacity: expected point number of each series, e.g. (end - start) / step + 1
+
+    Returns:
+        list: same as PrometheusConnect.custom_query_range, but values are TimeSeries, e.g.
+            [{"metric": {"__name__": "metric1", "instance": "172.168.128.164:9100"}, "values": TimeSeries}]
+
+    Raises:
+        StreamDecodeError
+    """
+    if ijson is None:
+        raise StreamDecodeError("ijson is not installed")
+
+    try:
+        return _decode_matrix(stream, capacity)
+    except ijson.JSONError as error:
+        raise StreamDecodeError(error)
+
+
+def _decode_matrix(stream: BinaryIO, capacity: int) -> List[Dict]:
+    result = []
+    status = None
+    buffer = None
+    label_name = None
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if prefix == _POINT_PREFIX:
+            buffer.add(value)
+        elif prefix == _RESULT_PREFIX:
+            if event == "start_map":
+                buffer = _SeriesBuffer(capacity)
+            elif event == "end_map":
+                result.append({"metric": buffer.metric, "values": buffer.to_series()})
+                buffer = None
+        elif prefix == _METRIC_PREFIX and event == "map_key":
+            label_name = value
+        elif prefix.startswith(_METRIC_PREFIX + ".") and event == "string":
+            buffer.metric[label_name] = value
+        elif prefix == "status":
+            status = value
+        elif prefix == "data.resultType" and value != "matrix":
+            raise StreamDecodeError("unexpected result type %s" % value)
+
+    if status != "success":
+        raise StreamDecodeError("query status is %s" % status)
+    return result
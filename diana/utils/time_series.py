@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: columnar container of a single time series
+"""
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class TimeSeries:
+    """
+    Samples of a series stored in two arrays, so that they are converted only once after the
+    query and can be handed to numpy or pandas without walking the points again.
+
+    It still behaves like the legacy list format [[timestamp, value], ...] when iterated,
+    indexed or compared, so code written for lists keeps working.
+
+    Attributes:
+        timestamps (np.ndarray): int64 unix timestamps in seconds, ascending
+        values (np.ndarray): float64 values
+    """
+
+    __slots__ = ("timestamps", "values")
+
+    def __init__(self, timestamps=None, values=None):
+        """
+        Constructor
+        Args:
+            timestamps: array like of timestamps
+            values: array like of values, same length as timestamps
+
+        Raises:
+            ValueError
+        """
+        self.timestamps = np.asarray(timestamps if timestamps is not None else [], dtype=np.int64)
+        self.values = np.asarray(values if values is not None else [], dtype=np.float64)
+        if self.timestamps.shape != self.values.shape:
+            raise ValueError("timestamps and values have different shapes")
+
+    @classmethod
+    def from_points(cls, points: Union["TimeSeries", List[list]]) -> "TimeSeries":
+        """
+        Build from the legacy list format
+        Args:
+            points: e.g. [[1658913069.123, '1'], [1658913084.123, '2']], value can be str or number
+
+        Returns:
+            TimeSeries
+        """
+        if isinstance(points, TimeSeries):
+            return points
+        count = len(points)
+        timestamps = np.fromiter((point[0] for point in points), dtype=np.float64, count=count)
+        values = np.fromiter((point[1] for point in points), dtype=np.float64, count=count)
+        return cls(timestamps.astype(np.int64), values)
+
+    @staticmethod
+    def merge(series_list: List["TimeSeries"], method: str) -> "TimeSeries":
+        """
+        Merge series into one by timestamp
+        Args:
+            series_list: series to merge
+            method: 'sum' or 'avg', the average is rounded to 3 decimals
+
+        Returns:
+            TimeSeries: samples sorted by timestamp
+        """
+        if not series_list:
+            return TimeSeries()
+        timestamps = np.concatenate([series.timestamps for series in series_list])
+        values = np.concatenate([series.values for series in series_list])
+        unique_timestamps, inverse = np.unique(timestamps, return_inverse=True)
+        merged = np.bincount(inverse, weights=values, minlength=len(unique_timestamps))
+        if method == "avg":
+            merged = np.round(merged / np.bincount(inverse, minlength=len(unique_timestamps)), 3)
+        return TimeSeries(unique_timestamps, merged)
+
+    def start_index(self, start_time_stamp: int) -> int:
+        """
+        Get the first index whose timestamp >= the start time stamp, -1 if there is none
+        """
+        index = int(np.searchsorted(self.timestamps, start_time_stamp, side="left"))
+        return -1 if index == len(self.timestamps) else index
+
+    def to_list(self) -> List[list]:
+        """
+        Returns:
+            list: legacy format, e.g. [[1658913069, 1.0], [1658913084, 2.0]]
+        """
+        return [list(point) for point in zip(self.timestamps.tolist(), self.values.tolist())]
+
+    def to_pandas(self) -> pd.Series:
+        """
+        Returns:
+            pd.Series: values indexed by timestamps
+        """
+        return pd.Series(self.values, index=self.timestamps)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator[list]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index) -> Union["TimeSeries", list]:
+        if isinstance(index, (slice, np.ndarray, list)):
+            return TimeSeries(self.timestamps[index], self.values[index])
+        return [int(self.timestamps[index]), float(self.values[index])]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TimeSeries):
+            return np.array_equal(self.timestamps, other.timestamps) and np.array_equal(self.values, other.values)
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return "TimeSeries(%s)" % self.to_list()
+
+
+def to_columnar(points: Optional[list]) -> Optional[TimeSeries]:
+    """
+    Convert queried data list into TimeSeries, None stays None
+    """
+    if points is None:
+        return None
+    return TimeSeries.from_points(points)
@@ -0,0 +1,517 @@
+#!/usr/bin/python3
+# ******************************************************************************
+# Copyright (c) Huawei Technologies Co., Ltd. 2022-2022. All rights reserved.
+# licensed under the Mulan PSL v2.
+# You can use this software according to the terms and conditions of the Mulan PSL v2.
+# You may obtain a copy of Mulan PSL v2 at:
+#     http://license.coscl.org.cn/MulanPSL2
+# THIS SOFTWARE IS PROVIDED ON AN 'AS IS' BASIS, WITHOUT WARRANTIES OF ANY KIND, EITHER EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO NON-INFRINGEMENT, MERCHANTABILITY OR FIT FOR A PARTICULAR
+# PURPOSE.
+# See the Mulan PSL v2 for more details.
+# ******************************************************************************/
+"""
+Time: 2026-10-18
+Author:
+Description: replay recorded prometheus data for offline benchmarking of the fetch path
+
+A dataset is a json lines file, optionally gzipped, with one series per line:
+    {"metric": {"__name__": "metric1", "instance": "172.168.128.164:9100"}, "values": [[1658913069, "1"], ...]}
+
+Usage:
+    record prometheus data:
+        python3 prom_replay.py record --url http://127.0.0.1:9090 --match '{instance="172.168.128.164:9100"}' \
+            --start 1658913000 --end 1658916600 --output mysql.jsonl.gz
+    serve it, shifted to end now and with 100 copies of every instance:
+        python3 prom_replay.py serve --dataset mysql.jsonl.gz --port 19090 --shift --replicas 100
+    print the host list served, which can be given to DataDao.query_data:
+        python3 prom_replay.py hosts --dataset mysql.jsonl.gz --replicas 100
+    benchmark DataDao against it:
+        python3 prom_replay.py bench --dataset mysql.jsonl.gz --url http://127.0.0.1:19090 --replicas 100
+
+record, serve and hosts only need requests. bench imports DataDao, so aops-diana and its
+dependencies (numpy, prometheus_api_client, and ijson when stream_decode is on) must be installed.
+
+Only the PromQL used by diana is supported: series selectors with =, !=, =~ and !~ matchers, selectors
+joined by "or", and "sum by (labels) (selector)".
+"""
+import argparse
+import bisect
+import gzip
+import ipaddress
+import json
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+# samples older than it are not used by instant queries and range query steps, same as prometheus
+LOOKBACK_DELTA = 300
+
+_MATCHER_PATTERN = re.compile(r'\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*(=~|!~|!=|=)\s*"((?:[^"\\]|\\.)*)"\s*,?')
+_NAME_PATTERN = re.compile(r'\s*([a-zA-Z_:][a-zA-Z0-9_:]*)?\s*')
+_SUM_PATTERN = re.compile(r'^\s*sum\s+by\s*\(([^)]*)\)\s*\((.*)\)\s*$', re.S)
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+
+
+class QueryError(Exception):
+    """
+    The query is not supported
+    """
+
+
+def parse_time(value: str) -> float:
+    """
+    Parse a unix timestamp or a duration, e.g. "1658913069.123", "15s"
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    matches = _DURATION_PATTERN.findall(value)
+    if not matches or "".join(number + unit for number, unit in matches) != value:
+        raise QueryError("invalid time or duration %s" % value)
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in matches)
+
+
+def parse_selector(selector: str) -> List[Tuple[str, str, str]]:
+    """
+    Parse a series selector into matchers
+    Args:
+        selector: e.g. 'metric1{instance=~"172\\.168\\.128\\.164:9100",label1="value1"}'
+
+    Returns:
+        list: (label, operator, value), e.g. [("__name__", "=", "metric1"), ("instance", "=~", "...")]
+    """
+    name_match = _NAME_PATTERN.match(selector)
+    matchers = []
+    if name_match.group(1):
+        matchers.append(("__name__", "=", name_match.group(1)))
+    rest = selector[name_match.end():].strip()
+    if rest:
+        if not (rest.startswith("{") and rest.endswith("}")):
+            raise QueryError("unsupported selector %s" % selector)
+        body, position = rest[1:-1], 0
+        while position < len(body.rstrip()):
+            matcher = _MATCHER_PATTERN.match(body, position)
+            if matcher is None:
+                raise QueryError("unsupported selector %s" % selector)
+            value = re.sub(r'\\(.)', r'\1', matcher.group(3))
+            matchers.append((matcher.group(1), matcher.group(2), value))
+            position = matcher.end()
+    if not matchers:
+        raise QueryError("empty selector")
+    return matchers
+
+
+def split_or(query: str) -> List[str]:
+    """
+    Split selectors joined by "or", quoted values are kept as they are
+    """
+    parts, start, quoted, index = [], 0, False, 0
+    while index < len(query):
+        char = query[index]
+        if char == "\\" and quoted:
+            index += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and query.startswith(" or ", index):
+            parts.append(query[start:index].strip())
+            start = index + 4
+            index += 3
+        index += 1
+    parts.append(query[start:].strip())
+    return parts
+
+
+class Series:
+    """
+    Samples of a recorded series
+    """
+
+    __slots__ = ("labels", "timestamps", "values")
+
+    def __init__(self, labels: Dict[str, str], timestamps: List[float], values: List[str]):
+        self.labels = labels
+        self.timestamps = timestamps
+        self.values = values
+
+    def matches(self, matchers: List[Tuple[str, str, str]]) -> bool:
+        for label, operator, value in matchers:
+            actual = self.labels.get(label, "")
+            if operator == "=" and actual != value:
+                return False
+            if operator == "!=" and actual == value:
+                return False
+            if operator == "=~" and re.fullmatch(value, actual) is None:
+                return False
+            if operator == "!~" and re.fullmatch(value, actual) is not None:
+                return False
+        return True
+
+    def value_at(self, timestamp: float) -> Optional[str]:
+        index = bisect.bisect_right(self.timestamps, timestamp) - 1
+        if index < 0 or self.timestamps[index] < timestamp - LOOKBACK_DELTA:
+            return None
+        return self.values[index]
+
+
+def replica_instance(instance: str, index: int, replica: int, instance_count: int) -> str:
+    """
+    Instance of a copy of the recorded instance, copy 0 is the recorded one
+    """
+    if replica == 0:
+        return instance
+    port = instance.rsplit(":", 1)[1] if ":" in instance else "9100"
+    address = ipaddress.IPv4Address(int(ipaddress.IPv4Address("10.0.0.0")) + replica * instance_count + index)
+    return "%s:%s" % (address, port)
+
+
+class Dataset:
+    """
+    Recorded series held in memory, queried like prometheus
+    """
+
+    def __init__(self, series: List[Series]):
+        self.series = series
+
+    @classmethod
+    def load(cls, path: str, replicas: int = 1, shift: bool = False) -> "Dataset":
+        """
+        Load a dataset file
+        Args:
+            path: json lines file, gzipped if it ends with .gz
+            replicas: number of copies of every instance, see replica_instance
+            shift: move timestamps so that the last sample is now, workflows query the recent data
+
+        Returns:
+            Dataset
+        """
+        recorded = list(read_dataset(path))
+        offset = 0
+        if shift and recorded:
+            offset = int(time.time()) - max(item["values"][-1][0] for item in recorded if item["values"])
+        instances = sorted({item["metric"].get("instance", "") for item in recorded})
+        instance_index = {instance: index for index, instance in enumerate(instances)}
+
+        series = []
+        for replica in range(max(replicas, 1)):
+            for item in recorded:
+                labels = dict(item["metric"])
+                if "instance" in labels:
+                    labels["instance"] = replica_instance(
+                        labels["instance"], instance_index[labels["instance"]], replica, len(instances)
+                    )
+                timestamps = [point[0] + offset for point in item["values"]]
+                series.append(Series(labels, timestamps, [str(point[1]) for point in item["values"]]))
+        return cls(series)
+
+    def instances(self) -> List[str]:
+        return sorted({series.labels["instance"] for series in self.series if "instance" in series.labels})
+
+    def select(self, selector: str) -> List[Series]:
+        matchers = parse_selector(selector)
+        return [series for series in self.series if series.matches(matchers)]
+
+    def _select_query(self, query: str) -> Tuple[List[Series], Optional[List[str]]]:
+        sum_match = _SUM_PATTERN.match(query)
+        if sum_match:
+            by_labels = [label.strip() for label in sum_match.group(1).split(",") if label.strip()]
+            return self.select(sum_match.group(2)), by_labels
+        selected, seen = [], set()
+        for selector in split_or(query):
+            for series in self.select(selector):
+                if id(series) not in seen:
+                    seen.add(id(series))
+                    selected.append(series)
+        return selected, None
+
+    def query_range(self, query: str, start: float, end: float, step: float) -> List[Dict]:
+        """
+        Evaluate a range query, a step takes the last sample within the lookback delta
+        """
+        if step <= 0:
+            raise QueryError("zero or negative query resolution step widths are not accepted")
+        steps = []
+        timestamp = start
+        while timestamp <= end:
+            steps.append(timestamp)
+            timestamp += step
+        selected, by_labels = self._select_query(query)
+
+        if by_labels is None:
+            result = []
+            for series in selected:
+                values = [[ts, value] for ts, value in ((ts, series.value_at(ts)) for ts in steps) if value is not None]
+                if values:
+                    result.append({"metric": series.labels, "values": values})
+            return result
+
+        sums, group_labels = {}, {}
+        for series in selected:
+            key = tuple(series.labels.get(label, "") for label in by_labels)
+            group_labels[key] = {label: value for label, value in zip(by_labels, key) if value}
+            samples = sums.setdefault(key, {})
+            for ts in steps:
+                value = series.value_at(ts)
+                if value is not None:
+                    samples[ts] = samples.get(ts, 0.0) + float(value)
+        return [
+            {"metric": group_labels[key], "values": [[ts, format_value(samples[ts])] for ts in sorted(samples)]}
+            for key, samples in sums.items()
+            if samples
+        ]
+
+    def query(self, query: str, timestamp: float) -> List[Dict]:
+        """
+        Evaluate an instant query
+        """
+        result = []
+        for item in self.query_range(query, timestamp, timestamp, 1):
+            result.append({"metric": item["metric"], "value": item["values"][-1]})
+        return result
+
+    def series_labels(self, match: List[str], start: float, end: float) -> List[Dict[str, str]]:
+        """
+        Label sets of series matched by any of the selectors which have samples in the time range
+        """
+        result, seen = [], set()
+        for selector in match:
+            for series in self.select(selector):
+                index = bisect.bisect_left(series.timestamps, start)
+                if id(series) in seen or index == len(series.timestamps) or series.timestamps[index] > end:
+                    continue
+                seen.add(id(series))
+                result.append(series.labels)
+        return result
+
+
+def format_value(value: float) -> str:
+    return repr(int(value)) if value == int(value) else repr(value)
+
+
+def read_dataset(path: str) -> Iterator[Dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as file_io:
+        for line in file_io:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_dataset(path: str, items: Iterator[Dict]) -> int:
+    opener = gzip.open if path.endswith(".gz") else open
+    count = 0
+    with opener(path, "wt", encoding="utf-8") as file_io:
+        for item in items:
+            file_io.write(json.dumps(item, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Prometheus http api over a dataset, the dataset is set on the server
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self._handle(url.path, parse_qs(url.query))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items():
+            params.setdefault(key, []).extend(values)
+        self._handle(url.path, params)
+
+    def _handle(self, path: str, params: Dict[str, List[str]]):
+        dataset = self.server.dataset
+        now = time.time()
+        try:
+            if path == "/api/v1/query_range":
+                data = {
+                    "resultType": "matrix",
+                    "result": dataset.query_range(
+                        params["query"][0],
+                        parse_time(params["start"][0]),
+                        parse_time(params["end"][0]),
+                        parse_time(params["step"][0]),
+                    ),
+                }
+            elif path == "/api/v1/query":
+                timestamp = parse_time(params["time"][0]) if "time" in params else now
+                data = {"resultType": "vector", "result": dataset.query(params["query"][0], timestamp)}
+            elif path == "/api/v1/series":
+                start = parse_time(params["start"][0]) if "start" in params else now - LOOKBACK_DELTA
+                end = parse_time(params["end"][0]) if "end" in params else now
+                data = dataset.series_labels(params.get("match[]", []), start, end)
+            elif path == "/api/v1/label/__name__/values":
+                data = sorted({series.labels.get("__name__", "") for series in dataset.series})
+            else:
+                self._reply(404, {"status": "error", "errorType": "not_found", "error": path})
+                return
+        except (KeyError, QueryError, re.error) as error:
+            self._reply(400, {"status": "error", "errorType": "bad_data", "error": str(error)})
+            return
+        self._reply(200, {"status": "success", "data": data})
+
+    def _reply(self, code: int, body: Dict):
+        content = json.dumps(body).encode("utf-8")
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            content = gzip.compress(content, compresslevel=1)
+            encoding = "gzip"
+        else:
+            encoding = None
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def create_server(dataset: Dataset, host: str = "127.0.0.1", port: int = 0, verbose: bool = False):
+    """
+    Create a replay server, call serve_forever to start it, port 0 chooses a free port
+    """
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.dataset = dataset
+    server.verbose = verbose
+    return server
+
+
+def record(url: str, match: List[str], start: int, end: int, step: str) -> Iterator[Dict]:
+    """
+    Record series matched by the selectors from a prometheus server, one range query per selector
+    """
+    session = requests.Session()
+    seen = set()
+    for selector in match:
+        response = session.get(
+            url.rstrip("/") + "/api/v1/query_range",
+            params={"query": selector, "start": start, "end": end, "step": step},
+        )
+        response.raise_for_status()
+        for item in response.json()["data"]["result"]:
+            key = tuple(sorted(item["metric"].items()))
+            if key not in seen:
+                seen.add(key)
+                yield {"metric": item["metric"], "values": item["values"]}
+
+
+def host_list(instances: List[str]) -> List[Dict]:
+    """
+    Host list of DataDao.query_data, one host per instance
+    """
+    hosts = []
+    for index, instance in enumerate(instances):
+        host_ip, port = instance.rsplit(":", 1)
+        hosts.append({"host_id": "host%d" % index, "host_ip": host_ip, "instance_port": int(port)})
+    return hosts
+
+
+def bench(url: str, hosts: List[Dict], window: int, iterations: int, workflows: int) -> Dict[str, float]:
+    """
+    Query the data of the hosts like workflow ticks, several workflows query at the same time
+    """
+    try:
+        from diana.database.dao.data_dao import DataDao
+    except ImportError as error:
+        raise SystemExit("bench needs aops-diana and its dependencies installed, %s" % error)
+
+    host, port = urlparse(url).hostname, urlparse(url).port
+    latencies, lock = [], threading.Lock()
+
+    def run_workflow():
+        data_dao = DataDao(host, port)
+        data_dao.connect()
+        for _ in range(iterations):
+            end = int(time.time())
+            begin = time.perf_counter()
+            data_dao.query_data([end - window, end], hosts, incremental=True, columnar=True)
+            with lock:
+                latencies.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    threads = [threading.Thread(target=run_workflow) for _ in range(workflows)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - begin
+
+    latencies.sort()
+    return {
+        "queries": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 3),
+        "latency_mean": round(statistics.mean(latencies), 4),
+        "latency_p50": round(latencies[len(latencies) // 2], 4),
+        "latency_p99": round(latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)], 4),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="replay recorded prometheus data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record data from a prometheus server")
+    record_parser.add_argument("--url", required=True)
+    record_parser.add_argument("--match", action="append", required=True, help="series selector, repeatable")
+    record_parser.add_argument("--start", type=int, required=True)
+    record_parser.add_argument("--end", type=int, required=True)
+    record_parser.add_argument("--step", default="15s")
+    record_parser.add_argument("--output", required=True)
+
+    for name in ("serve", "hosts", "bench"):
+        sub_parser = subparsers.add_parser(name)
+        sub_parser.add_argument("--dataset", required=True)
+        sub_parser.add_argument("--replicas", type=int, default=1, help="copies of every recorded instance")
+    serve_parser = subparsers.choices["serve"]
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=19090)
+    serve_parser.add_argument("--shift", action="store_true", help="move the last sample to now")
+    serve_parser.add_argument("--verbose", action="store_true")
+    bench_parser = subparsers.choices["bench"]
+    bench_parser.add_argument("--url", default="http://127.0.0.1:19090")
+    bench_parser.add_argument("--window", type=int, default=1500, help="seconds queried by every tick")
+    bench_parser.add_argument("--iterations", type=int, default=10, help="ticks of every workflow")
+    bench_parser.add_argument("--workflows", type=int, default=1, help="workflows querying at the same time")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        count = write_dataset(args.output, record(args.url, args.match, args.start, args.end, args.step))
+        print("%d series recorded into %s" % (count, args.output))
+        return
+
+    dataset = Dataset.load(args.dataset, args.replicas, shift=getattr(args, "shift", False))
+    if args.command == "hosts":
+        json.dump(host_list(dataset.instances()), sys.stdout, indent=2)
+        print()
+    elif args.command == "serve":
+        server = create_server(dataset, args.host, args.port, args.verbose)
+        print("serving %d series on %s:%d" % (len(dataset.series), args.host, server.server_address[1]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    else:
+        print(json.dumps(bench(args.url, host_list(dataset.instances()), args.window, args.iterations, args.workflows)))
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,8 @@ REQUIRES = [
     'PyMySQL',
     'scipy',
     'adtk',
+    'ijson',
+    'redis',
 ]
 
 setup(